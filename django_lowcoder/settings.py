@@ -200,6 +200,47 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_ROOT = "upload/"
 
+# In-memory LRU cache of parsed import sheets, bounded per process
+IMPORT_SHEET_CACHE_MAX_BYTES = int(
+    os.getenv("IMPORT_SHEET_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+)
+IMPORT_SHEET_CACHE_MAX_ENTRIES = int(os.getenv("IMPORT_SHEET_CACHE_MAX_ENTRIES", 64))
+# Rows per chunk of the streaming import
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 50_000))
+# Processes parsing the sheets of a workbook concurrently, 1 parses them one
+# after another while streaming, more parse every sheet completely at once
+IMPORT_PARSE_WORKERS = int(os.getenv("IMPORT_PARSE_WORKERS", 1))
+# Seconds a worker may parse a single sheet, 0 for no limit
+IMPORT_SHEET_TIMEOUT = int(os.getenv("IMPORT_SHEET_TIMEOUT", 300))
+# Keep a columnar copy (arrow) of every parsed spreadsheet sheet next to the
+# upload, later reads map it instead of parsing the spreadsheet again
+IMPORT_SHEET_SIDECAR = os.getenv("IMPORT_SHEET_SIDECAR", "True") == "True"
+# Propose the fields of sheets with more rows than this from a sample of
+# this size plus the first and last IMPORT_SAMPLE_HEAD_TAIL_ROWS rows, 0
+# inspects every value
+IMPORT_SAMPLE_ROWS = int(os.getenv("IMPORT_SAMPLE_ROWS", 0))
+IMPORT_SAMPLE_HEAD_TAIL_ROWS = int(os.getenv("IMPORT_SAMPLE_HEAD_TAIL_ROWS", 1000))
+# Check type, lengths and digits of sampled columns on all rows
+IMPORT_SAMPLE_VERIFY = os.getenv("IMPORT_SAMPLE_VERIFY", "True") == "True"
+# Estimate the distinct values of a column in fixed memory (HyperLogLog)
+# beyond this many values or after its first duplicate, unset counts exactly
+IMPORT_DISTINCT_SKETCH_AFTER = (
+    int(os.environ["IMPORT_DISTINCT_SKETCH_AFTER"])
+    if os.getenv("IMPORT_DISTINCT_SKETCH_AFTER")
+    else None
+)
+# Most frequent values kept in the profile of columns with too many distinct
+# values to count them all (Misra-Gries), 0 keeps none
+IMPORT_PROFILE_TOP_VALUES = int(os.getenv("IMPORT_PROFILE_TOP_VALUES", 0))
+# Processes profiling the columns of a sheet concurrently, 1 profiles them
+# in the importing thread
+IMPORT_PROFILE_WORKERS = int(os.getenv("IMPORT_PROFILE_WORKERS", 1))
+# Parse and profile uploaded files in an import job before they get imported
+IMPORT_PREPARE_ON_UPLOAD = os.getenv("IMPORT_PREPARE_ON_UPLOAD", "True") == "True"
+# Run queued import jobs in a thread of the web process, otherwise
+# "manage.py run_import_jobs" has to be running
+IMPORT_JOBS_IN_PROCESS = os.getenv("IMPORT_JOBS_IN_PROCESS", "True") == "True"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,30 @@
+import json
+from importlib.util import find_spec
+from typing import Any
+
+
+def is_available() -> bool:
+    """orjson is an optional dependency, json is used without it."""
+    return find_spec("orjson") is not None
+
+
+def dumps(value: Any) -> str:
+    if is_available():
+        import orjson
+
+        try:
+            return orjson.dumps(
+                value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            ).decode()
+        except TypeError:
+            # e.g. integers beyond 64 bit, which json can still write
+            pass
+    return json.dumps(value)
+
+
+def loads(text: str | bytes) -> Any:
+    if is_available():
+        import orjson
+
+        return orjson.loads(text)
+    return json.loads(text)
@@ -12,6 +12,7 @@ from crispy_forms.layout import (
     Div,
 )  # type: ignore
 from django.forms import (
+    ChoiceField,
     ModelForm,
     TypedChoiceField,
     RadioSelect,
@@ -23,6 +24,7 @@ from django.forms import (
     Textarea,
     ModelChoiceField,
 )
+from django.template.defaultfilters import slugify
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 
@@ -34,6 +36,7 @@ from project.models import (
     CodeTemplate,
 )
 from project.services.deploytype import Deploytype
+from project.services.reader_backends import reader_choices
 from project.services.importer import *
 
 TABLE_FULL = "table-full"
@@ -42,6 +45,10 @@ TABLE_TAIL = "table-tail"
 
 SETTINGS = "settings"
 
+# names of the submit buttons of the import form besides the full import
+IMPORT_ACTION_REVIEW = "review"
+IMPORT_ACTION_CHANGES = "import_changes"
+
 
 class ProjectEditForm(ModelForm):
     def __init__(self, *args, **kwargs):
@@ -282,6 +289,8 @@ class ProjectEditFieldForm(ModelForm):
             # noinspection PyUnresolvedReferences
             self.fields["foreign_key_entity"].queryset = Model.objects.none()
 
+        self.init_profile_help_texts()
+
         self.helper = FormHelper(self)
         self.helper.form_method = "post"
         self.helper.form_class = "m-auto"
@@ -352,6 +361,34 @@ class ProjectEditFieldForm(ModelForm):
             ),
         )
 
+    def init_profile_help_texts(self):
+        """Show the bounds of the imported values next to the field settings."""
+        column = self.instance.transformation_column
+        profile = getattr(column, "profile", None) if column else None
+        if profile is None:
+            return
+
+        self.fields["max_length"].help_text = _("Longest value: %(length)s") % {
+            "length": profile.max_length
+        }
+        if profile.has_numeric_values:
+            self.fields["max_digits"].help_text = _("Most digits: %(digits)s") % {
+                "digits": profile.max_digits
+            }
+            self.fields["decimal_places"].help_text = _(
+                "Most decimal places: %(places)s"
+            ) % {"places": profile.decimal_places}
+        self.fields["null"].help_text = _("%(count)s of %(rows)s values are empty") % {
+            "count": profile.null_count,
+            "rows": profile.row_count,
+        }
+        if profile.distinct_count is not None:
+            self.fields["is_unique"].help_text = (
+                _("About %(count)s distinct values")
+                if profile.distinct_estimated
+                else _("%(count)s distinct values")
+            ) % {"count": profile.distinct_count}
+
     class Meta:
         model = ModelField
         fields = [
@@ -414,6 +451,11 @@ class ProjectEditFileForm(ModelForm):
         help_text=_("Select a file for import."),
         widget=ClearableFileInput(attrs={"accept": ",".join(VALID_MIMETYPES)}),
     )
+    reader = ChoiceField(
+        label=_("reader"),
+        choices=lambda: [("", _("automatic"))] + reader_choices(),
+        required=False,
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -422,6 +464,7 @@ class ProjectEditFileForm(ModelForm):
         self.helper.form_class = "m-auto"
         self.helper.layout = Layout(
             LayoutField("file"),
+            LayoutField("reader"),
             Submit("submit", _("Save"), css_class="spinner-btn"),
             HTML(
                 "{% if object.id %}"
@@ -439,7 +482,7 @@ class ProjectEditFileForm(ModelForm):
 
     class Meta:
         model = TransformationFile
-        fields = ["file"]
+        fields = ["file", "reader"]
 
 
 class ProjectDeleteFileForm(ModelForm):
@@ -477,11 +520,12 @@ def var_name_id(sheet_name: str, v_name: str) -> str:
 
 
 class FloatingFieldWithHtmx(FloatingField):
-    def __init__(self, file_pk, sheet, *args, **kwargs):
-        self.add_to_kwargs("hx_get", get_success_url(file_pk), kwargs)
+    def __init__(self, sheet_url, sheet, *args, **kwargs):
+        self.add_to_kwargs("hx_get", sheet_url, kwargs)
         self.add_to_kwargs("hx_include", var_name_id(sheet, SETTINGS), kwargs)
         self.add_to_kwargs("hx_target", var_name_id(sheet, TABLE_FULL), kwargs)
         self.add_to_kwargs("hx_select", var_name_id(sheet, TABLE_FULL), kwargs)
+        self.add_to_kwargs("hx_swap", "outerHTML", kwargs)
         super().__init__(*args, **kwargs)
 
     @staticmethod
@@ -493,6 +537,12 @@ def get_success_url(file_pk):
     return reverse_lazy("project_import_file", kwargs={"pk": file_pk})
 
 
+def get_sheet_url(file_pk, sheet_index: int):
+    return reverse_lazy(
+        "project_import_file_sheet", kwargs={"pk": file_pk, "sheet": sheet_index}
+    )
+
+
 class ProjectImportFileForm(Form):
 
     # noinspection PyUnusedLocal
@@ -511,13 +561,16 @@ class ProjectImportFileForm(Form):
         self.declared_fields[field_name] = self.__getattribute__(field_name)
         self.base_fields[field_name] = self.__getattribute__(field_name)
 
-    def init_helper(self, df_by_sheet, file_pk: int):
+    def init_helper(self, params_by_sheet, file_pk: int):
+        """
+        Only renders the tab shells, the table section of every sheet is
+        loaded by htmx as soon as its tab gets visible.
+        """
         tab_holder: TabHolder = TabHolder()
         sheet: str
-        df_settings: tuple[DataFrame, SheetReaderParams]
-        for sheet, df_settings in df_by_sheet.items():
-            df: DataFrame = df_settings[0]
-            settings: SheetReaderParams = df_settings[1]
+        settings: SheetReaderParams
+        for sheet_index, (sheet, settings) in enumerate(params_by_sheet.items()):
+            sheet_url = get_sheet_url(file_pk, sheet_index)
             self.register_fields(sheet, settings)
             tab_holder.fields.append(
                 Tab(
@@ -530,7 +583,7 @@ class ProjectImportFileForm(Form):
                         Row(
                             Column(
                                 FloatingFieldWithHtmx(
-                                    file_pk,
+                                    sheet_url,
                                     sheet,
                                     var_name(sheet, READ_PARAM_HEADER),
                                 ),
@@ -538,7 +591,7 @@ class ProjectImportFileForm(Form):
                             ),
                             Column(
                                 FloatingFieldWithHtmx(
-                                    file_pk,
+                                    sheet_url,
                                     sheet,
                                     var_name(sheet, READ_PARAM_USECOLS),
                                 ),
@@ -546,7 +599,7 @@ class ProjectImportFileForm(Form):
                             ),
                             Column(
                                 FloatingFieldWithHtmx(
-                                    file_pk,
+                                    sheet_url,
                                     sheet,
                                     var_name(sheet, READ_PARAM_NROWS),
                                 ),
@@ -557,7 +610,7 @@ class ProjectImportFileForm(Form):
                         Row(
                             Column(
                                 FloatingFieldWithHtmx(
-                                    file_pk,
+                                    sheet_url,
                                     sheet,
                                     var_name(sheet, READ_PARAM_SKIPROWS),
                                 ),
@@ -565,7 +618,7 @@ class ProjectImportFileForm(Form):
                             ),
                             Column(
                                 FloatingFieldWithHtmx(
-                                    file_pk,
+                                    sheet_url,
                                     sheet,
                                     var_name(sheet, READ_PARAM_SKIPFOOTER),
                                 ),
@@ -578,73 +631,15 @@ class ProjectImportFileForm(Form):
                     HTML("<hr>"),
                     HTML("<h5>" + _("Table Section") + "</h5>"),
                     Div(
-                        Div(
-                            Row(
-                                Column(
-                                    HTML("<h6>" + _("Head") + "</h6>"),
-                                    css_class="form-group col-md-10 mb-0",
-                                ),
-                                Column(
-                                    FloatingFieldWithHtmx(
-                                        file_pk,
-                                        sheet,
-                                        var_name(sheet, TABLE_PARAM_HEAD_ROWS),
-                                    ),
-                                    css_class="form-group col-md-2 mb-0",
-                                ),
-                                css_class="form-row",
-                            ),
-                            Div(
-                                HTML(
-                                    df.head(
-                                        n=settings.get(
-                                            TABLE_PARAM_HEAD_ROWS,
-                                            DEFAULT_HEAD_TAIL_ROWS,
-                                        )
-                                    ).to_html(
-                                        table_id=var_name(sheet, TABLE_HEAD),
-                                        classes="table table-striped table-bordered table-sm",
-                                        justify="left",
-                                    )
-                                ),
-                                css_class="table-responsive",
-                            ),
-                            css_class="form-row mt-3",
-                        ),
-                        Div(
-                            Row(
-                                Column(
-                                    HTML("<h6>" + _("Tail") + "</h6>"),
-                                    css_class="form-group col-md-10 mb-0",
-                                ),
-                                Column(
-                                    FloatingFieldWithHtmx(
-                                        file_pk,
-                                        sheet,
-                                        var_name(sheet, TABLE_PARAM_TAIL_ROWS),
-                                    ),
-                                    css_class="form-group col-md-2 mb-0",
-                                ),
-                                css_class="form-row",
-                            ),
-                            Div(
-                                HTML(
-                                    df.tail(
-                                        n=settings.get(
-                                            TABLE_PARAM_TAIL_ROWS,
-                                            DEFAULT_HEAD_TAIL_ROWS,
-                                        )
-                                    ).to_html(
-                                        table_id=var_name(sheet, TABLE_TAIL),
-                                        classes="table table-striped table-bordered table-sm",
-                                        justify="left",
-                                    )
-                                ),
-                                css_class="table-responsive",
-                            ),
-                            css_class="form-row mt-3",
+                        HTML(
+                            '<div class="spinner-border spinner-border-sm" '
+                            'role="status"></div> ' + _("Loading...")
                         ),
                         css_id=var_name(sheet, TABLE_FULL),
+                        hx_get=sheet_url,
+                        hx_include=var_name_id(sheet, SETTINGS),
+                        hx_trigger="intersect once",
+                        hx_swap="outerHTML",
                     ),
                 )
             )
@@ -653,6 +648,97 @@ class ProjectImportFileForm(Form):
         self.helper.layout.fields.append(
             Submit("submit", _("Import"), css_class="spinner-btn")
         )
+        # incremental imports only change the fields which changed
+        self.helper.layout.fields.append(
+            Submit(
+                IMPORT_ACTION_REVIEW,
+                _("Review changes"),
+                css_class="btn-secondary spinner-btn",
+            )
+        )
+        self.helper.layout.fields.append(
+            Submit(
+                IMPORT_ACTION_CHANGES,
+                _("Import changes"),
+                css_class="btn-secondary spinner-btn",
+            )
+        )
+
+    def init_sheet_helper(
+        self,
+        sheet: str,
+        preview: SheetPreview,
+        settings: SheetReaderParams,
+        sheet_url,
+    ):
+        self.register_fields(sheet, settings)
+        self.helper.form_tag = False
+        self.helper.layout.fields.append(
+            Div(
+                HTML(
+                    '<p class="text-muted">'
+                    + _("%(rows)s rows") % {"rows": preview.total_rows}
+                    + "</p>"
+                ),
+                Div(
+                    Row(
+                        Column(
+                            HTML("<h6>" + _("Head") + "</h6>"),
+                            css_class="form-group col-md-10 mb-0",
+                        ),
+                        Column(
+                            FloatingFieldWithHtmx(
+                                sheet_url,
+                                sheet,
+                                var_name(sheet, TABLE_PARAM_HEAD_ROWS),
+                            ),
+                            css_class="form-group col-md-2 mb-0",
+                        ),
+                        css_class="form-row",
+                    ),
+                    Div(
+                        HTML(
+                            preview.head.to_html(
+                                table_id=var_name(sheet, TABLE_HEAD),
+                                classes="table table-striped table-bordered table-sm",
+                                justify="left",
+                            )
+                        ),
+                        css_class="table-responsive",
+                    ),
+                    css_class="form-row mt-3",
+                ),
+                Div(
+                    Row(
+                        Column(
+                            HTML("<h6>" + _("Tail") + "</h6>"),
+                            css_class="form-group col-md-10 mb-0",
+                        ),
+                        Column(
+                            FloatingFieldWithHtmx(
+                                sheet_url,
+                                sheet,
+                                var_name(sheet, TABLE_PARAM_TAIL_ROWS),
+                            ),
+                            css_class="form-group col-md-2 mb-0",
+                        ),
+                        css_class="form-row",
+                    ),
+                    Div(
+                        HTML(
+                            preview.tail.to_html(
+                                table_id=var_name(sheet, TABLE_TAIL),
+                                classes="table table-striped table-bordered table-sm",
+                                justify="left",
+                            )
+                        ),
+                        css_class="table-responsive",
+                    ),
+                    css_class="form-row mt-3",
+                ),
+                css_id=var_name(sheet, TABLE_FULL),
+            )
+        )
 
     def register_fields(self, sheet: str, settings: SheetReaderParams):
         self.register_field(
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from project.services.import_jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Run the queued import jobs, e.g. the preparation of uploaded files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when no job is queued anymore",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait for new jobs",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = run_pending_jobs()
+            if count:
+                self.stdout.write(f"{count} import job(s) done")
+            if options["once"]:
+                return
+            time.sleep(options["sleep"])
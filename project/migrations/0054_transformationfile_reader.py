@@ -0,0 +1,47 @@
+# Generated by Django 4.1.7 on 2026-10-17 13:10
+
+import django.core.validators
+from django.db import migrations, models
+import project.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0053_alter_projectsettings_domain_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transformationfile",
+            name="reader",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("", "automatic"),
+                    ("openpyxl", "openpyxl"),
+                    ("xlrd", "xlrd"),
+                    ("odf", "odfpy"),
+                    ("openpyxl_read_only", "openpyxl (read-only)"),
+                    ("calamine", "calamine"),
+                ],
+                default="",
+                max_length=32,
+                verbose_name="reader",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="transformationfile",
+            name="file",
+            field=models.FileField(
+                max_length=200,
+                upload_to=project.models.transformation_files_user_directory_path,
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["csv", "odf", "ods", "xls", "xlsx"]
+                    )
+                ],
+                verbose_name="file",
+            ),
+        ),
+    ]
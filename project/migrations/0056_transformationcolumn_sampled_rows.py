@@ -0,0 +1,20 @@
+# Generated by Django 4.1.7 on 2026-10-17 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0055_importjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transformationcolumn",
+            name="sampled_rows",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="sampled rows"
+            ),
+        ),
+    ]
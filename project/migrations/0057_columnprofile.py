@@ -0,0 +1,86 @@
+# Generated by Django 4.1.7 on 2026-10-17 13:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0056_transformationcolumn_sampled_rows"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ColumnProfile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "row_count",
+                    models.PositiveIntegerField(default=0, verbose_name="rows"),
+                ),
+                (
+                    "null_count",
+                    models.PositiveIntegerField(default=0, verbose_name="empty values"),
+                ),
+                (
+                    "distinct_count",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="distinct values"
+                    ),
+                ),
+                ("has_duplicates", models.BooleanField(default=False)),
+                ("dtype", models.CharField(blank=True, default="", max_length=32)),
+                (
+                    "min_value",
+                    models.JSONField(blank=True, null=True, verbose_name="minimum"),
+                ),
+                (
+                    "max_value",
+                    models.JSONField(blank=True, null=True, verbose_name="maximum"),
+                ),
+                (
+                    "max_length",
+                    models.PositiveIntegerField(default=0, verbose_name="max length"),
+                ),
+                (
+                    "max_digits",
+                    models.PositiveIntegerField(default=0, verbose_name="max digits"),
+                ),
+                (
+                    "decimal_places",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="decimal places"
+                    ),
+                ),
+                ("has_numeric_values", models.BooleanField(default=False)),
+                (
+                    "top_values",
+                    models.JSONField(
+                        blank=True, null=True, verbose_name="most frequent values"
+                    ),
+                ),
+                (
+                    "transformation_column",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="profile",
+                        to="project.transformationcolumn",
+                        verbose_name="transformation column",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "column profile",
+                "verbose_name_plural": "column profiles",
+            },
+        ),
+    ]
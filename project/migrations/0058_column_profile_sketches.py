@@ -0,0 +1,25 @@
+# Generated by Django 4.1.7 on 2026-10-17 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0057_columnprofile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="columnprofile",
+            name="distinct_estimated",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="columnprofile",
+            name="frequent_values",
+            field=models.JSONField(
+                blank=True, null=True, verbose_name="frequent values"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-17 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0058_column_profile_sketches"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="columnprofile",
+            name="has_fractions",
+            field=models.BooleanField(default=True),
+        ),
+    ]
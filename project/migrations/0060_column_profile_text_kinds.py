@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-17 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0059_column_profile_fractions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="columnprofile",
+            name="text_kinds",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
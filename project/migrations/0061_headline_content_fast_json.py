@@ -0,0 +1,19 @@
+# Generated by Django 4.1.7 on 2026-10-17 13:59
+
+from django.db import migrations
+import project.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0060_column_profile_text_kinds"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transformationheadline",
+            name="content",
+            field=project.models.FastJSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.1.7 on 2026-10-17 14:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+import project.models
+
+ROW_BATCH_SIZE = 10_000
+
+
+def move_content_to_row_batches(apps, schema_editor):
+    TransformationHeadline = apps.get_model("project", "TransformationHeadline")
+    TransformationRowBatch = apps.get_model("project", "TransformationRowBatch")
+    for headline in TransformationHeadline.objects.exclude(content=None).iterator():
+        rows = headline.content or []
+        TransformationRowBatch.objects.bulk_create(
+            TransformationRowBatch(
+                transformation_headline=headline,
+                index=i,
+                row_count=len(rows[start : start + ROW_BATCH_SIZE]),
+                rows=rows[start : start + ROW_BATCH_SIZE],
+            )
+            for i, start in enumerate(range(0, len(rows), ROW_BATCH_SIZE))
+        )
+
+
+def move_row_batches_to_content(apps, schema_editor):
+    TransformationHeadline = apps.get_model("project", "TransformationHeadline")
+    for headline in TransformationHeadline.objects.iterator():
+        rows = []
+        for batch in headline.row_batches.order_by("index"):
+            rows.extend(batch.rows)
+        headline.content = rows or None
+        headline.save(update_fields=["content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0061_headline_content_fast_json"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TransformationRowBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.PositiveIntegerField()),
+                ("row_count", models.PositiveIntegerField(default=0)),
+                ("rows", project.models.FastJSONField(default=list)),
+                (
+                    "transformation_headline",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="row_batches",
+                        to="project.transformationheadline",
+                        verbose_name="headline",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "row batch",
+                "verbose_name_plural": "row batches",
+                "ordering": ["transformation_headline", "index"],
+                "unique_together": {("transformation_headline", "index")},
+            },
+        ),
+        migrations.RunPython(move_content_to_row_batches, move_row_batches_to_content),
+        migrations.RemoveField(
+            model_name="transformationheadline",
+            name="content",
+        ),
+    ]
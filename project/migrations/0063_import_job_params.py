@@ -0,0 +1,25 @@
+# Generated by Django 4.1.7 on 2026-10-17 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0062_row_batches"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importjob",
+            name="params",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="importjob",
+            name="kind",
+            field=models.PositiveSmallIntegerField(
+                choices=[(1, "Prepare file"), (2, "Import file")], verbose_name="kind"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-17 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0063_import_job_params"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transformationheadline",
+            name="timezone",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
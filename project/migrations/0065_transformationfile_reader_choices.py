@@ -0,0 +1,20 @@
+# Generated by Django 4.1.7 on 2026-10-17 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0064_headline_timezone"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transformationfile",
+            name="reader",
+            field=models.CharField(
+                blank=True, default="", max_length=32, verbose_name="reader"
+            ),
+        ),
+    ]
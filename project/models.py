@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, Iterator, List, Tuple
 from uuid import uuid4
 
 from django.conf import settings
@@ -12,12 +12,15 @@ from django.core.validators import (
     FileExtensionValidator,
 )
 from django.db import models
+from django.db.models.fields.json import KeyTransform
 from django.db.models.signals import post_delete
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import ngettext_lazy
 from slugify import slugify
 
+from project import fast_json
+
 MIN_PASSWORD_LENGTH = 6
 
 MIN_PROJECT_NAME_LENGTH = 4
@@ -28,7 +31,10 @@ MIN_MODEL_NAME_LENGTH = 3
 MIN_FIELD_NAME_LENGTH = 2
 MIN_NAME_COMMON_LENGTH = 4
 
-VALID_SUFFIXES = ["csv", "odf", "xls", "xlsx"]
+# imported rows per TransformationRowBatch
+ROW_BATCH_SIZE = 10_000
+
+VALID_SUFFIXES = ["csv", "odf", "ods", "xls", "xlsx"]
 VALID_ARCHIVES_SUFFIXES = ["zip"]
 VALID_MIMETYPES = [
     "text/csv",
@@ -68,6 +74,27 @@ def file_cleanup(sender, **kwargs):
                 pass
 
 
+class FastJSONField(models.JSONField):
+    """JSONField for large documents, written and read with orjson if available."""
+
+    def get_prep_value(self, value):
+        if value is None or self.encoder is not None:
+            return super().get_prep_value(value)
+        return fast_json.dumps(value)
+
+    def from_db_value(self, value, expression, connection):
+        if (
+            not isinstance(value, str)
+            or self.decoder is not None
+            or isinstance(expression, KeyTransform)
+        ):
+            return super().from_db_value(value, expression, connection)
+        try:
+            return fast_json.loads(value)
+        except ValueError:
+            return value
+
+
 class TimeStampMixin(models.Model):
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)  # type: ignore
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)  # type: ignore
@@ -393,6 +420,16 @@ class TransformationFile(models.Model):
         validators=[FileExtensionValidator(allowed_extensions=VALID_SUFFIXES)],
     )
 
+    # overrides the reader chosen by suffix and size, e.g. if the fast reader
+    # can't handle a file, empty for the automatic choice; the readers are
+    # offered by ProjectEditFileForm
+    reader = models.CharField(
+        _("reader"),
+        max_length=32,
+        blank=True,
+        default="",
+    )
+
     def filename(self):
         path = Path(self.file.name)
         return f"{path.stem}{path.suffix}"
@@ -405,6 +442,83 @@ post_delete.connect(
 )
 
 
+class ImportJob(TimeStampMixin, models.Model):
+    """
+    Work on a file done by the job worker outside the request, see
+    project.services.import_jobs.
+    """
+
+    class Meta:
+        ordering = ["created_at"]
+        verbose_name = _("import job")
+        verbose_name_plural = _("import jobs")
+
+    class Kind(models.IntegerChoices):
+        PREPARE = (
+            1,
+            _("Prepare file"),
+        )
+        IMPORT = (
+            2,
+            _("Import file"),
+        )
+
+    class State(models.IntegerChoices):
+        QUEUED = (
+            1,
+            _("queued"),
+        )
+        RUNNING = (
+            2,
+            _("running"),
+        )
+        DONE = (
+            3,
+            _("done"),
+        )
+        FAILED = (
+            4,
+            _("failed"),
+        )
+
+    transformation_file = models.ForeignKey(  # type: ignore
+        TransformationFile,
+        on_delete=models.CASCADE,
+        related_name="jobs",
+        verbose_name=_("file"),
+    )
+    kind = models.PositiveSmallIntegerField(  # type: ignore
+        _("kind"), choices=Kind.choices
+    )
+    state = models.PositiveSmallIntegerField(  # type: ignore
+        _("state"), choices=State.choices, default=State.QUEUED
+    )
+    # in percent
+    progress = models.PositiveSmallIntegerField(_("progress"), default=0)  # type: ignore
+    message = models.TextField(_("message"), blank=True, default="")  # type: ignore
+    # the arguments of the job, e.g. the reader params of the sheets
+    params = models.JSONField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    started_at = models.DateTimeField(_("started at"), null=True, blank=True)  # type: ignore
+    finished_at = models.DateTimeField(_("finished at"), null=True, blank=True)  # type: ignore
+
+    def is_finished(self) -> bool:
+        return self.state in (self.State.DONE, self.State.FAILED)
+
+    def is_done(self) -> bool:
+        return self.state == self.State.DONE
+
+    def is_failed(self) -> bool:
+        return self.state == self.State.FAILED
+
+    def __str__(self) -> str:
+        return _("%(kind)s of %(file)s: %(state)s") % {
+            "kind": self.get_kind_display(),
+            "file": self.transformation_file.filename(),
+            "state": self.get_state_display(),
+        }
+
+
 class TransformationSheet(models.Model):
     transformation_file = models.ForeignKey(  # type: ignore
         TransformationFile,
@@ -434,15 +548,71 @@ class TransformationHeadline(models.Model):
     columns: models.QuerySet["TransformationColumn"]  # forward decl for mypy
     model: "Model"  # forward decl for mypy
 
+    row_batches: models.QuerySet["TransformationRowBatch"]  # forward decl for mypy
+
     row_index = models.IntegerField()  # type: ignore
     exclude = models.BooleanField(default=False)  # type: ignore
-
-    content = models.JSONField(null=True, blank=True)
+    # the time zone of the naive datetimes of the rows, empty for the default
+    timezone = models.CharField(max_length=64, blank=True, default="")  # type: ignore
 
     class Meta:
         ordering = ["transformation_sheet", "row_index"]
         unique_together = ["transformation_sheet", "row_index"]
 
+    @property
+    def row_count(self) -> int:
+        return (
+            self.row_batches.aggregate(models.Sum("row_count"))["row_count__sum"] or 0
+        )
+
+    def append_rows(
+        self, rows: List[Dict[str, Any]], batch_size: int = ROW_BATCH_SIZE
+    ) -> None:
+        """Store the fixture records of the rows following the stored ones."""
+        last = self.row_batches.order_by("-index").first()
+        index = last.index + 1 if last else 0
+        TransformationRowBatch.objects.bulk_create(
+            TransformationRowBatch(
+                transformation_headline=self,
+                index=index + i,
+                row_count=len(rows[start : start + batch_size]),
+                rows=rows[start : start + batch_size],
+            )
+            for i, start in enumerate(range(0, len(rows), batch_size))
+        )
+
+    def iter_row_batches(self) -> Iterator[List[Dict[str, Any]]]:
+        """The rows of the stored batches in order, loading one at a time."""
+        for batch in self.row_batches.order_by("index").iterator(chunk_size=1):
+            yield batch.rows
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        for rows in self.iter_row_batches():
+            yield from rows
+
+
+class TransformationRowBatch(models.Model):
+    """
+    Fixture records of consecutive imported rows. The rows are kept apart
+    from the headline, so loading the headline doesn't load the sheet.
+    """
+
+    transformation_headline = models.ForeignKey(  # type: ignore
+        TransformationHeadline,
+        on_delete=models.CASCADE,
+        related_name="row_batches",
+        verbose_name=_("headline"),
+    )
+    index = models.PositiveIntegerField()  # type: ignore
+    row_count = models.PositiveIntegerField(default=0)  # type: ignore
+    rows = FastJSONField(default=list)
+
+    class Meta:
+        ordering = ["transformation_headline", "index"]
+        unique_together = ["transformation_headline", "index"]
+        verbose_name = _("row batch")
+        verbose_name_plural = _("row batches")
+
 
 class TransformationColumn(models.Model):
     column_index = models.IntegerField()  # type: ignore
@@ -463,11 +633,71 @@ class TransformationColumn(models.Model):
 
     exclude = models.BooleanField(default=False)  # type: ignore
 
+    # size of the sample the field was proposed from, null if all rows were
+    # inspected
+    sampled_rows = models.PositiveIntegerField(  # type: ignore
+        _("sampled rows"), null=True, blank=True
+    )
+
     class Meta:
         ordering = ["transformation_headline", "column_index"]
         unique_together = ["transformation_headline", "column_index"]
 
 
+class ColumnProfile(models.Model):
+    """
+    Statistics of the values of an imported column, kept to propose and
+    check fields without reading the file again.
+    """
+
+    class Meta:
+        verbose_name = _("column profile")
+        verbose_name_plural = _("column profiles")
+
+    transformation_column = models.OneToOneField(  # type: ignore
+        TransformationColumn,
+        on_delete=models.CASCADE,
+        related_name="profile",
+        verbose_name=_("transformation column"),
+    )
+    row_count = models.PositiveIntegerField(_("rows"), default=0)  # type: ignore
+    null_count = models.PositiveIntegerField(_("empty values"), default=0)  # type: ignore
+    # null if it can't be told without tracking every value
+    distinct_count = models.PositiveIntegerField(  # type: ignore
+        _("distinct values"), null=True, blank=True
+    )
+    # the distinct count is an estimate of a sketch
+    distinct_estimated = models.BooleanField(default=False)  # type: ignore
+    has_duplicates = models.BooleanField(default=False)  # type: ignore
+    dtype = models.CharField(max_length=32, blank=True, default="")  # type: ignore
+    min_value = models.JSONField(_("minimum"), null=True, blank=True)
+    max_value = models.JSONField(_("maximum"), null=True, blank=True)
+    max_length = models.PositiveIntegerField(_("max length"), default=0)  # type: ignore
+    max_digits = models.PositiveIntegerField(_("max digits"), default=0)  # type: ignore
+    decimal_places = models.PositiveIntegerField(  # type: ignore
+        _("decimal places"), default=0
+    )
+    has_numeric_values = models.BooleanField(default=False)  # type: ignore
+    # true for profiles of imports which didn't check for whole numbers yet
+    has_fractions = models.BooleanField(default=True)  # type: ignore
+    # the kinds of text all values are of, like "date" or "email"
+    text_kinds = models.JSONField(null=True, blank=True)
+    # [value, count] pairs in the order the values were first seen, null if
+    # there are too many distinct values to track
+    top_values = models.JSONField(_("most frequent values"), null=True, blank=True)
+    # [value, count] pairs of the most frequent values if there are too many
+    # to track, the counts are lower bounds
+    frequent_values = models.JSONField(_("frequent values"), null=True, blank=True)
+
+    def most_frequent(self, count: int) -> List[Tuple[Any, int]]:
+        values = sorted(
+            (self.frequent_values if self.top_values is None else self.top_values)
+            or [],
+            key=lambda item: -item[1],
+        )
+        return [(value, value_count) for value, value_count in values[:count]]
+
+
 class Model(TimeStampMixin, models.Model):
     class Meta:
         ordering = ["index", "transformation_mapping"]
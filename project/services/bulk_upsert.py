@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from django.db import connection, models
+from django.db.models import QuerySet
+
+M = TypeVar("M", bound=models.Model)
+
+
+def supports_update_conflicts() -> bool:
+    return connection.features.supports_update_conflicts_with_target
+
+
+def bulk_upsert(
+    objects: Sequence[M],
+    existing: QuerySet[M],
+    unique_fields: List[str],
+    update_fields: List[str],
+    update_conflicts: Optional[bool] = None,
+) -> None:
+    """
+    Insert the objects, updating update_fields of the rows of existing with
+    the same unique_fields instead. Where the database supports it, this is a
+    single INSERT ... ON CONFLICT, otherwise existing is loaded once to split
+    the objects into a bulk_update and a bulk_create.
+    The objects get no primary keys assigned by the upsert.
+    """
+    if not objects:
+        return
+    model = existing.model
+    if update_conflicts is None:
+        update_conflicts = supports_update_conflicts()
+    if update_conflicts:
+        model.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
+        return
+
+    attnames = [model._meta.get_field(name).attname for name in unique_fields]
+
+    def key(instance: models.Model) -> Tuple:
+        return tuple(getattr(instance, attname) for attname in attnames)
+
+    pks: Dict[Tuple, int] = {
+        tuple(values[:-1]): values[-1]
+        for values in existing.order_by().values_list(*attnames, "pk")
+    }
+    # what save() does for e.g. auto_now fields, which bulk_update does not
+    pre_save_fields = [
+        field
+        for field in (model._meta.get_field(name) for name in update_fields)
+        if getattr(field, "auto_now", False)
+    ]
+    to_update: List[M] = []
+    to_create: List[M] = []
+    for instance in objects:
+        pk = pks.get(key(instance))
+        if pk is None:
+            to_create.append(instance)
+            continue
+        instance.pk = pk
+        instance._state.adding = False
+        for field in pre_save_fields:
+            field.pre_save(instance, add=False)
+        to_update.append(instance)
+    if to_update:
+        model.objects.bulk_update(to_update, update_fields)
+    if to_create:
+        model.objects.bulk_create(to_create)
@@ -0,0 +1,138 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from project.models import ColumnProfile, TransformationColumn
+from project.services.bulk_upsert import bulk_upsert
+from project.services.column_statistics import ColumnStatistics
+from project.services.import_field import ImportField
+
+
+def to_json_value(value: Any) -> Any:
+    """Values of a profile are stored as JSON, dates as ISO strings."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, np.generic):
+        return to_json_value(value.item())
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value)
+    return str(value)
+
+
+def profile_values(statistics: ColumnStatistics) -> Dict[str, Any]:
+    """The fields of the profile of a column, a sample counts like all rows."""
+    sampled = statistics.population_count is not None
+    return dict(
+        row_count=statistics.population_count if sampled else statistics.count,
+        null_count=(
+            statistics.population_null_count if sampled else statistics.null_count
+        ),
+        distinct_count=statistics.distinct_estimate,
+        distinct_estimated=statistics.is_distinct_estimated,
+        has_duplicates=statistics.has_duplicate_values(),
+        dtype=statistics.dtype or "",
+        min_value=to_json_value(statistics.min_value),
+        max_value=to_json_value(statistics.max_value),
+        max_length=statistics.max_length,
+        max_digits=statistics.max_digits,
+        decimal_places=statistics.decimal_places,
+        has_numeric_values=statistics.has_numeric_values,
+        has_fractions=statistics.has_fractions,
+        text_kinds=statistics.text_kinds,
+        top_values=(
+            None
+            if statistics.value_counts is None
+            else [
+                [to_json_value(value), count]
+                for value, count in statistics.value_counts.items()
+            ]
+        ),
+        frequent_values=(
+            None
+            if statistics.value_counts is not None or statistics.top_values is None
+            else [
+                [to_json_value(value), count]
+                for value, count in statistics.most_frequent(statistics.top_count)
+            ]
+        ),
+    )
+
+
+def save_profile(
+    transformation_column: TransformationColumn, statistics: ColumnStatistics
+) -> ColumnProfile:
+    profile, created = ColumnProfile.objects.update_or_create(
+        transformation_column=transformation_column,
+        defaults=profile_values(statistics),
+    )
+    return profile
+
+
+def save_profiles(
+    statistics_of_columns: List[Tuple[TransformationColumn, ColumnStatistics]]
+) -> None:
+    """save_profile of many columns at once."""
+    values = [
+        (column, profile_values(statistics))
+        for column, statistics in statistics_of_columns
+    ]
+    if not values:
+        return
+    bulk_upsert(
+        [
+            ColumnProfile(transformation_column=column, **kwargs)
+            for column, kwargs in values
+        ],
+        ColumnProfile.objects.filter(
+            transformation_column__in=[column for column, kwargs in values]
+        ),
+        unique_fields=["transformation_column"],
+        update_fields=list(values[0][1]),
+    )
+
+
+def statistics_of_profile(
+    profile: ColumnProfile, sampled_rows: Optional[int] = None
+) -> ColumnStatistics:
+    """
+    Restore the statistics a profile was saved from. The statistics of a
+    sample get an estimated null count, as only the one of all rows is kept.
+    """
+    statistics = ColumnStatistics(profile.transformation_column.name)
+    statistics.count = profile.row_count
+    statistics.null_count = profile.null_count
+    if sampled_rows is not None and sampled_rows < profile.row_count:
+        statistics.population_count = profile.row_count
+        statistics.population_null_count = profile.null_count
+        statistics.count = sampled_rows
+        statistics.null_count = round(
+            profile.null_count * sampled_rows / profile.row_count
+        )
+    statistics.dtype = profile.dtype or None
+    statistics.min_value = profile.min_value
+    statistics.max_value = profile.max_value
+    statistics.max_length = profile.max_length
+    statistics.max_digits = profile.max_digits
+    statistics.decimal_places = profile.decimal_places
+    statistics.has_numeric_values = profile.has_numeric_values
+    statistics.has_fractions = profile.has_fractions
+    statistics.text_kinds = profile.text_kinds
+    statistics.has_duplicates = profile.has_duplicates
+    statistics.value_counts = (
+        None
+        if profile.top_values is None
+        else {value: count for value, count in profile.top_values}
+    )
+    return statistics
+
+
+def propose_field(transformation_column: TransformationColumn) -> ImportField:
+    """Propose the field of a column from its profile, without the data."""
+    return ImportField(
+        statistics=statistics_of_profile(
+            transformation_column.profile, transformation_column.sampled_rows
+        )
+    )
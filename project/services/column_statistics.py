@@ -0,0 +1,470 @@
+from typing import Any, Dict, Final, Iterable, List, Optional, Tuple
+
+import numpy as np
+from pandas import Series
+from pandas.api.types import infer_dtype
+from pandas.util import hash_pandas_object
+
+from project.services.sketches import HyperLogLog, MisraGries
+from project.services.text_kinds import detect_kinds
+
+DTYPE_INT: Final[str] = "int64"
+DTYPE_FLOAT: Final[str] = "float64"
+DTYPE_OBJECT: Final[str] = "object"
+NUMERIC_DTYPES: Final[tuple[str, ...]] = (DTYPE_INT, DTYPE_FLOAT)
+
+# value counts are only needed to build choices, columns with more distinct
+# values can never become a choice field
+VALUE_COUNTS_MAX_COUNT: Final[int] = 50
+
+DEFAULT_MAX_DIGITS: Final[int] = 2
+DEFAULT_DECIMAL_PLACES: Final[int] = 1
+DEFAULT_MAX_LENGTH: Final[int] = 1
+
+# integers below are represented as float like 123.0, from here on with an
+# exponent like 1e+16
+FLOAT_EXPONENT_MIN_INT: Final[int] = 10**16
+
+# a distinct estimate this many standard errors below the count of values
+# is taken as a sign of duplicates
+DUPLICATE_ESTIMATE_STANDARD_ERRORS: Final[int] = 3
+
+
+def text_lengths_and_dots(text: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lengths and positions of the first dot (-1 if there is none) of the
+    strings of a fixed width unicode array, computed on its code points.
+    """
+    codes = text.view(np.uint32).reshape(len(text), -1)
+    lengths = np.count_nonzero(codes, axis=1)
+    is_dot = codes == ord(".")
+    dots = np.where(is_dot.any(axis=1), is_dot.argmax(axis=1), -1)
+    return lengths, dots
+
+
+def text_lengths(values: Series) -> Series:
+    """Lengths of the str representations of values."""
+    if infer_dtype(values, skipna=False) == "string":
+        return values.str.len()
+    return values.astype(str).str.len()
+
+
+def hash_values(values: Series) -> np.ndarray:
+    if values.dtype.kind in "iuf":
+        # 1 and 1.0 of differently typed chunks must collide
+        values = values.astype(float)
+    return hash_pandas_object(values, index=False).to_numpy()
+
+
+def merge_dtypes(dtype: Optional[str], other: Optional[str]) -> Optional[str]:
+    if dtype is None:
+        return other
+    if other is None or dtype == other:
+        return dtype
+    if dtype in NUMERIC_DTYPES and other in NUMERIC_DTYPES:
+        return DTYPE_FLOAT
+    return DTYPE_OBJECT
+
+
+class ColumnStatistics:
+    """
+    Incremental statistics of a column, fed chunk by chunk.
+
+    Memory does not depend on the row count except for the duplicate
+    detection, which keeps an 8 byte hash per value as long as no duplicate
+    has been seen. With sketch_after, the hashes are replaced by a
+    HyperLogLog sketch as soon as there are more than sketch_after of them
+    or a duplicate is found, which keeps a distinct estimate in fixed
+    memory. With top_count, the value counts of a column with too many
+    distinct values to track continue as a Misra-Gries summary of its most
+    frequent values.
+    """
+
+    def __init__(
+        self,
+        name: Any,
+        value_counts_max_count=VALUE_COUNTS_MAX_COUNT,
+        sketch_after: Optional[int] = None,
+        top_count: int = 0,
+    ):
+        self.name = name
+        self.value_counts_max_count = value_counts_max_count
+        self.sketch_after = sketch_after
+        self.top_count = top_count
+        self.count = 0
+        self.null_count = 0
+        self.dtype: Optional[str] = None
+        self.max_length = 0
+        self.max_digits = 0
+        self.decimal_places = 0
+        self.has_numeric_values = False
+        # a numeric value is not a whole number, or infinite
+        self.has_fractions = False
+        # None if there is no value yet or the values can't be ordered
+        self.min_value: Any = None
+        self.max_value: Any = None
+        self._has_order = True
+        # the kinds of text_kinds.TEXT_KINDS all values are of, like dates
+        # or emails, None if there is no value yet
+        self.text_kinds: Optional[List[str]] = None
+        # first seen order is kept, it defines the order of the choices
+        self.value_counts: Optional[Dict[Any, int]] = {}
+        self.has_duplicates = False
+        self._hashes: List[np.ndarray] = []
+        self._hash_count = 0
+        self.distinct_sketch: Optional[HyperLogLog] = None
+        self.top_values: Optional[MisraGries] = None
+        # set for the statistics of a sample: the counts of all rows of the
+        # column, and whether type and bounds have been checked on all rows
+        self.population_count: Optional[int] = None
+        self.population_null_count = 0
+        self.bounds_verified = False
+
+    @classmethod
+    def of_series(cls, series: Series, **kwargs) -> "ColumnStatistics":
+        statistics = cls(series.name, **kwargs)
+        statistics.update(series)
+        return statistics
+
+    def continuation(self) -> "ColumnStatistics":
+        """
+        Empty statistics for the following rows, tracking only what self
+        still tracks. Merged into self, they add those rows like update.
+        """
+        statistics = ColumnStatistics(
+            self.name, self.value_counts_max_count, self.sketch_after, self.top_count
+        )
+        if self.value_counts is None:
+            statistics._overflow_value_counts()
+        statistics.has_duplicates = self.has_duplicates
+        statistics.text_kinds = self.text_kinds
+        if self.distinct_sketch is not None:
+            statistics.distinct_sketch = HyperLogLog(self.distinct_sketch.precision)
+        return statistics
+
+    @property
+    def non_null_count(self) -> int:
+        return self.count - self.null_count
+
+    @property
+    def is_sampled(self) -> bool:
+        return self.population_count is not None and self.population_count > self.count
+
+    @property
+    def is_nullable(self) -> bool:
+        if self.population_count is not None:
+            return self.population_null_count > 0
+        return self.null_count > 0
+
+    @property
+    def distinct_count(self) -> Optional[int]:
+        """Count of distinct values, None if there are too many to track."""
+        if self.value_counts is None:
+            return None
+        return len(self.value_counts)
+
+    @property
+    def distinct_estimate(self) -> Optional[int]:
+        """
+        Exact if the values are tracked or free of duplicates, estimated by
+        the sketch if there is one, else None.
+        """
+        if self.value_counts is not None:
+            return len(self.value_counts)
+        if self.distinct_sketch is not None:
+            return min(self.distinct_sketch.estimate(), self.non_null_count)
+        if not self.has_duplicate_values():
+            return self.non_null_count
+        return None
+
+    @property
+    def is_distinct_estimated(self) -> bool:
+        return self.value_counts is None and self.distinct_sketch is not None
+
+    @property
+    def text_kind(self) -> Optional[str]:
+        return self.text_kinds[0] if self.text_kinds else None
+
+    @property
+    def distinct_values(self) -> List[Any]:
+        return list(self.value_counts or [])
+
+    def most_frequent(self, count: int) -> List[Tuple[Any, int]]:
+        """Exact counts if the values are tracked, else lower bounds."""
+        if self.value_counts is not None:
+            return sorted(self.value_counts.items(), key=lambda item: -item[1])[:count]
+        if self.top_values is not None:
+            return self.top_values.most_frequent(count)
+        return []
+
+    def has_duplicate_values(self) -> bool:
+        if self.has_duplicates:
+            return True
+        if self.distinct_sketch is not None:
+            tolerance = (
+                DUPLICATE_ESTIMATE_STANDARD_ERRORS * self.distinct_sketch.standard_error
+            )
+            return self.distinct_sketch.estimate() < self.non_null_count * (
+                1 - tolerance
+            )
+        if len(self._hashes) > 1:
+            self._hashes = [np.concatenate(self._hashes)]
+            self._check_hashes(self._hashes[0])
+        return self.has_duplicates
+
+    def update(self, series: Series, distinct: bool = True) -> None:
+        """
+        Add the values of series. Without distinct only counts, type and
+        bounds are collected, which is much cheaper for long columns.
+
+        Lengths and digits are measured on the distinct values of the chunk
+        only, which are computed once by a hash table.
+        """
+        self.count += len(series)
+        values = series.dropna()
+        self.null_count += len(series) - len(values)
+        if values.empty:
+            return
+
+        if values.dtype == DTYPE_OBJECT:
+            values = values.infer_objects()
+        dtype = str(values.dtype)
+        self.dtype = merge_dtypes(self.dtype, dtype)
+
+        counts = None
+        if distinct and (self.value_counts is not None or self.top_values is not None):
+            # the counted values are the distinct ones, no second hash table
+            counts = values.value_counts(sort=False)
+            uniques = Series(counts.index)
+            if uniques.dtype != values.dtype:
+                uniques = uniques.astype(values.dtype)
+        else:
+            uniques = Series(values.unique())
+        self._update_min_max(uniques)
+        if dtype == DTYPE_INT:
+            self._update_int(uniques)
+        elif dtype == DTYPE_FLOAT:
+            self._update_float(uniques)
+        else:
+            self.max_length = max(self.max_length, int(text_lengths(uniques).max()))
+        if dtype in NUMERIC_DTYPES:
+            self.text_kinds = []
+        else:
+            self._update_text_kinds(uniques)
+        if distinct:
+            self._update_value_counts(counts, uniques)
+            self._update_duplicates(values, uniques)
+
+    def set_population(
+        self, population: "ColumnStatistics", verified: bool = False
+    ) -> None:
+        """
+        Mark self as the statistics of a sample of population, which holds
+        the counts of all rows. If verified, population has been fed every
+        value, so its type and bounds replace the ones of the sample.
+        """
+        self.population_count = population.count
+        self.population_null_count = population.null_count
+        if verified:
+            self.dtype = population.dtype
+            self.max_length = population.max_length
+            self.max_digits = population.max_digits
+            self.decimal_places = population.decimal_places
+            self.has_numeric_values = population.has_numeric_values
+            self.has_fractions = population.has_fractions
+            self.min_value = population.min_value
+            self.max_value = population.max_value
+            self._has_order = population._has_order
+            self.text_kinds = population.text_kinds
+            self.bounds_verified = True
+
+    def merge(self, other: "ColumnStatistics") -> None:
+        """Add the statistics of other, which must follow self in row order."""
+        self.count += other.count
+        self.null_count += other.null_count
+        self.dtype = merge_dtypes(self.dtype, other.dtype)
+        self.max_length = max(self.max_length, other.max_length)
+        self.max_digits = max(self.max_digits, other.max_digits)
+        self.decimal_places = max(self.decimal_places, other.decimal_places)
+        self.has_numeric_values |= other.has_numeric_values
+        self.has_fractions |= other.has_fractions
+        if self.text_kinds is None:
+            self.text_kinds = other.text_kinds
+        elif other.text_kinds is not None:
+            self.text_kinds = [
+                kind for kind in self.text_kinds if kind in other.text_kinds
+            ]
+        if other._has_order and other.min_value is not None:
+            self._add_min_max(other.min_value, other.max_value)
+        elif not other._has_order:
+            self._set_unordered()
+
+        if other.value_counts is None:
+            if self.value_counts is not None:
+                self._overflow_value_counts()
+            if self.top_values is not None and other.top_values is not None:
+                self.top_values.merge(other.top_values)
+        elif self.value_counts is None:
+            if self.top_values is not None:
+                self.top_values.seed(other.value_counts)
+        else:
+            self._add_value_counts(other.value_counts.items())
+
+        self.has_duplicates |= other.has_duplicates
+        if self.distinct_sketch is None and (
+            other.distinct_sketch is not None
+            or (self.has_duplicates and self.sketch_after is not None)
+        ):
+            self._start_sketch()
+        if self.distinct_sketch is not None:
+            if other.distinct_sketch is not None:
+                self.distinct_sketch.merge(other.distinct_sketch)
+            else:
+                for hashes in other._hashes:
+                    self.distinct_sketch.update(hashes)
+        elif self.has_duplicates:
+            self._hashes = []
+        else:
+            self._hashes.extend(other._hashes)
+            self._hash_count += other._hash_count
+            if self.sketch_after is not None and self._hash_count > self.sketch_after:
+                self._start_sketch()
+
+    def _update_text_kinds(self, uniques: Series) -> None:
+        if self.text_kinds == []:
+            return
+        if infer_dtype(uniques, skipna=False) != "string":
+            self.text_kinds = []
+            return
+        # later chunks only confirm the kinds of the chunks before
+        self.text_kinds = detect_kinds(uniques, self.text_kinds)
+
+    def _update_min_max(self, values: Series) -> None:
+        if not self._has_order:
+            return
+        # mixed types like strings and numbers have no order
+        if values.dtype == DTYPE_OBJECT and infer_dtype(values) != "string":
+            self._set_unordered()
+            return
+        self._add_min_max(values.min(), values.max())
+
+    def _add_min_max(self, min_value: Any, max_value: Any) -> None:
+        if self.min_value is None:
+            self.min_value, self.max_value = min_value, max_value
+            return
+        try:
+            self.min_value = min(self.min_value, min_value)
+            self.max_value = max(self.max_value, max_value)
+        except TypeError:
+            # e.g. numbers and strings in different chunks
+            self._set_unordered()
+
+    def _set_unordered(self) -> None:
+        self._has_order = False
+        self.min_value = self.max_value = None
+
+    def _update_int(self, values: Series) -> None:
+        # the longest representations are the ones of the extremes
+        extremes = (int(values.min()), int(values.max()))
+        max_length = max(len(str(value)) for value in extremes)
+        self.max_length = max(self.max_length, max_length)
+        if max(abs(value) for value in extremes) >= FLOAT_EXPONENT_MIN_INT:
+            self._update_float(values.astype(float), update_max_length=False)
+            return
+        # digits are counted on the float representation, which adds ".0"
+        self.max_digits = max(self.max_digits, max_length + 1)
+        self.decimal_places = max(self.decimal_places, 1)
+        self.has_numeric_values = True
+
+    def _update_float(self, values: Series, update_max_length: bool = True) -> None:
+        # digits are counted on the float representation like pandas would
+        # return it for a column with nulls
+        lengths, dots = text_lengths_and_dots(values.to_numpy().astype(str))
+        if update_max_length:
+            self.max_length = max(self.max_length, int(lengths.max()))
+        self.max_digits = max(self.max_digits, int((lengths - (dots >= 0)).max()))
+        # no dot: the whole representation counts as decimals, e.g. 1e-05
+        self.decimal_places = max(self.decimal_places, int((lengths - dots - 1).max()))
+        self.has_numeric_values = True
+        if not self.has_fractions:
+            numbers = values.to_numpy(dtype=float)
+            self.has_fractions = bool(
+                (~np.isfinite(numbers) | (numbers != np.floor(numbers))).any()
+            )
+
+    def _update_value_counts(self, counts: Optional[Series], uniques: Series) -> None:
+        if counts is None:
+            return
+        if self.value_counts is None:
+            self.top_values.update(counts)
+            return
+        if len(uniques) > self.value_counts_max_count:
+            self._overflow_value_counts()
+            if self.top_values is not None:
+                self.top_values.update(counts)
+            return
+        self._add_value_counts((value, int(counts[value])) for value in uniques)
+
+    def _add_value_counts(self, value_counts: Iterable[Tuple[Any, int]]) -> None:
+        for value, count in value_counts:
+            if self.value_counts is None:
+                return
+            self.value_counts[value] = self.value_counts.get(value, 0) + count
+            if len(self.value_counts) > self.value_counts_max_count:
+                self._overflow_value_counts()
+
+    def _overflow_value_counts(self) -> None:
+        """Too many distinct values to track them all."""
+        if self.top_count and self.value_counts is not None:
+            self.top_values = MisraGries(self.top_count)
+            self.top_values.seed(self.value_counts)
+        self.value_counts = None
+
+    def _update_duplicates(self, values: Series, uniques: Series) -> None:
+        if len(uniques) < len(values):
+            self.has_duplicates = True
+        if self.sketch_after is None:
+            if self.has_duplicates:
+                self._hashes = []
+                return
+            hashes = hash_values(uniques)
+            self._check_hashes(hashes)
+            if not self.has_duplicates:
+                self._hashes.append(hashes)
+            return
+
+        hashes = hash_values(uniques)
+        if self.distinct_sketch is not None:
+            self.distinct_sketch.update(hashes)
+            return
+        self._hashes.append(hashes)
+        self._hash_count += len(hashes)
+        if self.has_duplicates or self._hash_count > self.sketch_after:
+            self._start_sketch()
+
+    def _start_sketch(self) -> None:
+        """Continue the distinct counting in fixed memory."""
+        # duplicates among the hashes so far are still detected exactly
+        self.has_duplicate_values()
+        self.distinct_sketch = HyperLogLog()
+        for hashes in self._hashes:
+            self.distinct_sketch.update(hashes)
+        self._hashes = []
+        self._hash_count = 0
+
+    def _check_hashes(self, hashes: np.ndarray) -> None:
+        if len(np.unique(hashes)) < len(hashes):
+            self.has_duplicates = True
+            if self.sketch_after is None:
+                self._hashes = []
+
+    def get_max_digits(self) -> int:
+        return self.max_digits if self.has_numeric_values else DEFAULT_MAX_DIGITS
+
+    def get_decimal_places(self) -> int:
+        return (
+            self.decimal_places if self.has_numeric_values else DEFAULT_DECIMAL_PLACES
+        )
+
+    def get_max_length(self) -> int:
+        return self.max_length if self.non_null_count else DEFAULT_MAX_LENGTH
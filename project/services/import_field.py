@@ -1,14 +1,56 @@
 # Code is based on Field class of 'https://github.com/johncmacy/django-from-excel'
 import sys
-from typing import Final
+from typing import Any, Dict, Final, Tuple
 
+from django.db.backends.base.operations import BaseDatabaseOperations
 from pandas import Series
 
 from project.models import Field
+from project.services.column_statistics import ColumnStatistics, DTYPE_FLOAT
+from project.services.text_kinds import (
+    KIND_DATE,
+    KIND_DATE_TIME,
+    KIND_EMAIL,
+    KIND_TIME,
+    KIND_URL,
+    KIND_UUID,
+    base_kind,
+)
 
 DUPLICATES_AS_CHOICE_MIN_RATIO: Final[int] = 50
 AS_CHOICE_MAX_COUNT: Final[int] = 50
 AS_UNIQUE_MIN_COUNT: Final[int] = 50
+# a double holds 15 significant digits, longer representations like
+# 0.30000000000000004 are artifacts of floating point arithmetic
+DECIMAL_MAX_DIGITS: Final[int] = 15
+
+# narrowest first, the ranges are the ones all database backends support
+INTEGER_DATATYPES: Final[Tuple[Field.Datatype, ...]] = (
+    Field.Datatype.POSITIVE_SMALL_INTEGER_FIELD,
+    Field.Datatype.SMALL_INTEGER_FIELD,
+    Field.Datatype.INTEGER_FIELD,
+    Field.Datatype.BIG_INTEGER_FIELD,
+)
+
+TEXT_KIND_DATATYPES: Final[Dict[str, Field.Datatype]] = {
+    KIND_UUID: Field.Datatype.UUIDFIELD,
+    KIND_EMAIL: Field.Datatype.EMAIL_FIELD,
+    KIND_URL: Field.Datatype.URLFIELD,
+    KIND_DATE: Field.Datatype.DATE_FIELD,
+    KIND_TIME: Field.Datatype.TIME_FIELD,
+    KIND_DATE_TIME: Field.Datatype.DATE_TIME_FIELD,
+}
+# text kinds which are stored as strings
+TEXT_KINDS_WITH_MAX_LENGTH: Final[Tuple[str, ...]] = (KIND_EMAIL, KIND_URL)
+
+
+def narrowest_integer_datatype(min_value: Any, max_value: Any) -> Field.Datatype:
+    """The smallest integer field holding the values, NONE if there is none."""
+    for datatype in INTEGER_DATATYPES:
+        lower, upper = BaseDatabaseOperations.integer_field_ranges[datatype.label]
+        if lower <= min_value and max_value <= upper:
+            return datatype
+    return Field.Datatype.NONE
 
 
 class ImportField:
@@ -19,16 +61,37 @@ class ImportField:
     MAX_DIGITS: Final[str] = "max_digits"
     MAX_LENGTH: Final[str] = "max_length"
     DEFAULT_VALUE: Final[str] = "default_value"
-
-    def __init__(self, series: Series):
+    # the kwargs of the proposal which are attributes of a Field
+    FIELD_KWARGS: Final[Tuple[str, ...]] = (
+        CHOICES,
+        MAX_DIGITS,
+        MAX_LENGTH,
+        DECIMAL_PLACES,
+        BLANK,
+        NULL,
+    )
+
+    def __init__(
+        self,
+        series: Series | None = None,
+        statistics: ColumnStatistics | None = None,
+    ):
+        """
+        Propose the field of a column, either of a complete series or of the
+        statistics collected over the chunks of a streamed import.
+        """
+        if statistics is None:
+            assert series is not None
+            statistics = ColumnStatistics.of_series(series)
         self.series = series
-        self.field_name = series.name
-        self.is_nullable = self.series.hasnans
-        self.series_without_nulls = Series([v for v in series.dropna()])
-        self.dtype = str(self.series_without_nulls.infer_objects().dtype)
-        self.duplicated = self.series_without_nulls.duplicated()
-        self.has_duplicate_values = any(self.duplicated)
-        self.duplicates = self.series_without_nulls.drop_duplicates()
+        self.statistics = statistics
+        self.field_name = statistics.name
+        self.is_nullable = statistics.is_nullable
+        # the proposal is based on a sample of the rows only
+        self.is_sampled = statistics.is_sampled
+        # columns without any value have always been proposed as decimal
+        self.dtype = statistics.dtype or DTYPE_FLOAT
+        self.has_duplicate_values = statistics.has_duplicate_values()
         self.choices = None
         self.choices_reverse = None
         (
@@ -38,23 +101,35 @@ class ImportField:
         ) = self.get_field_type_and_kwargs()
 
     def get_duplicate_compress_ratio(self):
-        return (len(self.duplicates) * 100) / len(self.series_without_nulls)
+        return (self.statistics.distinct_count * 100) / self.statistics.non_null_count
 
     def need_choice(self):
         return (
             self.has_duplicate_values
+            # too many distinct values to be tracked
+            and self.statistics.distinct_count is not None
             # prevent choices with no real compression
             and self.get_duplicate_compress_ratio() <= DUPLICATES_AS_CHOICE_MIN_RATIO
             # prevent overfilled combo boxes
-            and len(self.duplicates) <= AS_CHOICE_MAX_COUNT
+            and self.statistics.distinct_count <= AS_CHOICE_MAX_COUNT
         )
 
     def propose_unique(self):
         return (
             not self.has_duplicate_values
-            and len(self.series_without_nulls) >= AS_UNIQUE_MIN_COUNT
+            and self.statistics.non_null_count >= AS_UNIQUE_MIN_COUNT
         )
 
+    def field_values(self) -> Dict[str, Any]:
+        """The attributes of the proposed Field."""
+        values: Dict[str, Any] = {
+            "datatype": self.field_type if self.field_type else None,
+            "is_unique": self.propose_unique(),
+            "default_value": None,
+        }
+        values.update({k: self.kwargs.get(k) for k in self.FIELD_KWARGS})
+        return values
+
     def get_field_type_and_kwargs(self):
         field_type: Field.Datatype = Field.Datatype.NONE
         kwargs = {
@@ -68,7 +143,12 @@ class ImportField:
         }
 
         if self.dtype == "object" or self.dtype == "string":
-            if self.need_choice():
+            text_kind = self.statistics.text_kind
+            if text_kind:
+                field_type = TEXT_KIND_DATATYPES[base_kind(text_kind)]
+                if base_kind(text_kind) in TEXT_KINDS_WITH_MAX_LENGTH:
+                    kwargs[self.MAX_LENGTH] = self.transform_to_chars()[1]
+            elif self.need_choice():
                 field_type, choices_dict = self.transform_to_choices()
                 kwargs[self.CHOICES] = choices_dict
             else:
@@ -79,28 +159,18 @@ class ImportField:
             field_type = Field.Datatype.BOOLEAN_FIELD
 
         elif self.dtype == "int64":
-            field_type = Field.Datatype.INTEGER_FIELD
+            field_type = self.transform_to_integer() or Field.Datatype.INTEGER_FIELD
 
         elif self.dtype == "float64":
-            field_type = Field.Datatype.DECIMAL_FIELD
-
-            def num_digits_and_precision(value: str) -> tuple:
-                total_digits = len(value.replace(".", ""))
-                dot = value.find(".")
-                decimals = value[dot + 1 :]
-                decimal_len = len(decimals)
-
-                return total_digits, decimal_len
-
-            all_num_digits_and_precision = [
-                num_digits_and_precision(str(cell_value))
-                for cell_value in self.series_without_nulls
-            ]
-            max_digits = max([n for n, _ in all_num_digits_and_precision] or [2])
-            decimal_places = max([n for _, n in all_num_digits_and_precision] or [1])
-
-            kwargs[self.MAX_DIGITS] = max_digits
-            kwargs[self.DECIMAL_PLACES] = decimal_places
+            # e.g. an integer column with empty cells
+            field_type = self.transform_to_integer()
+            if not field_type:
+                if self.statistics.get_max_digits() > DECIMAL_MAX_DIGITS:
+                    field_type = Field.Datatype.FLOAT_FIELD
+                else:
+                    field_type = Field.Datatype.DECIMAL_FIELD
+                    kwargs[self.MAX_DIGITS] = self.statistics.get_max_digits()
+                    kwargs[self.DECIMAL_PLACES] = self.statistics.get_decimal_places()
 
         elif self.dtype == "datetime64[ns]" or self.dtype == "datetime64[ns, <tz>]":
             field_type = Field.Datatype.DATE_TIME_FIELD
@@ -121,24 +191,35 @@ class ImportField:
     def handle_unknown_type(self):
         sys.stdout.write(f"unhandled dtype\n")
 
+    def transform_to_integer(self) -> Field.Datatype:
+        """
+        The narrowest integer field for whole numbers, NONE for fractions or
+        if the bounds are only known for a sample.
+        """
+        statistics = self.statistics
+        if (
+            statistics.min_value is None
+            or statistics.has_fractions
+            or (statistics.is_sampled and not statistics.bounds_verified)
+        ):
+            return Field.Datatype.NONE
+        return narrowest_integer_datatype(statistics.min_value, statistics.max_value)
+
     def transform_to_chars(self):
         field_type = Field.Datatype.CHAR_FIELD
-        max_length = Field.find_next_step(
-            max(
-                [len(str(cell_value)) for cell_value in self.series_without_nulls]
-                or [1]
-            )
-        )
+        max_length = Field.find_next_step(self.statistics.get_max_length())
         return field_type, max_length
 
     def transform_to_choices(self):
         field_type = Field.Datatype.INTEGER_FIELD
         self.choices = {
-            i: value for (i, value) in enumerate(self.duplicates.values, start=1)
+            i: value
+            for (i, value) in enumerate(self.statistics.distinct_values, start=1)
         }
         self.choices_reverse = {v: k for k, v in self.choices.items()}
         choices_dict = {k: v for k, v in self.choices.items()}
-        self.series = Series([self.choices_reverse.get(value) for value in self.series])
+        if self.series is not None:
+            self.series = self.series.map(self.choices_reverse)
         return field_type, choices_dict
 
     def __str__(self):
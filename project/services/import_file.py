@@ -1,32 +1,183 @@
-from typing import Dict, Tuple
+from pathlib import Path
+from typing import Any, Dict, Final, Iterable, Iterator, Tuple
 
+from django.conf import settings
 from django.template.defaultfilters import slugify
 from django.utils.translation import gettext_lazy as _
 from pandas import DataFrame
 
-from project.services.importer import Importer, SheetReaderParams
+from project.models import TransformationFile
+from project.services.importer import (
+    Importer,
+    SheetReaderParams,
+    SheetPreview,
+    TABLE_PARAM_HEAD_ROWS,
+    TABLE_PARAM_TAIL_ROWS,
+    convert_param,
+)
+from project.services import sheet_pool
+from project.services.sheet_cache import read_sheet, cached_sheet, cache_sheet
+from project.services.sheet_pool import SheetParseTimeout, parse_sheets
+from project.services.sheet_sidecar import sidecar_dir
+
+DEFAULT_IMPORT_CHUNK_SIZE: Final[int] = 50_000
+DEFAULT_IMPORT_PARSE_WORKERS: Final[int] = 1
+DEFAULT_IMPORT_SHEET_TIMEOUT: Final[int] = 300
+
+
+def get_sheet_reader_params(
+    sheet: str | int, sheet_params: Dict[str | int, SheetReaderParams]
+) -> SheetReaderParams:
+    slugified_sheet: str | int
+    if isinstance(sheet, str):
+        slugified_sheet = slugify(sheet)
+    else:
+        slugified_sheet = sheet
+
+    if sheet_params and slugified_sheet in sheet_params:
+        return sheet_params[slugified_sheet]
+    return SheetReaderParams()
 
 
 def import_file(
     importer: Importer, sheet_params: Dict[str | int, SheetReaderParams]
 ) -> Tuple[bool, Dict[str | int, Tuple[DataFrame, SheetReaderParams]]]:
-    result: Dict[str | int, Tuple[DataFrame, SheetReaderParams]] = {}
-    sheet: str | int
-    for sheet in importer.sheets():
-        slugified_sheet: str | int
-        if isinstance(sheet, str):
-            slugified_sheet = slugify(sheet)
-        else:
-            slugified_sheet = sheet
+    """
+    Parse all sheets of a file. With more than one parse worker configured,
+    the sheets not yet in the sheet cache are parsed in a process pool.
+    """
+    params_by_sheet: Dict[str | int, SheetReaderParams] = {
+        sheet: get_sheet_reader_params(sheet, sheet_params)
+        for sheet in importer.sheets()
+    }
+    parsed: Dict[str | int, DataFrame | Exception] = {}
+    uncached = {
+        sheet: params
+        for sheet, params in params_by_sheet.items()
+        if cached_sheet(importer, sheet, params) is None
+    }
+    if use_parse_pool(len(uncached)):
+        parsed = parse_sheets(
+            importer, uncached, get_parse_workers(), get_sheet_timeout()
+        )
 
-        sheet_reader_parameters: SheetReaderParams = SheetReaderParams()
-        if sheet_params and slugified_sheet in sheet_params:
-            sheet_reader_parameters = sheet_params[slugified_sheet]
+    result: Dict[str | int, Tuple[DataFrame, SheetReaderParams]] = {}
+    for sheet, sheet_reader_parameters in params_by_sheet.items():
+        df: DataFrame
         try:
-            df: DataFrame = importer.run(
-                sheet=sheet, sheet_reader_params=sheet_reader_parameters
+            if sheet not in parsed:
+                df = read_sheet(importer, sheet, sheet_reader_parameters)
+            elif isinstance(parsed[sheet], Exception):
+                raise parsed[sheet]
+            else:
+                df = cache_sheet(
+                    importer, sheet, sheet_reader_parameters, parsed[sheet]
+                )
+        except SheetParseTimeout as e:
+            df = error_dataframe(
+                _("Parsing the sheet took longer than %(seconds)s seconds")
+                % {"seconds": e.seconds}
             )
         except ValueError as e:
-            df = DataFrame(data={_("Error"): [e]})
+            df = error_dataframe(e)
         result.update({sheet: (df, sheet_reader_parameters)})
     return True, result
+
+
+def error_dataframe(error: Any) -> DataFrame:
+    return DataFrame(data={_("Error"): [error]})
+
+
+def get_parse_workers() -> int:
+    return getattr(settings, "IMPORT_PARSE_WORKERS", DEFAULT_IMPORT_PARSE_WORKERS)
+
+
+def get_sheet_timeout() -> int:
+    return getattr(settings, "IMPORT_SHEET_TIMEOUT", DEFAULT_IMPORT_SHEET_TIMEOUT)
+
+
+def use_parse_pool(sheet_count: int) -> bool:
+    return get_parse_workers() > 1 and sheet_count > 1 and sheet_pool.is_available()
+
+
+def get_import_chunk_size() -> int:
+    return getattr(settings, "IMPORT_CHUNK_SIZE", DEFAULT_IMPORT_CHUNK_SIZE)
+
+
+def get_importer(file: TransformationFile) -> Importer:
+    path = Path(file.file.path)
+    sidecar = None
+    if getattr(settings, "IMPORT_SHEET_SIDECAR", True):
+        sidecar = sidecar_dir(path)
+    return Importer(path, reader=file.reader, sidecar=sidecar)
+
+
+def stream_file(
+    importer: Importer, sheet_params: Dict[str | int, SheetReaderParams]
+) -> Dict[str | int, Tuple[Iterable[DataFrame], SheetReaderParams]]:
+    """
+    Like import_file, but every sheet is returned as a lazy iterator of
+    chunks. Sheets with a cached full parse are returned as one chunk.
+
+    If the parse pool is enabled, a workbook with several sheets is parsed
+    completely and concurrently instead, which trades the bounded memory of
+    the stream for the parse time.
+    """
+    sheets = importer.sheets()
+    if use_parse_pool(len(sheets)):
+        _, df_by_sheet = import_file(importer, sheet_params)
+        return {
+            sheet: ([df], sheet_reader_params)
+            for sheet, (df, sheet_reader_params) in df_by_sheet.items()
+        }
+
+    result: Dict[str | int, Tuple[Iterable[DataFrame], SheetReaderParams]] = {}
+    sheet: str | int
+    for sheet in sheets:
+        sheet_reader_parameters = get_sheet_reader_params(sheet, sheet_params)
+        df = cached_sheet(importer, sheet, sheet_reader_parameters)
+        chunks: Iterable[DataFrame]
+        if df is not None:
+            chunks = [df]
+        else:
+            chunks = stream_sheet(importer, sheet, sheet_reader_parameters)
+        result.update({sheet: (chunks, sheet_reader_parameters)})
+    return result
+
+
+def stream_sheet(
+    importer: Importer, sheet: str | int, sheet_reader_params: SheetReaderParams
+) -> Iterator[DataFrame]:
+    chunks = importer.run_chunked(sheet, sheet_reader_params, get_import_chunk_size())
+    try:
+        first = next(chunks)
+    except ValueError as e:
+        yield error_dataframe(e)
+        return
+    yield first
+    yield from chunks
+
+
+def preview_sheet(
+    importer: Importer, sheet: str | int, sheet_reader_params: SheetReaderParams
+) -> SheetPreview:
+    head_rows: int = convert_param(
+        TABLE_PARAM_HEAD_ROWS, sheet_reader_params.get(TABLE_PARAM_HEAD_ROWS)
+    )  # type: ignore
+    tail_rows: int = convert_param(
+        TABLE_PARAM_TAIL_ROWS, sheet_reader_params.get(TABLE_PARAM_TAIL_ROWS)
+    )  # type: ignore
+    try:
+        df = cached_sheet(importer, sheet, sheet_reader_params)
+        if df is not None:
+            return SheetPreview.of_dataframe(df, head_rows, tail_rows)
+        # sheets which can't be read windowed are parsed into the sheet cache
+        return importer.preview(
+            sheet,
+            sheet_reader_params,
+            head_rows,
+            tail_rows,
+            full_reader=lambda s, p: read_sheet(importer, s, p),
+        )
+    except ValueError as e:
+        return SheetPreview.of_dataframe(error_dataframe(e), head_rows, tail_rows)
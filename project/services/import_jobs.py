@@ -0,0 +1,277 @@
+import logging
+import threading
+from datetime import timedelta
+from typing import Any, Callable, Dict, Final, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from project.models import ImportJob, TransformationFile
+from project.services.column_profile import profile_values
+from project.services.import_field import ImportField
+from project.services.import_file import (
+    get_importer,
+    get_import_chunk_size,
+    stream_file,
+)
+from project.services.importer import (
+    STAGE_DONE,
+    STAGE_FAILED,
+    STAGE_INFER,
+    STAGE_PARSE,
+    STAGE_PERSIST,
+    Importer,
+    SheetReaderParams,
+    create_models,
+)
+from project.services.sheet_statistics import get_sheet_statistics
+
+logger = logging.getLogger(__name__)
+
+# queued jobs looked at by a worker at once, the first it can claim is run
+CLAIM_BATCH_SIZE: Final[int] = 10
+# seconds a running job may go without saving its progress before it is
+# taken as given up by its worker, e.g. after a restart of the process
+DEFAULT_IMPORT_JOB_TIMEOUT: Final[int] = 15 * 60
+# progress of a sheet in percent when an import reaches the stage, reading
+# the rows takes the most time
+STAGE_PROGRESS: Final[Dict[str, int]] = {
+    STAGE_PARSE: 0,
+    STAGE_INFER: 60,
+    STAGE_PERSIST: 70,
+    STAGE_DONE: 100,
+    STAGE_FAILED: 100,
+}
+
+
+def enqueue_job(
+    file: TransformationFile,
+    kind: ImportJob.Kind,
+    params: Optional[Dict[str, Any]] = None,
+) -> ImportJob:
+    job = file.jobs.filter(kind=kind, state=ImportJob.State.QUEUED).first()
+    if job is None:
+        job = ImportJob.objects.create(
+            transformation_file=file, kind=kind, params=params
+        )
+    elif params is not None and job.params != params:
+        # the queued job runs with the latest params
+        job.params = params
+        job.save(update_fields=["params", "updated_at"])
+    if getattr(settings, "IMPORT_JOBS_IN_PROCESS", True):
+        # a local worker thread, otherwise the run_import_jobs command has to
+        # be running
+        transaction.on_commit(start_worker_thread)
+    return job
+
+
+def latest_job(file: TransformationFile, kind: ImportJob.Kind) -> Optional[ImportJob]:
+    return file.jobs.filter(kind=kind).order_by("-created_at", "-pk").first()
+
+
+def get_import_job_timeout() -> int:
+    return getattr(settings, "IMPORT_JOB_TIMEOUT", DEFAULT_IMPORT_JOB_TIMEOUT)
+
+
+def fail_stale_jobs() -> int:
+    """
+    Mark the running jobs as failed which didn't save their progress within
+    the timeout, their worker is gone and nobody would finish them.
+    """
+    now = timezone.now()
+    return ImportJob.objects.filter(
+        state=ImportJob.State.RUNNING,
+        updated_at__lt=now - timedelta(seconds=get_import_job_timeout()),
+    ).update(
+        state=ImportJob.State.FAILED,
+        message=_("The job stopped responding"),
+        finished_at=now,
+        updated_at=now,
+    )
+
+
+def claim_next_job() -> Optional[ImportJob]:
+    """
+    Mark the oldest queued job as running and return it. The state change is
+    a conditional update, so concurrent workers never claim the same job.
+    Running jobs given up by their worker are failed first.
+    """
+    fail_stale_jobs()
+    queued = ImportJob.objects.filter(state=ImportJob.State.QUEUED).order_by(
+        "created_at", "pk"
+    )
+    for job in queued[:CLAIM_BATCH_SIZE]:
+        claimed = ImportJob.objects.filter(
+            pk=job.pk, state=ImportJob.State.QUEUED
+        ).update(
+            state=ImportJob.State.RUNNING,
+            started_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def set_progress(job: ImportJob, progress: int) -> None:
+    job.progress = progress
+    job.save(update_fields=["progress", "updated_at"])
+
+
+def run_job(job: ImportJob) -> None:
+    handler = JOB_HANDLERS[job.kind]
+    # noinspection PyBroadException
+    try:
+        job.result = handler(job)
+    except Exception as e:
+        logger.exception("Import job %s failed", job.pk)
+        job.state = ImportJob.State.FAILED
+        job.message = str(e)
+    else:
+        job.state = ImportJob.State.DONE
+        job.progress = 100
+    job.finished_at = job.updated_at = timezone.now()
+    # a conditional update, a job failed as stale in the meantime stays failed
+    finished = ImportJob.objects.filter(
+        pk=job.pk, state=ImportJob.State.RUNNING
+    ).update(
+        state=job.state,
+        progress=job.progress,
+        message=job.message,
+        result=job.result,
+        finished_at=job.finished_at,
+        updated_at=job.updated_at,
+    )
+    if not finished:
+        logger.warning("Import job %s was failed before it finished", job.pk)
+        job.refresh_from_db()
+
+
+def run_pending_jobs(max_jobs: Optional[int] = None) -> int:
+    count = 0
+    while max_jobs is None or count < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+def start_worker_thread() -> None:
+    def work():
+        try:
+            run_pending_jobs()
+        finally:
+            connection.close()
+
+    threading.Thread(target=work, name="import-jobs", daemon=True).start()
+
+
+def profile_sheet(
+    importer: Importer, sheet: str | int, sheet_reader_params: SheetReaderParams
+) -> Dict[str, Any]:
+    with get_sheet_statistics() as sheet_statistics:
+        for chunk in importer.run_chunked(
+            sheet, sheet_reader_params, get_import_chunk_size()
+        ):
+            sheet_statistics.update(chunk)
+        statistics = sheet_statistics.columns()
+
+    columns: List[Dict[str, Any]] = []
+    sampled = False
+    for name, column_statistics in statistics.items():
+        import_field = ImportField(statistics=column_statistics)
+        sampled |= import_field.is_sampled
+        columns.append(
+            dict(
+                name=str(name),
+                datatype=int(import_field.field_type),
+                sampled=import_field.is_sampled,
+                **profile_values(column_statistics),
+            )
+        )
+    return dict(
+        name=sheet, rows=sheet_statistics.row_count, sampled=sampled, columns=columns
+    )
+
+
+def prepare_file(job: ImportJob) -> Dict[str, Any]:
+    """
+    Parse and profile all sheets with the default import settings. Besides
+    the profile, this leaves the columnar sidecar of the sheets, so the
+    import page doesn't parse the spreadsheet anymore.
+    """
+    importer = get_importer(job.transformation_file)
+    sheets = importer.sheets()
+    profiles = []
+    for index, sheet in enumerate(sheets):
+        try:
+            profiles.append(profile_sheet(importer, sheet, SheetReaderParams()))
+        except ValueError as e:
+            profiles.append(dict(name=sheet, error=str(e)))
+        set_progress(job, (index + 1) * 100 // len(sheets))
+    return dict(sheets=profiles)
+
+
+def import_params(
+    sheet_params: Dict[str | int, SheetReaderParams],
+    incremental: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """The params of an import job, the sheets as pairs to keep their keys."""
+    return dict(
+        sheets=[[sheet, dict(params)] for sheet, params in sheet_params.items()],
+        incremental=incremental,
+        dry_run=dry_run,
+    )
+
+
+def import_sheets(job: ImportJob) -> Dict[str, Any]:
+    """
+    Import all sheets with the reader params of the job. The stage and the
+    rows read of every sheet are saved to the result while the job runs, so
+    the import page shows them.
+    """
+    params = job.params or {}
+    file = job.transformation_file
+    sheet_params: Dict[str | int, SheetReaderParams] = {
+        sheet: SheetReaderParams(**reader_params)
+        for sheet, reader_params in params.get("sheets", [])
+    }
+    chunks_by_sheet = stream_file(get_importer(file), sheet_params)
+    sheets = [
+        dict(name=str(sheet), stage="", rows=0, error="") for sheet in chunks_by_sheet
+    ]
+    messages: List[str] = []
+    job.result = dict(sheets=sheets, messages=messages)
+
+    def progress(index: int, stage: str, rows: int, error: str) -> None:
+        sheet = sheets[index]
+        sheet["stage"] = stage
+        if rows:
+            sheet["rows"] = rows
+        if error:
+            sheet["error"] = error
+        job.progress = (index * 100 + STAGE_PROGRESS[stage]) // len(sheets)
+        job.save(update_fields=["progress", "result", "updated_at"])
+
+    create_models(
+        lambda message: messages.append(str(message)),
+        file,
+        chunks_by_sheet,
+        True,
+        incremental=params.get("incremental", False),
+        dry_run=params.get("dry_run", False),
+        progress=progress,
+    )
+    return job.result
+
+
+JOB_HANDLERS: Dict[int, Callable[[ImportJob], Any]] = {
+    ImportJob.Kind.PREPARE: prepare_file,
+    ImportJob.Kind.IMPORT: import_sheets,
+}
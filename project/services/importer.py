@@ -1,12 +1,30 @@
+import csv
+import io
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
 from pathlib import Path
-from typing import Sequence, Callable, Any, Optional, List, Tuple, Dict, Final
+from typing import (
+    Callable,
+    Any,
+    Optional,
+    List,
+    Tuple,
+    Dict,
+    Final,
+    Iterable,
+    Iterator,
+)
 
+import numpy as np
 import pandas as pd
 import pytz
-from django.contrib import messages
-from django.http import HttpRequest
-from django.template.defaultfilters import slugify
-from pandas import ExcelFile, DataFrame, Timestamp
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from pandas import DataFrame, Series, Timestamp
+from pandas.api.types import infer_dtype, is_datetime64_any_dtype
 
 from project.models import (
     TransformationFile,
@@ -17,100 +35,217 @@ from project.models import (
     Model,
     Field,
 )
+from project.services.bulk_upsert import bulk_upsert
+from project.services.column_profile import save_profiles
 from project.services.import_field import ImportField
+from project.services.schema_diff import (
+    ProposedColumn,
+    apply_schema_diff,
+    diff_schema,
+)
+from project.services import sheet_sidecar
+from project.services.reader_backends import SheetReader, open_reader
+from project.services.sheet_reader import (
+    READ_PARAM_HEADER,
+    READ_PARAM_INDEX_COL,
+    READ_PARAM_NROWS,
+    READ_PARAM_SKIPFOOTER,
+    READ_PARAM_SKIPROWS,
+    READ_PARAM_USECOLS,
+    TIMEZONE_PARAM,
+    TABLE_PARAM_HEAD_ROWS,
+    TABLE_PARAM_TAIL_ROWS,
+    DEFAULT_HEAD_TAIL_ROWS,
+    DEFAULT_TIMEZONE,
+    SheetReaderParams,
+    SheetPreview,
+    convert_param,
+    limit_chunks,
+    trim_footer,
+)
+from project.services.sheet_sidecar import SidecarReader
+from project.services.sheet_statistics import get_sheet_statistics
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_SHEET_NAME_FOR_CSV_FILE = "sheet0"
 
-READ_PARAM_HEADER = "header"
-READ_PARAM_INDEX_COL = "index_col"
-READ_PARAM_NROWS = "nrows"
-READ_PARAM_SKIPFOOTER = "skipfooter"
-READ_PARAM_SKIPROWS = "skiprows"
-READ_PARAM_USECOLS = "usecols"
-TIMEZONE_PARAM = "timezone"
-
-TABLE_PARAM_HEAD_ROWS = "head_rows"
-TABLE_PARAM_TAIL_ROWS = "tail_rows"
-DEFAULT_HEAD_TAIL_ROWS = 5
-DEFAULT_TIMEZONE = "Europe/Berlin"
-
-
-def convert_param(param: str, value: Optional[Any]) -> int | str | None:
-    if param == READ_PARAM_HEADER:
-        return int(value) if value else 0
-    elif param == READ_PARAM_USECOLS:
-        return str(value) if value and value != "" else None
-    elif param == READ_PARAM_SKIPROWS:
-        return int(value) if value else None
-    elif param == READ_PARAM_NROWS:
-        return int(value) if value else None
-    elif param == READ_PARAM_SKIPFOOTER:
-        return int(value) if value else 0
-    elif param == TABLE_PARAM_HEAD_ROWS:
-        return int(value) if value else DEFAULT_HEAD_TAIL_ROWS
-    elif param == TABLE_PARAM_TAIL_ROWS:
-        return int(value) if value else DEFAULT_HEAD_TAIL_ROWS
-
-    return None
-
-
-class SheetReaderParams(dict):
-    def __init__(
-        self,
-        header: int | Sequence[int] | None = 0,
-        usecols: int
-        | str
-        | Sequence[int]
-        | Sequence[str]
-        | Callable[[str], bool]
-        | None = None,
-        index_col: int | Sequence[int] | None = None,
-        skiprows: Sequence[int] | int | Callable[[int], object] | None = None,
-        nrows: int | None = None,
-        skipfooter: int = 0,
-        head_rows: int = DEFAULT_HEAD_TAIL_ROWS,
-        tail_rows: int = DEFAULT_HEAD_TAIL_ROWS,
-        timezone: str = DEFAULT_TIMEZONE,
+# csv reader modes: sniff the format and parse with the fast c engine or
+# let the slow python engine detect the separator itself
+CSV_ENGINE_FAST: Final[str] = "c"
+CSV_ENGINE_PYTHON: Final[str] = "python"
+CSV_SNIFF_BYTES: Final[int] = 64 * 1024
+CSV_DELIMITERS: Final[str] = ",;\t|"
+CSV_DEFAULT_DELIMITER: Final[str] = ","
+CSV_DEFAULT_QUOTECHAR: Final[str] = '"'
+CSV_DEFAULT_DECIMAL: Final[str] = ","
+
+COMMA_DECIMAL_PATTERN: Final[re.Pattern] = re.compile(r"^\s*[-+]?\d+,\d+\s*$")
+DOT_DECIMAL_PATTERN: Final[re.Pattern] = re.compile(r"^\s*[-+]?\d+\.\d+\s*$")
+
+# files up to this size are parsed completely for the preview, bigger ones
+# are only read around the requested head and tail window
+PREVIEW_FULL_PARSE_MAX_BYTES: Final[int] = 1024 * 1024
+PREVIEW_TAIL_BLOCK_BYTES: Final[int] = 64 * 1024
+COUNT_LINES_BLOCK_BYTES: Final[int] = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CsvFormat:
+    delimiter: str = CSV_DEFAULT_DELIMITER
+    quotechar: str = CSV_DEFAULT_QUOTECHAR
+    decimal: str = CSV_DEFAULT_DECIMAL
+
+
+def read_sample(filepath: Path, size: int = CSV_SNIFF_BYTES) -> str:
+    with filepath.open("rb") as f:
+        data = f.read(size)
+    sample = data.decode("utf-8", errors="replace")
+    if len(data) == size:
+        # drop the last, probably truncated line
+        cut = sample.rfind("\n")
+        if cut > 0:
+            sample = sample[:cut]
+    return sample
+
+
+def sniff_decimal(sample: str, delimiter: str, quotechar: str) -> str:
+    comma_count = 0
+    dot_count = 0
+    for row in csv.reader(
+        sample.splitlines(), delimiter=delimiter, quotechar=quotechar
     ):
-        dict.__init__(
-            self,
-            header=header,
-            usecols=usecols,
-            index_col=index_col,
-            skiprows=skiprows,
-            nrows=nrows,
-            skipfooter=skipfooter,
-            head_rows=head_rows,
-            tail_rows=tail_rows,
-            timezone=timezone,
+        for value in row:
+            if COMMA_DECIMAL_PATTERN.match(value):
+                comma_count += 1
+            elif DOT_DECIMAL_PATTERN.match(value):
+                dot_count += 1
+    if dot_count > comma_count:
+        return "."
+    return CSV_DEFAULT_DECIMAL
+
+
+def sniff_csv_format(filepath: Path) -> CsvFormat:
+    sample = read_sample(filepath)
+    if not sample.strip():
+        return CsvFormat()
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+        delimiter = dialect.delimiter
+        quotechar = dialect.quotechar or CSV_DEFAULT_QUOTECHAR
+    except csv.Error:
+        # single column or too irregular, take the most frequent candidate of
+        # the first line
+        first_line = sample.splitlines()[0]
+        delimiter = max(CSV_DELIMITERS, key=first_line.count)
+        if not first_line.count(delimiter):
+            delimiter = CSV_DEFAULT_DELIMITER
+        quotechar = CSV_DEFAULT_QUOTECHAR
+    return CsvFormat(
+        delimiter=delimiter,
+        quotechar=quotechar,
+        decimal=sniff_decimal(sample, delimiter, quotechar),
+    )
+
+
+def count_lines(filepath: Path) -> int:
+    count = 0
+    last = b""
+    with filepath.open("rb") as f:
+        for block in iter(lambda: f.read(COUNT_LINES_BLOCK_BYTES), b""):
+            count += block.count(b"\n")
+            last = block[-1:]
+    if last and last != b"\n":
+        count += 1
+    return count
+
+
+def read_last_lines(filepath: Path, count: int) -> List[str]:
+    size = filepath.stat().st_size
+    block_size = PREVIEW_TAIL_BLOCK_BYTES
+    with filepath.open("rb") as f:
+        while True:
+            start = max(size - block_size, 0)
+            f.seek(start)
+            lines = f.read(size - start).splitlines()
+            if start > 0:
+                # the first line is most likely cut
+                lines = lines[1:]
+            lines = [line for line in lines if line.strip()]
+            if len(lines) >= count or start == 0:
+                return [
+                    line.decode("utf-8", errors="replace") for line in lines[-count:]
+                ]
+            block_size *= 2
+
+
+# local times skipped by a daylight saving gap, e.g. 02:30 when the clocks
+# jump from 02:00 to 03:00, get the offset before the gap like pytz does
+DST_GAP: Final[pd.Timedelta] = pd.Timedelta(hours=1)
+UTC_SUFFIX: Final[str] = "+00:00"
+
+
+def utc_iso_strings(values: Series, timezone: str) -> np.ndarray:
+    """
+    ISO strings in UTC of a datetime column like Timestamp.isoformat, naive
+    values are local times of timezone. Ambiguous times are taken as
+    daylight saving time, as pytz localized the Timestamps before.
+    """
+    if values.dt.tz is None:
+        values = values.dt.tz_localize(
+            timezone,
+            ambiguous=np.ones(len(values), dtype=bool),
+            nonexistent=DST_GAP,
         )
-
-
-def fixture(model_name: str, df: DataFrame, timezone: str):
-    df_as_dict = df.to_dict(orient="records")
-    local_tz = pytz.timezone(timezone)
-    target_tz = pytz.timezone("UTC")
-    patched_df = []
-    for record in df_as_dict:
-        patched_dict = {}
-        for k, v in record.items():
-            if str(v).lower() == "nan" or str(v).lower() == "nat":
-                patched_dict[k] = None
-            else:
-                patched_dict[k] = convert_to_utc_str(v, local_tz, target_tz)
-
-        patched_df.append(patched_dict)
-
+    utc = values.dt.tz_convert(None).to_numpy()
+    text = np.datetime_as_string(utc.astype("datetime64[s]")).astype(object)
+    microseconds = values.dt.microsecond.to_numpy()
+    fractional = microseconds > 0
+    if fractional.any():
+        text[fractional] += np.char.add(
+            ".", np.char.zfill(microseconds[fractional].astype(str), 6)
+        ).astype(object)
+    return text + UTC_SUFFIX
+
+
+def utc_datetime(value: datetime, timezone: str) -> datetime:
+    """value in UTC, a naive value is a local time of timezone."""
+    if value.tzinfo is None:
+        return (
+            Timestamp(value)
+            .tz_localize(timezone, ambiguous=True, nonexistent=DST_GAP)
+            .tz_convert("UTC")
+            .to_pydatetime()
+        )
+    return value.astimezone(pytz.utc)
+
+
+def fixture_values(values: Series, timezone: str) -> np.ndarray:
+    """The JSON values of a column, None for empty cells."""
+    if is_datetime64_any_dtype(values.dtype):
+        result = utc_iso_strings(values, timezone)
+    elif values.dtype == object and infer_dtype(values) in ("datetime", "mixed"):
+        local_tz = pytz.timezone(timezone)
+        target_tz = pytz.timezone("UTC")
+        result = values.map(
+            lambda value: convert_to_utc_str(value, local_tz, target_tz)
+        ).to_numpy(dtype=object)
+    else:
+        result = values.to_numpy(dtype=object, copy=True)
+    nulls = values.isna().to_numpy()
+    if nulls.any():
+        result[nulls] = None
+    return result
+
+
+def fixture(model_name: str, df: DataFrame, timezone: str, start: int = 1):
+    """Fixture records of the rows of df, converted column by column."""
+    columns = list(df.columns)
+    values = [fixture_values(df.iloc[:, j], timezone) for j in range(len(columns))]
+    rows = zip(*values) if values else [()] * len(df)
     return [
-        {
-            "model": f"{model_name}",
-            "pk": i,
-            "fields": {
-                k: None if str(v).lower() == "nan" or str(v).lower() == "nat" else v
-                for k, v in fields.items()
-            },
-        }
-        for i, fields in enumerate(patched_df, start=1)
+        {"model": f"{model_name}", "pk": i, "fields": dict(zip(columns, row))}
+        for i, row in enumerate(rows, start=start)
     ]
 
 
@@ -124,120 +259,335 @@ def convert_to_utc_str(value, local_tz, target_tz) -> str:
     return value
 
 
+# stages of the import of a sheet, see create_models
+STAGE_PARSE: Final[str] = "parse"
+STAGE_INFER: Final[str] = "infer"
+STAGE_PERSIST: Final[str] = "persist"
+STAGE_DONE: Final[str] = "done"
+STAGE_FAILED: Final[str] = "failed"
+
+# called with the index of a sheet, its stage, the rows read so far and the
+# error of a failed sheet
+ImportProgress = Callable[[int, str, int, str], None]
+
+
 def create_models(
-    request: HttpRequest,
+    report: Callable[[str], None],
     file: TransformationFile,
-    df_by_sheet: Dict[str | int, Tuple[DataFrame, SheetReaderParams]],
+    df_by_sheet: Dict[
+        str | int, Tuple[DataFrame | Iterable[DataFrame], SheetReaderParams]
+    ],
     clean_existing_models: bool,
+    incremental: bool = False,
+    dry_run: bool = False,
+    progress: Optional[ImportProgress] = None,
 ):
-
-    kwarg_fields: Final[List[str]] = [
-        ImportField.CHOICES,
-        ImportField.MAX_DIGITS,
-        ImportField.MAX_LENGTH,
-        ImportField.DECIMAL_PLACES,
-        ImportField.BLANK,
-        ImportField.NULL,
-    ]
-
-    tm: TransformationMapping = file.transformation_mapping
+    """
+    Create the models of all sheets, a sheet is either a complete DataFrame
+    or an iterable of chunks of a streamed import. The messages for the user
+    are passed to report, the stages of the sheets to progress.
+    The rows of a sheet are stored while it is read, its columns, profiles and
+    fields are written in bulk in a single transaction afterwards.
+    An incremental import of an existing model only applies the changes of
+    its fields and reports them, a dry run only reports them. It rolls back
+    the schema writes of every sheet on its own, the progress saved while
+    the sheets are read stays visible to others.
+    A sheet failing with a ValueError is reported, the others get imported.
+    """
 
     if clean_existing_models:
         pass
     #     tm.files.sheets.all().delete()
     #     tm.models.all().delete()
-    else:
+    elif not dry_run:
         #     file.sheets.headlines.models.all().delete()
         file.sheets.all().delete()
 
-    item: Tuple[str | int, Tuple[DataFrame, SheetReaderParams]]
-    for index, item in enumerate(df_by_sheet.items()):
-        sheet: str | int = item[0]
-        df_tuple: Tuple[DataFrame, SheetReaderParams] = item[1]
+    sheet: str | int
+    data: DataFrame | Iterable[DataFrame]
+    sheet_settings: SheetReaderParams
+    for index, (sheet, (data, sheet_settings)) in enumerate(df_by_sheet.items()):
+
+        def sheet_progress(stage: str, rows: int, error: str = "") -> None:
+            if progress is not None:
+                progress(index, stage, rows, error)
+
+        try:
+            import_sheet(
+                report,
+                file,
+                index,
+                sheet,
+                [data] if isinstance(data, DataFrame) else data,
+                sheet_settings,
+                incremental,
+                dry_run,
+                sheet_progress,
+            )
+        except ValueError as e:
+            logger.exception("Import of sheet %s failed", sheet)
+            report(
+                _("Table %(name)s could not be imported: %(error)s")
+                % {"name": sheet, "error": e}
+            )
+            sheet_progress(STAGE_FAILED, 0, str(e))
+        else:
+            sheet_progress(STAGE_DONE, 0)
 
-        # tm.models.filter(name=slugified_sheet).delete()
 
-        df: DataFrame = df_tuple[0]
-        settings: SheetReaderParams = df_tuple[1]
+def sheet_headline(
+    file: TransformationFile, index: int, settings: SheetReaderParams
+) -> TransformationHeadline:
+    """The headline of the sheet at index of file, created if missing."""
+    ts, created = TransformationSheet.objects.get_or_create(
+        transformation_file=file, index=index + 1
+    )
 
-        ts, created = TransformationSheet.objects.get_or_create(
-            transformation_file=file, index=index + 1
-        )
+    header_offset: int = settings.get(READ_PARAM_HEADER, 0)
+    skiprows: int = settings.get(READ_PARAM_SKIPROWS, 0)
+    skiprows = skiprows if skiprows else 0
 
-        header_offset: int = settings.get(READ_PARAM_HEADER, 0)
-        skiprows: int = settings.get(READ_PARAM_SKIPROWS, 0)
-        skiprows = skiprows if skiprows else 0
+    th, created = TransformationHeadline.objects.get_or_create(
+        transformation_sheet=ts,
+        row_index=header_offset + skiprows,
+    )
+    return th
 
-        content = fixture(sheet, df, settings.get(TIMEZONE_PARAM))
-        th, created = TransformationHeadline.objects.get_or_create(
-            transformation_sheet=ts,
-            row_index=header_offset + skiprows,
-            defaults={"content": content},
-        )
 
-        # Model.objects.filter(transformation_mapping=tm, index=index).delete()
-        model, created = Model.objects.update_or_create(
-            transformation_mapping=tm,
-            index=index + 1,
-            defaults={
-                "transformation_headline": th,
-                "name": sheet,
-                "is_main_entity": index == 0,
-            },
-        )
+def import_sheet(
+    report: Callable[[str], None],
+    file: TransformationFile,
+    index: int,
+    sheet: str | int,
+    chunks: Iterable[DataFrame],
+    settings: SheetReaderParams,
+    incremental: bool,
+    dry_run: bool,
+    progress: Callable[[str, int], None],
+) -> None:
+    """
+    Create or update the model of the sheet at index of file. A dry run
+    writes nothing until the schema, which is rolled back.
+    """
+    tm: TransformationMapping = file.transformation_mapping
 
-        if created:
-            messages.info(request, f"Die Tabelle: {model.name} wurde angelegt.")
+    # tm.models.filter(name=slugified_sheet).delete()
+
+    th: Optional[TransformationHeadline] = None
+    store_rows = False
+    if not dry_run:
+        th = sheet_headline(file, index, settings)
+        if incremental:
+            # the rows of the changed sheet replace the stored ones
+            th.row_batches.all().delete()
+        # otherwise the rows of an existing headline are kept
+        store_rows = not th.row_batches.exists()
+        if store_rows:
+            th.timezone = settings.get(TIMEZONE_PARAM)
+            th.save(update_fields=["timezone"])
+
+    with get_sheet_statistics() as sheet_statistics:
+        try:
+            for chunk in chunks:
+                if th is not None and store_rows:
+                    th.append_rows(
+                        fixture(
+                            sheet,
+                            chunk,
+                            settings.get(TIMEZONE_PARAM),
+                            start=sheet_statistics.row_count + 1,
+                        )
+                    )
+                sheet_statistics.update(chunk)
+                progress(STAGE_PARSE, sheet_statistics.row_count)
+        except Exception:
+            if th is not None and store_rows:
+                # no partial rows, which a later import would keep
+                th.row_batches.all().delete()
+            raise
+        progress(STAGE_INFER, sheet_statistics.row_count)
+        statistics = sheet_statistics.columns()
+
+    progress(STAGE_PERSIST, sheet_statistics.row_count)
+    # the schema of the sheet is written at once
+    with transaction.atomic():
+        if th is None:
+            th = sheet_headline(file, index, settings)
+        model_values = {
+            "transformation_headline": th,
+            "name": sheet,
+            "is_main_entity": index == 0,
+        }
+        if incremental:
+            # edits of the model are kept as well
+            model, created = Model.objects.get_or_create(
+                transformation_mapping=tm, index=index + 1, defaults=model_values
+            )
         else:
-            messages.info(request, f"Die Tabelle: {model.name} wurde aktualisiert.")
-
-        for col_index, col in enumerate(df.columns):
-
-            import_field = ImportField(df[col])
+            # Model.objects.filter(transformation_mapping=tm, index=index).delete()
+            model, created = Model.objects.update_or_create(
+                transformation_mapping=tm, index=index + 1, defaults=model_values
+            )
 
-            tc, created = TransformationColumn.objects.get_or_create(
-                transformation_headline=th,
-                column_index=col_index,
-                defaults={"name": import_field.field_name},
+        import_fields: List[ImportField] = [
+            ImportField(statistics=statistics[col]) for col in statistics
+        ]
+        sampled_rows: Optional[int] = None
+        for col, import_field in zip(statistics, import_fields):
+            if import_field.is_sampled:
+                sampled_rows = statistics[col].count
+
+        if incremental and not created:
+            diff = diff_schema(
+                list(
+                    model.fields.filter(
+                        transformation_column__isnull=False
+                    ).select_related("transformation_column__profile")
+                ),
+                [
+                    ProposedColumn(col_index, col, statistics[col], import_field)
+                    for col_index, (col, import_field) in enumerate(
+                        zip(statistics, import_fields)
+                    )
+                ],
             )
+            if diff.is_empty:
+                report(
+                    _("The fields of table %(name)s are unchanged.")
+                    % {"name": model.name},
+                )
+            else:
+                report(
+                    _("Changes of the fields of table %(name)s: %(changes)s")
+                    % {"name": model.name, "changes": "; ".join(diff.summary())},
+                )
+        elif created:
+            report(f"Die Tabelle: {model.name} wurde angelegt.")
+        else:
+            report(f"Die Tabelle: {model.name} wurde aktualisiert.")
+        if dry_run:
+            transaction.set_rollback(True)
+            return
+
+        if incremental and model.transformation_headline_id != th.pk:
+            model.transformation_headline = th
+            model.save(update_fields=["transformation_headline", "updated_at"])
+
+        # the names of existing columns are kept, unless they are replaced by
+        # an incremental import
+        bulk_upsert(
+            [
+                TransformationColumn(
+                    transformation_headline=th,
+                    column_index=col_index,
+                    name=import_field.field_name,
+                    sampled_rows=(
+                        statistics[col].count if import_field.is_sampled else None
+                    ),
+                )
+                for col_index, (col, import_field) in enumerate(
+                    zip(statistics, import_fields)
+                )
+            ],
+            th.columns.all(),
+            unique_fields=["transformation_headline", "column_index"],
+            update_fields=["name", "sampled_rows"] if incremental else ["sampled_rows"],
+        )
+        if incremental:
+            th.columns.filter(column_index__gte=len(import_fields)).delete()
+        columns: Dict[int, TransformationColumn] = {
+            tc.column_index: tc for tc in th.columns.all()
+        }
+        save_profiles(
+            [
+                (columns[col_index], statistics[col])
+                for col_index, col in enumerate(statistics)
+            ]
+        )
 
-            defaults = {
-                "name": col,
-                "transformation_column": tc,
-                "datatype": import_field.field_type
-                if import_field.field_type
-                else None,
-                "is_unique": import_field.propose_unique(),
-                "default_value": None,
-            }
-
-            defaults.update(
-                {
-                    k: import_field.kwargs.get(k)
-                    for k in kwarg_fields
-                    if k in import_field.kwargs
-                }
+        if incremental and not created:
+            apply_schema_diff(
+                diff, model, {column.name: column for column in columns.values()}
+            )
+        else:
+            bulk_upsert(
+                [
+                    Field(
+                        model=model,
+                        index=col_index + 1,
+                        name=col,
+                        transformation_column=columns[col_index],
+                        **import_field.field_values(),
+                    )
+                    for col_index, (col, import_field) in enumerate(
+                        zip(statistics, import_fields)
+                    )
+                ],
+                model.fields.all(),
+                unique_fields=["model", "index"],
+                update_fields=[
+                    "name",
+                    "transformation_column",
+                    *import_fields[0].field_values(),
+                    "updated_at",
+                ]
+                if import_fields
+                else [],
             )
 
-            Field.objects.update_or_create(
-                model=model,
-                index=col_index + 1,
-                defaults=defaults,
+        if sampled_rows is not None:
+            report(
+                _(
+                    "The fields of table %(name)s were proposed from a sample of "
+                    "%(sample)s of %(rows)s rows."
+                )
+                % {
+                    "name": model.name,
+                    "sample": sampled_rows,
+                    "rows": sheet_statistics.row_count,
+                },
             )
 
 
 class Importer:
-    def __init__(self, filepath: Path):
+    def __init__(
+        self,
+        filepath: Path,
+        csv_engine: str = CSV_ENGINE_FAST,
+        reader: str = "",
+        sidecar: Optional[Path] = None,
+    ):
         self.filepath: Path = filepath
         self.is_csv = self.filepath.suffix == ".csv"
-        if not self.is_csv:
-            self.xlsx: ExcelFile = pd.ExcelFile(self.filepath)
+        self.csv_engine = csv_engine
+        # name of a registered spreadsheet reader, empty: chosen automatically
+        self.reader_name = reader
+        # directory for the columnar copies of the sheets, None: always parse
+        # the original file
+        self.sidecar = sidecar
+        self._csv_format: CsvFormat | None = None
+
+    @cached_property
+    def reader(self) -> SheetReader:
+        if self.sidecar is not None and sheet_sidecar.is_available():
+            return SidecarReader(
+                self.filepath,
+                self.sidecar.joinpath(self.reader_key),
+                lambda: open_reader(self.filepath, self.reader_name),
+            )
+        return open_reader(self.filepath, self.reader_name)
+
+    @property
+    def reader_key(self) -> str:
+        """Identifies the parser, results of different parsers may differ."""
+        if self.is_csv:
+            return self.csv_engine
+        return self.reader_name or "auto"
 
     def sheets(self) -> List[int | str]:
         if self.is_csv:
             return [DEFAULT_SHEET_NAME_FOR_CSV_FILE]
-        else:
-            return self.xlsx.sheet_names
+        return self.reader.sheets()
 
     def run(
         self,
@@ -245,56 +595,234 @@ class Importer:
         sheet_reader_params: SheetReaderParams,
     ) -> DataFrame:
         if self.is_csv:
-            df = pd.read_csv(
+            return self.read_csv(sheet_reader_params)
+        return self.reader.read(sheet, sheet_reader_params)
+
+    def run_chunked(
+        self,
+        sheet: str | int,
+        sheet_reader_params: SheetReaderParams,
+        chunksize: int,
+    ) -> Iterator[DataFrame]:
+        """
+        Read a sheet in chunks of chunksize rows, so memory is bounded by the
+        chunk size instead of the file size. Sheets without a streaming reader
+        are returned as a single chunk.
+        """
+        if sheet_reader_params.get(READ_PARAM_INDEX_COL) is None:
+            if self.is_csv and self.csv_engine == CSV_ENGINE_FAST:
+                chunks = self.iter_csv_chunks(sheet_reader_params, chunksize)
+                try:
+                    first = next(chunks)
+                except (pd.errors.ParserError, csv.Error) as e:
+                    logger.info(
+                        "Chunked csv parsing of %s failed, reading it at once: %s",
+                        self.filepath,
+                        e,
+                    )
+                else:
+                    yield first
+                    yield from chunks
+                    return
+            elif not self.is_csv:
+                yield from self.reader.iter_chunks(
+                    sheet, sheet_reader_params, chunksize
+                )
+                return
+
+        yield self.run(sheet, sheet_reader_params)
+
+    def iter_csv_chunks(
+        self, sheet_reader_params: SheetReaderParams, chunksize: int
+    ) -> Iterator[DataFrame]:
+        skipfooter: int = convert_param(
+            READ_PARAM_SKIPFOOTER,
+            sheet_reader_params.get(READ_PARAM_SKIPFOOTER),
+        )  # type: ignore
+        nrows: int | None = sheet_reader_params.get(READ_PARAM_NROWS)
+        with pd.read_csv(
+            self.filepath,
+            **self.csv_read_kwargs(sheet_reader_params),
+            nrows=None if skipfooter else nrows,
+            chunksize=chunksize,
+        ) as reader:
+            yield from limit_chunks(reader, skipfooter, nrows)
+
+    def preview(
+        self,
+        sheet: str | int,
+        sheet_reader_params: SheetReaderParams,
+        head_rows: int = DEFAULT_HEAD_TAIL_ROWS,
+        tail_rows: int = DEFAULT_HEAD_TAIL_ROWS,
+        full_reader: Optional[
+            Callable[[str | int, SheetReaderParams], DataFrame]
+        ] = None,
+    ) -> SheetPreview:
+        """
+        Read only the first head_rows and the last tail_rows of a sheet.
+
+        Small files and sheets whose reader has no windowed preview are parsed completely
+        with full_reader (default: run). The total row count of big csv files
+        is counted by lines, so quoted line breaks inside a value count as
+        additional rows.
+        """
+        windowed = (
+            self.filepath.stat().st_size > PREVIEW_FULL_PARSE_MAX_BYTES
+            and sheet_reader_params.get(READ_PARAM_INDEX_COL) is None
+        )
+        if windowed and self.is_csv and self.csv_engine == CSV_ENGINE_FAST:
+            try:
+                return self.preview_csv(sheet_reader_params, head_rows, tail_rows)
+            except (pd.errors.ParserError, csv.Error) as e:
+                logger.info("Windowed preview of %s failed: %s", self.filepath, e)
+        elif windowed and not self.is_csv:
+            preview = self.reader.preview(
+                sheet, sheet_reader_params, head_rows, tail_rows
+            )
+            if preview is not None:
+                return preview
+
+        full_reader = full_reader or self.run
+        return SheetPreview.of_dataframe(
+            full_reader(sheet, sheet_reader_params), head_rows, tail_rows
+        )
+
+    def preview_csv(
+        self,
+        sheet_reader_params: SheetReaderParams,
+        head_rows: int,
+        tail_rows: int,
+    ) -> SheetPreview:
+        csv_format = self.csv_format()
+        header: int | None = sheet_reader_params.get(READ_PARAM_HEADER)
+        skiprows: int = sheet_reader_params.get(READ_PARAM_SKIPROWS) or 0
+        skipfooter: int = convert_param(
+            READ_PARAM_SKIPFOOTER,
+            sheet_reader_params.get(READ_PARAM_SKIPFOOTER),
+        )  # type: ignore
+        nrows: int | None = sheet_reader_params.get(READ_PARAM_NROWS)
+        read_kwargs: Dict[str, Any] = dict(
+            engine="c",
+            sep=csv_format.delimiter,
+            quotechar=csv_format.quotechar,
+            decimal=csv_format.decimal,
+            encoding_errors="replace",
+            usecols=sheet_reader_params.get(READ_PARAM_USECOLS),
+            on_bad_lines="warn",
+        )
+
+        header_lines = 0 if header is None else header + 1
+        total_rows = max(count_lines(self.filepath) - skiprows - header_lines, 0)
+        data_rows = max(total_rows - skipfooter, 0)
+        if nrows is not None:
+            data_rows = min(data_rows, nrows)
+
+        head = pd.read_csv(
+            self.filepath,
+            header=header,
+            skiprows=skiprows or None,
+            nrows=min(head_rows, data_rows),
+            **read_kwargs,
+        )
+        names = None
+        if header is not None:
+            names = list(
+                pd.read_csv(
+                    self.filepath,
+                    header=header,
+                    skiprows=skiprows or None,
+                    nrows=0,
+                    **dict(read_kwargs, usecols=None),
+                ).columns
+            )
+
+        count = min(tail_rows, data_rows)
+        if data_rows < total_rows - skipfooter:
+            # the window ends before the end of the file
+            tail = pd.read_csv(
                 self.filepath,
-                engine="python",
-                sep=None,  # automatic detection
-                encoding_errors="replace",
-                header=sheet_reader_params.get(READ_PARAM_HEADER),
-                usecols=sheet_reader_params.get(READ_PARAM_USECOLS),
-                index_col=sheet_reader_params.get(READ_PARAM_INDEX_COL),
-                skiprows=sheet_reader_params.get(READ_PARAM_SKIPROWS),
-                nrows=sheet_reader_params.get(READ_PARAM_NROWS),
-                skipfooter=convert_param(
-                    READ_PARAM_SKIPFOOTER,
-                    sheet_reader_params.get(READ_PARAM_SKIPFOOTER),
-                ),  # type: ignore
-                decimal=",",
-                # use "," as decimal point
-                on_bad_lines="warn",
+                header=None,
+                names=names,
+                skiprows=skiprows + header_lines + data_rows - count,
+                nrows=count,
+                **read_kwargs,
             )
         else:
-            df = pd.read_excel(  # type: ignore
-                self.xlsx,
-                sheet_name=sheet,
-                header=sheet_reader_params.get(READ_PARAM_HEADER),
-                usecols=sheet_reader_params.get(READ_PARAM_USECOLS),
-                index_col=sheet_reader_params.get(READ_PARAM_INDEX_COL),
-                skiprows=sheet_reader_params.get(READ_PARAM_SKIPROWS),
-                nrows=sheet_reader_params.get(READ_PARAM_NROWS),
-                skipfooter=convert_param(
-                    READ_PARAM_SKIPFOOTER,
-                    sheet_reader_params.get(READ_PARAM_SKIPFOOTER),
-                ),  # type: ignore
-                dtype=object,
-                # no conversion
-                decimal=",",
-                # use "," as decimal point
+            lines = read_last_lines(self.filepath, count + skipfooter)
+            tail = pd.read_csv(
+                io.StringIO("\n".join(lines)),
+                header=None,
+                names=names,
+                **read_kwargs,
             )
-
-        return df
-
-    # noinspection PyMethodMayBeStatic
-    def handle_dataframe(self, sheet_name, dataframe):
-        dataframe.rename(
-            columns={
-                column: slugify(column).replace("-", "_")
-                for column in dataframe.columns
-            },
-            inplace=True,
+            tail = trim_footer(tail, skipfooter, None).tail(count)
+        tail.index = range(data_rows - len(tail), data_rows)
+
+        return SheetPreview(head, tail, data_rows)
+
+    def csv_format(self) -> CsvFormat:
+        if self._csv_format is None:
+            self._csv_format = sniff_csv_format(self.filepath)
+        return self._csv_format
+
+    def read_csv(self, sheet_reader_params: SheetReaderParams) -> DataFrame:
+        if self.csv_engine == CSV_ENGINE_FAST:
+            try:
+                return self.read_csv_fast(sheet_reader_params)
+            except (pd.errors.ParserError, csv.Error) as e:
+                logger.info(
+                    "Fast csv parsing of %s failed, falling back to python engine: %s",
+                    self.filepath,
+                    e,
+                )
+        return self.read_csv_python(sheet_reader_params)
+
+    def csv_read_kwargs(self, sheet_reader_params: SheetReaderParams) -> Dict[str, Any]:
+        csv_format = self.csv_format()
+        return dict(
+            engine="c",
+            sep=csv_format.delimiter,
+            quotechar=csv_format.quotechar,
+            decimal=csv_format.decimal,
+            encoding_errors="replace",
+            header=sheet_reader_params.get(READ_PARAM_HEADER),
+            usecols=sheet_reader_params.get(READ_PARAM_USECOLS),
+            index_col=sheet_reader_params.get(READ_PARAM_INDEX_COL),
+            skiprows=sheet_reader_params.get(READ_PARAM_SKIPROWS),
+            on_bad_lines="warn",
         )
 
-        print()
-        print("---")
-        print(sheet_name)
-        print(dataframe.head())
+    def read_csv_fast(self, sheet_reader_params: SheetReaderParams) -> DataFrame:
+        skipfooter: int = convert_param(
+            READ_PARAM_SKIPFOOTER,
+            sheet_reader_params.get(READ_PARAM_SKIPFOOTER),
+        )  # type: ignore
+        nrows: int | None = sheet_reader_params.get(READ_PARAM_NROWS)
+        df = pd.read_csv(
+            self.filepath,
+            **self.csv_read_kwargs(sheet_reader_params),
+            # the c engine has no skipfooter, it is cut after parsing, so
+            # nrows has to be applied after the cut as well
+            nrows=None if skipfooter else nrows,
+        )
+        return trim_footer(df, skipfooter, nrows)
+
+    def read_csv_python(self, sheet_reader_params: SheetReaderParams) -> DataFrame:
+        return pd.read_csv(
+            self.filepath,
+            engine="python",
+            sep=None,  # automatic detection
+            encoding_errors="replace",
+            header=sheet_reader_params.get(READ_PARAM_HEADER),
+            usecols=sheet_reader_params.get(READ_PARAM_USECOLS),
+            index_col=sheet_reader_params.get(READ_PARAM_INDEX_COL),
+            skiprows=sheet_reader_params.get(READ_PARAM_SKIPROWS),
+            nrows=sheet_reader_params.get(READ_PARAM_NROWS),
+            skipfooter=convert_param(
+                READ_PARAM_SKIPFOOTER,
+                sheet_reader_params.get(READ_PARAM_SKIPFOOTER),
+            ),  # type: ignore
+            decimal=",",
+            # use "," as decimal point
+            on_bad_lines="warn",
+        )
@@ -1,18 +1,43 @@
-import json
 import string
 from datetime import datetime
+from functools import cached_property, lru_cache
 from pathlib import Path
+from typing import Any, Callable, Dict, Final, List, Tuple
 
+import numpy as np
 from black import Mode, TargetVersion, format_file_in_place, WriteBack
-from django.db.models import QuerySet
 from django.utils.text import slugify
-
-from project.models import Model, Field, Project, ProjectSettings
+from pandas import Series, Timestamp, factorize
+
+from project.models import (
+    ColumnProfile,
+    Model,
+    Field,
+    Project,
+    ProjectSettings,
+    TransformationHeadline,
+)
 from project.services.cookiecutter_template_expander import CookieCutterTemplateExpander
+from project import fast_json
 from project.services.deploytype import Deploytype
+from project.services.import_field import INTEGER_DATATYPES
+from project.services.importer import utc_datetime
 from project.services.model_exporter import ModelExporter
+from project.services.project_schema import (
+    ModelSchema,
+    ProjectSchema,
+    load_project_schema,
+)
+from project.services.sheet_reader import DEFAULT_TIMEZONE
+from project.services.text_kinds import (
+    TEXT_KINDS,
+    date_order,
+    parse_text_datetime,
+)
 
 MAX_DROPDOWN_SIZE = 20
+# columns with more distinct values get no list filter in the admin
+LIST_FILTER_MAX_DISTINCT = 20
 
 
 def create_valid_identifier(name: str, for_class: bool) -> str:
@@ -39,9 +64,9 @@ def to_varname(name):
 
 
 def text_to_default(datatype: int, default_value: str):
-    if datatype == Field.Datatype.INTEGER_FIELD:
+    if datatype in INTEGER_DATATYPES:
         return int(default_value)
-    elif datatype == Field.Datatype.DECIMAL_FIELD:
+    elif datatype in (Field.Datatype.DECIMAL_FIELD, Field.Datatype.FLOAT_FIELD):
         return replace_decimal_sign(default_value)
 
     return default_value
@@ -62,8 +87,14 @@ def replace_decimal_sign(value: str):
 
 
 class FieldTransform:
-    def __init__(self, field: Field):
+    def __init__(self, field: Field, schema: ProjectSchema | None = None):
         self.field: Field = field
+        self.schema: ProjectSchema | None = schema
+
+    def profile(self) -> ColumnProfile | None:
+        """The profile of the imported column, None for fields created by hand."""
+        column = self.field.transformation_column
+        return getattr(column, "profile", None) if column else None
 
     def to_model_dot_py(self):
         return f"\r    {to_varname(self.field.name)} = {self.field_type_and_kwargs()}"
@@ -86,6 +117,16 @@ class FieldTransform:
     def to_admin_dot_py_list_filter(self) -> str | None:
         if self.field.is_unique:
             return None
+        profile = self.profile()
+        if (
+            profile
+            and not self.field.choices
+            and (
+                profile.distinct_count is None
+                or profile.distinct_count > LIST_FILTER_MAX_DISTINCT
+            )
+        ):
+            return None
         return f"'{to_varname(self.field.name)}'"
 
     def to_admin_dot_py_date_hierarchy(self) -> str | None:
@@ -96,10 +137,15 @@ class FieldTransform:
             return None
         return f"'{to_varname(self.field.name)}'"
 
+    def foreign_key_entity_field_count(self) -> int:
+        if self.schema is None:
+            return self.field.foreign_key_entity.fields.count()
+        return self.schema.field_count(self.field.foreign_key_entity)
+
     def to_admin_dot_py_autocomplete_fields(self) -> str | None:
         if (
             not self.field.foreign_key_entity
-            or self.field.foreign_key_entity.fields.count() > MAX_DROPDOWN_SIZE
+            or self.foreign_key_entity_field_count() > MAX_DROPDOWN_SIZE
         ):
             return None
         return f"'{to_varname(self.field.name)}'"
@@ -139,16 +185,16 @@ class FieldTransform:
 
 
 class ModelTransform:
-    def __init__(self, model: Model):
-        self.model: Model = model
+    def __init__(self, model: ModelSchema, schema: ProjectSchema):
+        self.model: Model = model.model
+        self.fields = model.exported_fields
+        self.schema: ProjectSchema = schema
 
     def to_model_dot_py(self) -> str:
         s = f"class {to_classname(self.model.name)}(models.Model):\r    "
         field: Field
-        for field in self.model.fields.all():
-            if field.exclude:
-                continue
-            s += FieldTransform(field).to_model_dot_py()
+        for field in self.fields:
+            s += FieldTransform(field, self.schema).to_model_dot_py()
 
         s += "\r\r    "
         s += "__str__ = __repr__ = lambda self: f'{self.id}'"
@@ -163,31 +209,30 @@ class ModelTransform:
         autocomplete_fields = []
         date_hierarchy = None
         field: Field
-        for field in self.model.fields.all():
-            if field.exclude:
-                continue
+        for field in self.fields:
+            transform = FieldTransform(field, self.schema)
 
-            entry = FieldTransform(field).to_admin_dot_py_fields()
+            entry = transform.to_admin_dot_py_fields()
             if entry:
                 fields.append(entry)
 
-            entry = FieldTransform(field).to_admin_dot_py_search_fields()
+            entry = transform.to_admin_dot_py_search_fields()
             if entry:
                 search_fields.append(entry)
 
-            entry = FieldTransform(field).to_admin_dot_py_list_display()
+            entry = transform.to_admin_dot_py_list_display()
             if entry:
                 list_display.append(entry)
 
-            entry = FieldTransform(field).to_admin_dot_py_list_filter()
+            entry = transform.to_admin_dot_py_list_filter()
             if entry:
                 list_filter.append(entry)
 
-            entry = FieldTransform(field).to_admin_dot_py_date_hierarchy()
+            entry = transform.to_admin_dot_py_date_hierarchy()
             if not date_hierarchy and entry:
                 date_hierarchy = entry
 
-            entry = FieldTransform(field).to_admin_dot_py_autocomplete_fields()
+            entry = transform.to_admin_dot_py_autocomplete_fields()
             if entry:
                 autocomplete_fields.append(entry)
 
@@ -221,13 +266,6 @@ def format_file(file: Path) -> None:
     )
 
 
-def reverse_dict_value(value, choices):
-    for k, v in choices.items():
-        if v == value:
-            return k
-    return None
-
-
 def reverse_fk_value(value, fk):
     return fk.get_object(value)
 
@@ -275,16 +313,202 @@ def init_database_url(project: Project) -> str:
     return output
 
 
+def parse_datetime_value(value: str, text_kind: str | None = None) -> datetime:
+    """
+    ISO dates of the fixtures, or the dates of text columns like 4/8/2016,
+    in the order of day, month and year their column was detected with.
+    Values not of the kind, e.g. beyond the sample of a column, are parsed
+    like a column of just that value.
+    """
+    if text_kind and date_order(text_kind):
+        parsed = parse_text_datetime(value, text_kind)
+        if parsed is not None:
+            return parsed
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for kind in TEXT_KINDS:
+        if date_order(kind):
+            parsed = parse_text_datetime(value, kind)
+            if parsed is not None:
+                return parsed
+    return Timestamp(value).to_pydatetime()
+
+
+def text_kind_of(field: Field) -> str | None:
+    """The kind of the values of the text column of field, like date:dmy."""
+    profile = FieldTransform(field).profile()
+    if profile is None or not profile.text_kinds:
+        return None
+    return profile.text_kinds[0]
+
+
+def timezone_of(field: Field) -> str:
+    """The time zone the naive datetimes of the column of field are local to."""
+    try:
+        headline = field.transformation_column.transformation_headline
+    except (AttributeError, TransformationHeadline.DoesNotExist):
+        # fields without an imported column
+        return DEFAULT_TIMEZONE
+    return headline.timezone or DEFAULT_TIMEZONE
+
+
+# the values of the date and time fields in the fixtures
+DATETIME_FORMATTERS: Final[Dict[int, Callable[[datetime], str]]] = {
+    Field.Datatype.DATE_FIELD.value: lambda value: value.date().isoformat(),
+    Field.Datatype.TIME_FIELD.value: lambda value: value.timetz().isoformat(),
+    Field.Datatype.DATE_TIME_FIELD.value: datetime.isoformat,
+}
+
+
 def transform_value_for_datatype(field: Field, original_value):
-    if not original_value:
+    formatter = DATETIME_FORMATTERS.get(field.datatype)
+    if not original_value or formatter is None:
         return original_value
-    if field.datatype == Field.Datatype.DATE_FIELD.value:
-        original_value = datetime.fromisoformat(original_value).date().isoformat()
-    elif field.datatype == Field.Datatype.TIME_FIELD.value:
-        original_value = datetime.fromisoformat(original_value).timetz().isoformat()
-    elif field.datatype == Field.Datatype.DATE_TIME_FIELD.value:
-        original_value = datetime.fromisoformat(original_value).isoformat()
-    return original_value
+    value = parse_datetime_value(original_value, text_kind_of(field))
+    if field.datatype == Field.Datatype.DATE_TIME_FIELD:
+        value = utc_datetime(value, timezone_of(field))
+    return formatter(value)
+
+
+# converted values kept per column, enough for the choices and the repeated
+# values of a column without growing with the rows of unique ones
+CONVERTED_VALUES_CACHE_SIZE: Final[int] = 4096
+
+
+def memoized(convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """convert, with the results of the recently converted values kept."""
+    cached = lru_cache(maxsize=CONVERTED_VALUES_CACHE_SIZE, typed=True)(convert)
+
+    def convert_cached(value):
+        try:
+            return cached(value)
+        except TypeError:
+            # unhashable values like lists
+            return convert(value)
+
+    return convert_cached
+
+
+def reverse_choices(choices) -> dict:
+    """
+    The choice of every value, the first one if values repeat like the
+    linear search through the choices did, built once per field.
+    """
+    reverse = {}
+    for k, v in choices.items():
+        reverse.setdefault(v, k)
+    return reverse
+
+
+def compile_value_converter(field: Field) -> Callable[[Any], Any] | None:
+    """
+    The conversion of the imported values of field to the ones of the
+    fixtures, None if they are taken as they are.
+    """
+    formatter = DATETIME_FORMATTERS.get(field.datatype)
+    text_kind = text_kind_of(field) if formatter is not None else None
+    # naive datetimes of text cells are local times of the sheet like the
+    # datetime cells, which the import stored in UTC
+    timezone = (
+        timezone_of(field) if field.datatype == Field.Datatype.DATE_TIME_FIELD else None
+    )
+
+    def to_datatype(value):
+        if not value or formatter is None:
+            return value
+        parsed = parse_datetime_value(value, text_kind)
+        if timezone is not None:
+            parsed = utc_datetime(parsed, timezone)
+        return formatter(parsed)
+
+    if field.choices:
+        choice_by_value = reverse_choices(field.choices)
+        is_integer = field.datatype == Field.Datatype.INTEGER_FIELD.value
+
+        def convert(value):
+            choice = choice_by_value.get(to_datatype(value))
+            if is_integer:
+                return int(choice) if choice else None
+            return choice
+
+    elif field.foreign_key_entity:
+        foreign_key_entity = field.foreign_key_entity
+
+        def convert(value):
+            return reverse_fk_value(to_datatype(value), foreign_key_entity)
+
+    elif formatter is not None:
+        convert = to_datatype
+    else:
+        return None
+    return memoized(convert)
+
+
+def encode_values(values: List[Any], convert: Callable[[Any], Any]) -> List[Any]:
+    """
+    values converted like map(convert, values), for columns of few distinct
+    values like the ones of choices: a single factorize numbers the values,
+    every distinct one is converted once and the codes pick the conversions.
+    """
+    try:
+        codes, distinct_values = factorize(Series(values, dtype=object))
+    except TypeError:
+        # unhashable values like lists
+        return list(map(convert, values))
+    converted = np.empty(len(distinct_values) + 1, dtype=object)
+    for code, value in enumerate(distinct_values):
+        converted[code] = convert(value)
+    # the code -1 of the empty values picks the last one
+    converted[-1] = convert(None)
+    return converted[codes].tolist()
+
+
+class RowTransformer:
+    """
+    The exported fields of a model compiled once into the column, attribute
+    name and value converter of each, which are then applied column by column
+    to the imported rows. The values of choices are encoded with
+    encode_values.
+    """
+
+    def __init__(self, model_label: str, model: ModelSchema):
+        self.model_label = model_label
+        self.columns: List[
+            Tuple[str | None, str, Callable[[Any], Any] | None, bool]
+        ] = [
+            (
+                field.transformation_column.name
+                if field.transformation_column
+                else None,
+                to_varname(field.name),
+                compile_value_converter(field),
+                bool(field.choices),
+            )
+            for field in model.exported_fields
+        ]
+
+    def transform_fields(self, fields: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self.columns:
+            return [{} for _ in fields]
+        values_by_column = []
+        for column, _name, convert, is_choice in self.columns:
+            values = [row_fields.get(column) for row_fields in fields]
+            if convert is not None and is_choice:
+                values = encode_values(values, convert)
+            elif convert is not None:
+                values = list(map(convert, values))
+            values_by_column.append(values)
+        names = [name for _column, name, _convert, _is_choice in self.columns]
+        return [dict(zip(names, values)) for values in zip(*values_by_column)]
+
+    def transform(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        fields = self.transform_fields([row.get("fields", {}) for row in rows])
+        return [
+            dict(row, model=self.model_label, fields=row_fields)
+            for row, row_fields in zip(rows, fields)
+        ]
 
 
 class ModelExporterDjango(ModelExporter):
@@ -297,6 +521,14 @@ class ModelExporterDjango(ModelExporter):
         self.app_dir = cte.config.config.get("custom_app_name")
         self.preamble = f"# Created by Django LowCoder at {datetime.now()}\r\r"
 
+    @cached_property
+    def schema(self) -> ProjectSchema:
+        """The models and fields all files are exported from, loaded once."""
+        # noinspection PyUnresolvedReferences
+        return load_project_schema(
+            self.cookieCutterTemplateExpander.project.transformationmapping
+        )
+
     def export(self) -> Path | None:
         app_dir: Path = self.create_app_dir()
         app_dir.mkdir(parents=True, exist_ok=True)
@@ -334,83 +566,44 @@ class ModelExporterDjango(ModelExporter):
         output += "from django.db import models\r"
         output += "from django.utils.translation import gettext_lazy as _\r"
 
-        # noinspection PyUnresolvedReferences
-        models: QuerySet[
-            Model
-        ] = self.cookieCutterTemplateExpander.project.transformationmapping.models
-        model: Model
-        for model in models.all():
-            if model.exclude:
-                continue
-            output += "\r\r" + ModelTransform(model).to_model_dot_py()
+        for model in self.schema.exported_models:
+            output += "\r\r" + ModelTransform(model, self.schema).to_model_dot_py()
 
         models_py.write_text(output)
         return models_py
 
-    def reorder_data(self, model: Model, data):
-        reordered_data = []
-        for row in data:
-            patched_dict = {}
-            for k, v in row.items():
-                patched_value = v
-                if k == "model":
-                    patched_value = f"{self.app_dir}.{to_classname(model.name)}"
-                elif k == "fields":
-                    patched_value = {}
-                    for field in model.fields.all():
-                        if field.exclude:
-                            continue
-                        original_value = v.get(field.transformation_column.name, None)
-                        original_value = transform_value_for_datatype(
-                            field, original_value
-                        )
-                        if field.choices:
-                            rev_dict_value = reverse_dict_value(
-                                original_value, field.choices
-                            )
-                            if field.datatype == Field.Datatype.INTEGER_FIELD.value:
-                                rev_dict_value = (
-                                    int(rev_dict_value) if rev_dict_value else None
-                                )
-                            patched_value[to_varname(field.name)] = rev_dict_value
-                        elif field.foreign_key_entity:
-                            patched_value[to_varname(field.name)] = reverse_fk_value(
-                                original_value, field.foreign_key_entity
-                            )
-                        else:
-                            patched_value[to_varname(field.name)] = original_value
-                patched_dict[k] = patched_value
-            reordered_data.append(patched_dict)
-        return reordered_data
+    def row_transformer(self, model: ModelSchema) -> RowTransformer:
+        return RowTransformer(f"{self.app_dir}.{to_classname(model.model.name)}", model)
+
+    def reorder_data(self, model: ModelSchema, data):
+        return self.row_transformer(model).transform(data)
 
     def create_initial_data(self, app_dir: Path) -> None:
 
         initial_data_dir = app_dir.joinpath("fixtures")
         initial_data_dir.mkdir(parents=True, exist_ok=True)
         initial_data_json = initial_data_dir.joinpath("initial_data.json")
-        initial_data = []
-        models: QuerySet[
-            Model
-        ] = self.cookieCutterTemplateExpander.project.transformationmapping.models
-        model: Model
-        for model in models.all():
-            if model.exclude:
-                continue
-            data = model.transformation_headline.content
-            data = self.reorder_data(model, data)
-            if data:
-                initial_data.extend(data)
-
-        initial_data_json.write_text(json.dumps(initial_data))
+        # the rows are streamed batch by batch into the JSON list
+        with initial_data_json.open("w") as initial_data:
+            initial_data.write("[")
+            separator = ""
+            for model in self.schema.exported_models:
+                headline = model.model.transformation_headline
+                if headline is None:
+                    continue
+                # compiled once for all row batches of the model
+                transformer = self.row_transformer(model)
+                for rows in headline.iter_row_batches():
+                    data = transformer.transform(rows)
+                    if data:
+                        initial_data.write(separator + fast_json.dumps(data)[1:-1])
+                        separator = ","
+            initial_data.write("]")
 
     def create_admin_py(self, app_dir) -> Path:
 
         admin_py = app_dir.joinpath("admin.py")
 
-        models: QuerySet[
-            Model
-        ] = self.cookieCutterTemplateExpander.project.transformationmapping.models
-
         output = f"# Created by Django LowCoder at {datetime.now()}\r\r"
         output += "from django.contrib import admin\r"
         output += "from django.utils.translation import gettext_lazy as _\r"
@@ -419,19 +612,15 @@ class ModelExporterDjango(ModelExporter):
         main_url = Path(
             "/admin/",
             self.app_dir,
-            to_varname(models.filter(is_main_entity=True).first().name),
+            to_varname(self.schema.main_model.model.name),
         )
 
         output += f"admin.site.site_header = '{self.cookieCutterTemplateExpander.project.name}'\r"
         output += f"admin.site.site_title = '{self.cookieCutterTemplateExpander.project.name}'\r"
         output += f"admin.site.site_url = '{main_url}'\r"
 
-        # noinspection PyUnresolvedReferences
-        model: Model
-        for model in models.all():
-            if model.exclude:
-                continue
-            output += "\r" + ModelTransform(model).to_admin_dot_py_class()
+        for model in self.schema.exported_models:
+            output += "\r" + ModelTransform(model, self.schema).to_admin_dot_py_class()
 
         admin_py.write_text(output)
         return admin_py
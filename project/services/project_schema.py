@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from django.db.models import Count, Prefetch
+
+from project.models import Field, Model, TransformationMapping
+
+
+@dataclass(frozen=True)
+class ModelSchema:
+    model: Model
+    # all fields in their order, the excluded ones too
+    fields: Tuple[Field, ...]
+
+    @property
+    def exported_fields(self) -> Tuple[Field, ...]:
+        return tuple(field for field in self.fields if not field.exclude)
+
+
+@dataclass(frozen=True)
+class ProjectSchema:
+    models: Tuple[ModelSchema, ...]
+    # the number of fields of every model, the referenced ones of other
+    # mappings too
+    field_counts: Mapping[int, int]
+
+    @property
+    def exported_models(self) -> Tuple[ModelSchema, ...]:
+        return tuple(schema for schema in self.models if not schema.model.exclude)
+
+    @property
+    def main_model(self) -> Optional[ModelSchema]:
+        return next(
+            (schema for schema in self.models if schema.model.is_main_entity), None
+        )
+
+    def field_count(self, model: Model) -> int:
+        return self.field_counts[model.pk]
+
+
+def load_project_schema(mapping: TransformationMapping) -> ProjectSchema:
+    """
+    The models of mapping with their fields, the columns, profiles, headlines
+    and referenced models of the fields, loaded in a constant number of queries,
+    so the exporters do not query per model or field.
+    """
+    models = list(
+        mapping.models.select_related("transformation_headline").prefetch_related(
+            Prefetch(
+                "fields",
+                queryset=Field.objects.select_related(
+                    "transformation_column__profile",
+                    "transformation_column__transformation_headline",
+                    "foreign_key_entity",
+                ),
+            )
+        )
+    )
+    schemas = tuple(ModelSchema(model, tuple(model.fields.all())) for model in models)
+    field_counts = {schema.model.pk: len(schema.fields) for schema in schemas}
+    referenced = {
+        field.foreign_key_entity_id
+        for schema in schemas
+        for field in schema.fields
+        if field.foreign_key_entity_id is not None
+    } - set(field_counts)
+    if referenced:
+        field_counts.update(
+            Field.objects.filter(model_id__in=referenced)
+            .order_by()
+            .values_list("model_id")
+            .annotate(Count("pk"))
+        )
+        # referenced models without fields
+        for pk in referenced - set(field_counts):
+            field_counts[pk] = 0
+    return ProjectSchema(schemas, MappingProxyType(field_counts))
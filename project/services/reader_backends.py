@@ -0,0 +1,441 @@
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from importlib.util import find_spec
+from pathlib import Path
+from typing import (
+    Any,
+    ClassVar,
+    Dict,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+import openpyxl
+import pandas as pd
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+from pandas import DataFrame, ExcelFile
+
+from project.services.sheet_reader import (
+    SheetReaderParams,
+    SheetPreview,
+    READ_PARAM_HEADER,
+    READ_PARAM_INDEX_COL,
+    READ_PARAM_NROWS,
+    READ_PARAM_SKIPFOOTER,
+    READ_PARAM_SKIPROWS,
+    READ_PARAM_USECOLS,
+    convert_param,
+    parse_row_chunks,
+    parse_rows,
+    preview_rows,
+)
+
+logger = logging.getLogger(__name__)
+
+READER_OPENPYXL: Final[str] = "openpyxl"
+READER_OPENPYXL_READ_ONLY: Final[str] = "openpyxl_read_only"
+READER_CALAMINE: Final[str] = "calamine"
+READER_ODF: Final[str] = "odf"
+READER_XLRD: Final[str] = "xlrd"
+
+LAST_ROW_SEARCH_WINDOW: Final[int] = 64
+
+
+class SheetReader:
+    """
+    Reads the sheets of one spreadsheet file.
+
+    Subclasses are registered by name with register_reader and picked by
+    open_reader from the suffix and the size of the file.
+    """
+
+    name: ClassVar[str]
+    label: ClassVar[str]
+    suffixes: ClassVar[Tuple[str, ...]]
+
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    def open(self) -> None:
+        """Raise early, if the file can't be read by this reader."""
+
+    def sheets(self) -> List[str | int]:
+        raise NotImplementedError
+
+    def rows(self, sheet: str | int) -> Iterable[Sequence[Any]]:
+        """The cell values of all rows, starting with the first row."""
+        raise NotImplementedError
+
+    def read(
+        self, sheet: str | int, sheet_reader_params: SheetReaderParams
+    ) -> DataFrame:
+        raise NotImplementedError
+
+    def iter_chunks(
+        self, sheet: str | int, sheet_reader_params: SheetReaderParams, chunksize: int
+    ) -> Iterator[DataFrame]:
+        yield self.read(sheet, sheet_reader_params)
+
+    # noinspection PyMethodMayBeStatic,PyUnusedLocal
+    def preview(
+        self,
+        sheet: str | int,
+        sheet_reader_params: SheetReaderParams,
+        head_rows: int,
+        tail_rows: int,
+    ) -> Optional[SheetPreview]:
+        """Read only the head and tail window, None if not supported."""
+        return None
+
+
+READERS: Dict[str, Type[SheetReader]] = {}
+
+
+def register_reader(reader: Type[SheetReader]) -> Type[SheetReader]:
+    READERS[reader.name] = reader
+    return reader
+
+
+def set_index_col(df: DataFrame, sheet_reader_params: SheetReaderParams) -> DataFrame:
+    index_col = sheet_reader_params.get(READ_PARAM_INDEX_COL)
+    if index_col is None:
+        return df
+    if isinstance(index_col, int):
+        return df.set_index(df.columns[index_col])
+    return df.set_index([df.columns[i] for i in index_col])
+
+
+class PandasExcelReader(SheetReader):
+    engine: ClassVar[str]
+    module: ClassVar[str]
+
+    def __init__(self, filepath: Path):
+        super().__init__(filepath)
+        self._excel_file: ExcelFile | None = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return find_spec(cls.module) is not None
+
+    def open(self) -> None:
+        self._excel_file = pd.ExcelFile(self.filepath, engine=self.engine)
+
+    @property
+    def excel_file(self) -> ExcelFile:
+        if self._excel_file is None:
+            self._excel_file = pd.ExcelFile(self.filepath, engine=self.engine)
+        return self._excel_file
+
+    def sheets(self) -> List[str | int]:
+        return self.excel_file.sheet_names
+
+    def rows(self, sheet: str | int) -> Iterable[Sequence[Any]]:
+        df = pd.read_excel(  # type: ignore
+            self.excel_file,
+            sheet_name=sheet,
+            header=None,
+            dtype=object,
+            na_filter=False,
+        )
+        return df.itertuples(index=False, name=None)
+
+    def read(
+        self, sheet: str | int, sheet_reader_params: SheetReaderParams
+    ) -> DataFrame:
+        return pd.read_excel(  # type: ignore
+            self.excel_file,
+            sheet_name=sheet,
+            header=sheet_reader_params.get(READ_PARAM_HEADER),
+            usecols=sheet_reader_params.get(READ_PARAM_USECOLS),
+            index_col=sheet_reader_params.get(READ_PARAM_INDEX_COL),
+            skiprows=sheet_reader_params.get(READ_PARAM_SKIPROWS),
+            nrows=sheet_reader_params.get(READ_PARAM_NROWS),
+            skipfooter=convert_param(
+                READ_PARAM_SKIPFOOTER,
+                sheet_reader_params.get(READ_PARAM_SKIPFOOTER),
+            ),  # type: ignore
+            dtype=object,
+            # no conversion
+            decimal=",",
+            # use "," as decimal point
+        )
+
+
+@register_reader
+class OpenpyxlReader(PandasExcelReader):
+    name = READER_OPENPYXL
+    label = "openpyxl"
+    suffixes = ("xlsx", "xlsm")
+    engine = "openpyxl"
+    module = "openpyxl"
+
+
+@register_reader
+class XlrdReader(PandasExcelReader):
+    name = READER_XLRD
+    label = "xlrd"
+    suffixes = ("xls",)
+    engine = "xlrd"
+    module = "xlrd"
+
+
+@register_reader
+class OdfReader(PandasExcelReader):
+    name = READER_ODF
+    label = "odfpy"
+    suffixes = ("ods", "odf")
+    engine = "odf"
+    module = "odf"
+
+
+def open_read_only_workbook(filepath: Path) -> openpyxl.Workbook:
+    return openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+
+
+def worksheet(wb: Any, sheet: str | int) -> Any:
+    return wb[sheet] if isinstance(sheet, str) else wb.worksheets[sheet]
+
+
+def last_filled_row(ws: ReadOnlyWorksheet) -> int:
+    """1-based index of the last row with content, 0 for an empty sheet."""
+    if ws.max_row is None:
+        ws.reset_dimensions()
+        ws.calculate_dimension(force=True)
+    max_row = ws.max_row or 0
+    window = LAST_ROW_SEARCH_WINDOW
+    while max_row > 0:
+        min_row = max(max_row - window + 1, 1)
+        rows = list(ws.iter_rows(min_row=min_row, max_row=max_row, values_only=True))
+        for offset in range(len(rows) - 1, -1, -1):
+            if any(v is not None and v != "" for v in rows[offset]):
+                return min_row + offset
+        max_row = min_row - 1
+        window *= 2
+    return 0
+
+
+@register_reader
+class OpenpyxlReadOnlyReader(SheetReader):
+    """
+    Streams the rows with openpyxl in read-only mode, memory only depends on
+    the chunk size, but parsing is not faster than the full mode.
+    """
+
+    name = READER_OPENPYXL_READ_ONLY
+    label = "openpyxl (read-only)"
+    suffixes = ("xlsx", "xlsm")
+
+    @contextmanager
+    def workbook(self) -> Iterator[openpyxl.Workbook]:
+        wb = open_read_only_workbook(self.filepath)
+        try:
+            yield wb
+        finally:
+            wb.close()
+
+    def open(self) -> None:
+        # e.g. sheet scoped defined names are not supported in read-only mode
+        with self.workbook():
+            pass
+
+    def sheets(self) -> List[str | int]:
+        with self.workbook() as wb:
+            return wb.sheetnames
+
+    def rows(self, sheet: str | int) -> Iterator[Sequence[Any]]:
+        with self.workbook() as wb:
+            yield from worksheet(wb, sheet).iter_rows(values_only=True)
+
+    def read(
+        self, sheet: str | int, sheet_reader_params: SheetReaderParams
+    ) -> DataFrame:
+        return set_index_col(
+            parse_rows(self.rows(sheet), sheet_reader_params), sheet_reader_params
+        )
+
+    def iter_chunks(
+        self, sheet: str | int, sheet_reader_params: SheetReaderParams, chunksize: int
+    ) -> Iterator[DataFrame]:
+        yield from parse_row_chunks(self.rows(sheet), sheet_reader_params, chunksize)
+
+    def preview(
+        self,
+        sheet: str | int,
+        sheet_reader_params: SheetReaderParams,
+        head_rows: int,
+        tail_rows: int,
+    ) -> Optional[SheetPreview]:
+        with self.workbook() as wb:
+            ws = worksheet(wb, sheet)
+
+            def read_rows(min_row: int, max_row: int) -> List[Sequence[Any]]:
+                return list(
+                    ws.iter_rows(min_row=min_row, max_row=max_row, values_only=True)
+                )
+
+            return preview_rows(
+                read_rows,
+                last_filled_row(ws),
+                sheet_reader_params,
+                head_rows,
+                tail_rows,
+            )
+
+
+@register_reader
+class CalamineReader(SheetReader):
+    """
+    Reads with the rust based calamine library, by far the fastest reader,
+    but every sheet is loaded into memory as a whole.
+    """
+
+    name = READER_CALAMINE
+    label = "calamine"
+    suffixes = ("xlsx", "xlsm", "xls", "ods", "odf")
+
+    def __init__(self, filepath: Path):
+        super().__init__(filepath)
+        self._workbook: Any = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return find_spec("python_calamine") is not None
+
+    def open(self) -> None:
+        from python_calamine import CalamineWorkbook
+
+        self._workbook = CalamineWorkbook.from_path(str(self.filepath))
+
+    def sheets(self) -> List[str | int]:
+        return list(self._workbook.sheet_names)
+
+    def rows(self, sheet: str | int) -> List[List[Any]]:
+        calamine_sheet = (
+            self._workbook.get_sheet_by_name(sheet)
+            if isinstance(sheet, str)
+            else self._workbook.get_sheet_by_index(sheet)
+        )
+        # keep the leading empty rows and columns, the parameters are based on
+        # the position in the sheet
+        return calamine_sheet.to_python(skip_empty_area=False)
+
+    def read(
+        self, sheet: str | int, sheet_reader_params: SheetReaderParams
+    ) -> DataFrame:
+        return set_index_col(
+            parse_rows(self.rows(sheet), sheet_reader_params), sheet_reader_params
+        )
+
+    def iter_chunks(
+        self, sheet: str | int, sheet_reader_params: SheetReaderParams, chunksize: int
+    ) -> Iterator[DataFrame]:
+        yield from parse_row_chunks(self.rows(sheet), sheet_reader_params, chunksize)
+
+    def preview(
+        self,
+        sheet: str | int,
+        sheet_reader_params: SheetReaderParams,
+        head_rows: int,
+        tail_rows: int,
+    ) -> Optional[SheetPreview]:
+        rows = self.rows(sheet)
+        last_row = len(rows)
+        while last_row and all(v is None or v == "" for v in rows[last_row - 1]):
+            last_row -= 1
+        return preview_rows(
+            lambda min_row, max_row: rows[min_row - 1 : max_row],
+            last_row,
+            sheet_reader_params,
+            head_rows,
+            tail_rows,
+        )
+
+
+@dataclass(frozen=True)
+class ReaderRule:
+    suffix: str
+    min_bytes: int
+    readers: Tuple[str, ...]
+
+
+# Defaults from reading one sheet with 10 columns of mixed types, seconds:
+#
+#   rows / file           openpyxl  openpyxl (read-only)  calamine  odfpy
+#   1k xlsx, 64 KB            0.20                  0.18      0.01
+#   20k xlsx, 1.2 MB          4.84                  4.53      0.32
+#   200k xlsx, 12 MB         42.85                 44.07      2.53
+#   20k ods, 1.1 MB                                                 17.50
+#
+# calamine wins everywhere but holds the whole sheet in memory, so huge
+# workbooks are streamed with openpyxl in read-only mode. The next reader of
+# a rule is taken, if a reader is not installed or can't open the file.
+HUGE_WORKBOOK_BYTES: Final[int] = 256 * 1024 * 1024
+
+DEFAULT_READER_RULES: Final[Tuple[ReaderRule, ...]] = (
+    ReaderRule(
+        "xlsx", HUGE_WORKBOOK_BYTES, (READER_OPENPYXL_READ_ONLY, READER_OPENPYXL)
+    ),
+    ReaderRule(
+        "xlsx", 0, (READER_CALAMINE, READER_OPENPYXL_READ_ONLY, READER_OPENPYXL)
+    ),
+    ReaderRule(
+        "xlsm", HUGE_WORKBOOK_BYTES, (READER_OPENPYXL_READ_ONLY, READER_OPENPYXL)
+    ),
+    ReaderRule(
+        "xlsm", 0, (READER_CALAMINE, READER_OPENPYXL_READ_ONLY, READER_OPENPYXL)
+    ),
+    ReaderRule("xls", 0, (READER_CALAMINE, READER_XLRD)),
+    ReaderRule("ods", 0, (READER_CALAMINE, READER_ODF)),
+    ReaderRule("odf", 0, (READER_CALAMINE, READER_ODF)),
+)
+
+
+def reader_candidates(filepath: Path, override: str = "") -> List[Type[SheetReader]]:
+    """Readers for the file in order of preference, override comes first."""
+    suffix = filepath.suffix.lower().lstrip(".")
+    size = filepath.stat().st_size
+    names: List[str] = [override] if override else []
+    for rule in DEFAULT_READER_RULES:
+        if rule.suffix == suffix and size >= rule.min_bytes:
+            names.extend(rule.readers)
+            break
+
+    candidates: List[Type[SheetReader]] = []
+    for name in names:
+        reader = READERS.get(name)
+        if (
+            reader
+            and reader not in candidates
+            and suffix in reader.suffixes
+            and reader.is_available()
+        ):
+            candidates.append(reader)
+    return candidates
+
+
+def open_reader(filepath: Path, override: str = "") -> SheetReader:
+    for reader_class in reader_candidates(filepath, override):
+        reader = reader_class(filepath)
+        # noinspection PyBroadException
+        try:
+            reader.open()
+        except Exception as e:
+            logger.info("Reader %s can't open %s: %s", reader_class.name, filepath, e)
+            continue
+        return reader
+    raise ValueError(f"No reader available for {filepath.name}")
+
+
+def reader_choices() -> List[Tuple[str, str]]:
+    return [(name, reader.label) for name, reader in READERS.items()]
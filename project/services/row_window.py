@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+from typing import Any, Final, List, Optional, Sequence, Tuple
+
+from project.models import TransformationHeadline
+
+DEFAULT_ROW_WINDOW_LIMIT: Final[int] = 100
+MAX_ROW_WINDOW_LIMIT: Final[int] = 1000
+
+
+@dataclass
+class RowWindow:
+    offset: int
+    limit: int
+    total_rows: int
+    columns: List[str]
+    # primary key and the values of the columns of each row
+    rows: List[Tuple[Any, List[Any]]]
+
+    @property
+    def end(self) -> int:
+        """The offset after the last row of the window."""
+        return self.offset + len(self.rows)
+
+    @property
+    def previous_offset(self) -> Optional[int]:
+        if self.offset <= 0:
+            return None
+        return max(self.offset - self.limit, 0)
+
+    @property
+    def next_offset(self) -> Optional[int]:
+        if self.offset + self.limit >= self.total_rows:
+            return None
+        return self.offset + self.limit
+
+
+def row_window(
+    headline: TransformationHeadline,
+    offset: int = 0,
+    limit: int = DEFAULT_ROW_WINDOW_LIMIT,
+    columns: Optional[Sequence[str]] = None,
+) -> RowWindow:
+    """
+    The rows offset to offset + limit of the imported rows of headline,
+    restricted to the given columns. Only the row batches overlapping the
+    window are loaded, the counts of the others tell where the window starts.
+    """
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), MAX_ROW_WINDOW_LIMIT)
+    names = list(headline.columns.filter(exclude=False).values_list("name", flat=True))
+    if columns is not None:
+        # unknown columns are dropped
+        names = [name for name in columns if name in names]
+
+    batch_pks: List[int] = []
+    first_row: Optional[int] = None
+    total_rows = 0
+    for pk, row_count in headline.row_batches.order_by("index").values_list(
+        "pk", "row_count"
+    ):
+        if total_rows + row_count > offset and total_rows < offset + limit:
+            if first_row is None:
+                first_row = total_rows
+            batch_pks.append(pk)
+        total_rows += row_count
+
+    rows: List[Tuple[Any, List[Any]]] = []
+    if batch_pks:
+        records: List[Any] = []
+        for batch_rows in (
+            headline.row_batches.filter(pk__in=batch_pks)
+            .order_by("index")
+            .values_list("rows", flat=True)
+        ):
+            records.extend(batch_rows)
+        start = offset - (first_row or 0)
+        for record in records[start : start + limit]:
+            fields = record["fields"]
+            rows.append((record["pk"], [fields.get(name) for name in names]))
+    return RowWindow(offset, limit, total_rows, names, rows)
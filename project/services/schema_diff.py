@@ -0,0 +1,240 @@
+from dataclasses import dataclass, field as dataclass_field
+from difflib import SequenceMatcher
+from typing import Any, Dict, Final, List, Optional, Tuple
+
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from project.models import ColumnProfile, Field, Model, TransformationColumn
+from project.services.column_profile import propose_field
+from project.services.column_statistics import ColumnStatistics
+from project.services.import_field import ImportField
+
+# how similar the name of a new column has to be to the one of a missing
+# column to be taken as renamed, less similar at the same position
+RENAME_SIMILARITY: Final[float] = 0.6
+RENAME_SIMILARITY_AT_POSITION: Final[float] = 0.4
+
+
+@dataclass
+class ProposedColumn:
+    index: int
+    name: str
+    statistics: ColumnStatistics
+    import_field: ImportField
+
+
+@dataclass
+class FieldChange:
+    field: Field
+    column: ProposedColumn
+    renamed: bool
+    type_changed: bool
+
+
+@dataclass
+class SchemaDiff:
+    added: List[ProposedColumn] = dataclass_field(default_factory=list)
+    removed: List[Field] = dataclass_field(default_factory=list)
+    # all fields still having a column, changed or not
+    matched: List[FieldChange] = dataclass_field(default_factory=list)
+
+    @property
+    def renamed(self) -> List[FieldChange]:
+        return [change for change in self.matched if change.renamed]
+
+    @property
+    def type_changed(self) -> List[FieldChange]:
+        return [change for change in self.matched if change.type_changed]
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.renamed or self.type_changed)
+
+    def summary(self) -> List[str]:
+        """A line per kind of change, for the user to review."""
+        lines = []
+        if self.added:
+            lines.append(
+                _("added: %(columns)s")
+                % {"columns": ", ".join(column.name for column in self.added)}
+            )
+        if self.removed:
+            lines.append(
+                _("removed: %(columns)s")
+                % {"columns": ", ".join(field.name for field in self.removed)}
+            )
+        if self.renamed:
+            lines.append(
+                _("renamed: %(columns)s")
+                % {
+                    "columns": ", ".join(
+                        f"{change.field.transformation_column.name} → "
+                        f"{change.column.name}"
+                        for change in self.renamed
+                    )
+                }
+            )
+        if self.type_changed:
+            lines.append(
+                _("type changed: %(columns)s")
+                % {
+                    "columns": ", ".join(
+                        f"{change.column.name} "
+                        f"({datatype_label(change.field.datatype)} → "
+                        f"{datatype_label(change.column.import_field.field_type)})"
+                        for change in self.type_changed
+                    )
+                }
+            )
+        return lines
+
+
+def datatype_label(datatype: Optional[int]) -> str:
+    return str(Field.DATATYPE_LABEL_BY_VALUE.get(datatype, datatype))
+
+
+def name_similarity(name: str, other: str) -> float:
+    return SequenceMatcher(None, name.casefold(), other.casefold()).ratio()
+
+
+def proposal_values(import_field: ImportField) -> Dict[str, Any]:
+    """The proposed attributes of a field, choices as stored in JSON."""
+    values = import_field.field_values()
+    if values[ImportField.CHOICES]:
+        values[ImportField.CHOICES] = {
+            str(k): v for k, v in values[ImportField.CHOICES].items()
+        }
+    return values
+
+
+def is_type_changed(field: Field, column: ProposedColumn) -> bool:
+    """
+    Whether the proposal of the column differs from the one the field was
+    created from, so edits of the field are not taken as changes.
+    """
+    try:
+        previous = proposal_values(propose_field(field.transformation_column))
+    except ColumnProfile.DoesNotExist:
+        # imported before profiles were kept
+        return field.datatype != column.import_field.field_type
+    return previous != proposal_values(column.import_field)
+
+
+def match_columns(
+    fields: List[Field], columns: List[ProposedColumn]
+) -> List[Tuple[Field, ProposedColumn]]:
+    """
+    Pair the fields with the new columns, by the name of their column first.
+    The remaining ones are paired by the similarity of the names, so only the
+    added and removed columns are compared with each other.
+    """
+    unmatched_fields: Dict[int, Field] = {field.pk: field for field in fields}
+    unmatched_columns: Dict[int, ProposedColumn] = {
+        column.index: column for column in columns
+    }
+    pairs: List[Tuple[Field, ProposedColumn]] = []
+
+    def pair(field: Field, column: ProposedColumn) -> None:
+        del unmatched_fields[field.pk]
+        del unmatched_columns[column.index]
+        pairs.append((field, column))
+
+    field_by_name = {field.transformation_column.name: field for field in fields}
+    for column in columns:
+        field = field_by_name.get(column.name)
+        if field is not None and field.pk in unmatched_fields:
+            pair(field, column)
+
+    candidates: List[Tuple[float, int, int]] = []
+    for field in unmatched_fields.values():
+        column_name = field.transformation_column.name
+        column_index = field.transformation_column.column_index
+        for column in unmatched_columns.values():
+            similarity = name_similarity(column_name, column.name)
+            if similarity >= (
+                RENAME_SIMILARITY_AT_POSITION
+                if column.index == column_index
+                else RENAME_SIMILARITY
+            ):
+                candidates.append((similarity, field.pk, column.index))
+    candidates.sort(reverse=True)
+    for similarity, field_pk, column_index in candidates:
+        if field_pk in unmatched_fields and column_index in unmatched_columns:
+            pair(unmatched_fields[field_pk], unmatched_columns[column_index])
+    return pairs
+
+
+def diff_schema(fields: List[Field], columns: List[ProposedColumn]) -> SchemaDiff:
+    """
+    The changes between the fields of a model, which have a column, and the
+    columns of a new import of its sheet.
+    """
+    diff = SchemaDiff()
+    matched_fields = set()
+    matched_columns = set()
+    for field, column in match_columns(fields, columns):
+        matched_fields.add(field.pk)
+        matched_columns.add(column.index)
+        diff.matched.append(
+            FieldChange(
+                field,
+                column,
+                renamed=field.transformation_column.name != column.name,
+                type_changed=is_type_changed(field, column),
+            )
+        )
+    diff.added = [column for column in columns if column.index not in matched_columns]
+    diff.removed = [field for field in fields if field.pk not in matched_fields]
+    return diff
+
+
+def apply_schema_diff(
+    diff: SchemaDiff, model: Model, columns: Dict[str, TransformationColumn]
+) -> None:
+    """
+    Write the changes of diff to the fields of model, which get linked to the
+    columns of the new import by name. Fields are only written if they
+    change, renamed ones keep names given by the user.
+    """
+    update_fields = {"transformation_column", "updated_at"}
+    changed: List[Field] = []
+    now = timezone.now()
+    for change in diff.matched:
+        field = change.field
+        column = columns[change.column.name]
+        if not (
+            change.renamed
+            or change.type_changed
+            or field.transformation_column_id != column.pk
+        ):
+            continue
+        if change.renamed and field.name == field.transformation_column.name:
+            field.name = change.column.name
+            update_fields.add("name")
+        if change.type_changed:
+            values = change.column.import_field.field_values()
+            for name, value in values.items():
+                setattr(field, name, value)
+            update_fields.update(values)
+        field.transformation_column = column
+        field.updated_at = now
+        changed.append(field)
+    if changed:
+        Field.objects.bulk_update(changed, sorted(update_fields))
+
+    if diff.removed:
+        Field.objects.filter(pk__in=[field.pk for field in diff.removed]).delete()
+
+    next_index = (model.fields.aggregate(Max("index"))["index__max"] or 0) + 1
+    Field.objects.bulk_create(
+        Field(
+            model=model,
+            index=next_index + i,
+            name=column.name,
+            transformation_column=columns[column.name],
+            **column.import_field.field_values(),
+        )
+        for i, column in enumerate(diff.added)
+    )
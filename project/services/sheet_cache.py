@@ -0,0 +1,231 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Final, Hashable, Optional, Tuple
+
+from django.conf import settings
+from django.db.models.signals import post_delete, pre_save
+from pandas import DataFrame
+
+from project.models import TransformationFile
+from project.services.importer import (
+    Importer,
+    SheetReaderParams,
+    READ_PARAM_HEADER,
+    READ_PARAM_INDEX_COL,
+    READ_PARAM_NROWS,
+    READ_PARAM_SKIPFOOTER,
+    READ_PARAM_SKIPROWS,
+    READ_PARAM_USECOLS,
+    convert_param,
+)
+from project.services.sheet_sidecar import remove_sidecar
+
+# only these parameters change the parsed result, head_rows, tail_rows and
+# timezone are pure display settings and must not split the cache
+PARSE_PARAMS: Final[Tuple[str, ...]] = (
+    READ_PARAM_HEADER,
+    READ_PARAM_USECOLS,
+    READ_PARAM_INDEX_COL,
+    READ_PARAM_SKIPROWS,
+    READ_PARAM_NROWS,
+    READ_PARAM_SKIPFOOTER,
+)
+
+HASH_BLOCK_SIZE: Final[int] = 1024 * 1024
+DEFAULT_SHEET_CACHE_MAX_BYTES: Final[int] = 256 * 1024 * 1024
+DEFAULT_SHEET_CACHE_MAX_ENTRIES: Final[int] = 64
+
+CacheKey = Tuple[str, str | int, str, Tuple[Tuple[str, Hashable], ...]]
+
+
+def _hashable(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+
+def normalize_params(params: SheetReaderParams) -> Tuple[Tuple[str, Hashable], ...]:
+    normalized = []
+    for param in PARSE_PARAMS:
+        value = params.get(param)
+        if param == READ_PARAM_SKIPFOOTER:
+            value = convert_param(param, value)
+        normalized.append((param, _hashable(value)))
+    return tuple(normalized)
+
+
+def dataframe_size(df: DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class SheetCache:
+    """
+    Size bounded LRU cache of parsed sheets.
+
+    Entries are keyed by the content hash of the file, the sheet and the
+    parameters relevant for parsing, so a replaced file can never be served
+    from a stale entry. Invalidation only frees the memory early.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[CacheKey, Tuple[DataFrame, int]] = OrderedDict()
+        self._size = 0
+        # digest memo: path -> (size, mtime_ns, digest)
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+
+    @staticmethod
+    def max_bytes() -> int:
+        return getattr(
+            settings, "IMPORT_SHEET_CACHE_MAX_BYTES", DEFAULT_SHEET_CACHE_MAX_BYTES
+        )
+
+    @staticmethod
+    def max_entries() -> int:
+        return getattr(
+            settings, "IMPORT_SHEET_CACHE_MAX_ENTRIES", DEFAULT_SHEET_CACHE_MAX_ENTRIES
+        )
+
+    def file_digest(self, path: Path) -> str:
+        stat = path.stat()
+        key = str(path)
+        with self._lock:
+            memo = self._digests.get(key)
+        if memo and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            return memo[2]
+
+        sha = hashlib.sha256()
+        with path.open("rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with self._lock:
+            self._digests[key] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def key(
+        self,
+        path: Path,
+        sheet: str | int,
+        params: SheetReaderParams,
+        reader: str = "",
+    ) -> CacheKey:
+        return self.file_digest(path), sheet, reader, normalize_params(params)
+
+    def get(self, key: CacheKey) -> Optional[DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        # a shallow copy protects the cached frame against renamed columns
+        # or dropped rows of the consumer
+        return entry[0].copy(deep=False)
+
+    def put(self, key: CacheKey, df: DataFrame) -> None:
+        size = dataframe_size(df)
+        max_bytes = self.max_bytes()
+        if size > max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._size -= old[1]
+            self._entries[key] = (df, size)
+            self._size += size
+            while self._entries and (
+                self._size > max_bytes or len(self._entries) > self.max_entries()
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def invalidate_path(self, path: Path | str) -> None:
+        with self._lock:
+            memo = self._digests.pop(str(path), None)
+            if not memo:
+                return
+            digest = memo[2]
+            for key in [k for k in self._entries if k[0] == digest]:
+                self._size -= self._entries.pop(key)[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+sheet_cache = SheetCache()
+
+
+def cached_sheet(
+    importer: Importer, sheet: str | int, sheet_reader_params: SheetReaderParams
+) -> Optional[DataFrame]:
+    key = sheet_cache.key(
+        importer.filepath, sheet, sheet_reader_params, importer.reader_key
+    )
+    return sheet_cache.get(key)
+
+
+def cache_sheet(
+    importer: Importer,
+    sheet: str | int,
+    sheet_reader_params: SheetReaderParams,
+    df: DataFrame,
+) -> DataFrame:
+    """Cache a sheet parsed elsewhere, returns a copy for the caller."""
+    key = sheet_cache.key(
+        importer.filepath, sheet, sheet_reader_params, importer.reader_key
+    )
+    sheet_cache.put(key, df)
+    return df.copy(deep=False)
+
+
+def read_sheet(
+    importer: Importer, sheet: str | int, sheet_reader_params: SheetReaderParams
+) -> DataFrame:
+    df = cached_sheet(importer, sheet, sheet_reader_params)
+    if df is None:
+        df = importer.run(sheet=sheet, sheet_reader_params=sheet_reader_params)
+        df = cache_sheet(importer, sheet, sheet_reader_params, df)
+    return df
+
+
+# noinspection PyUnusedLocal
+def sheet_cache_cleanup(sender, instance: TransformationFile, **kwargs):
+    if instance.file and hasattr(instance.file, "path"):
+        sheet_cache.invalidate_path(instance.file.path)
+        # the sidecar goes with the file, unless another file still uses it
+        # like in file_cleanup
+        if not TransformationFile.objects.filter(file=instance.file.name).exists():
+            remove_sidecar(Path(instance.file.path))
+
+
+# noinspection PyUnusedLocal
+def sheet_cache_cleanup_on_replace(sender, instance: TransformationFile, **kwargs):
+    if not instance.pk:
+        return
+    old = TransformationFile.objects.filter(pk=instance.pk).first()
+    if old and old.file and old.file.name != instance.file.name:
+        sheet_cache.invalidate_path(old.file.path)
+
+
+post_delete.connect(
+    sheet_cache_cleanup,
+    sender=TransformationFile,
+    dispatch_uid="transformation_file.sheet_cache_cleanup",
+)
+pre_save.connect(
+    sheet_cache_cleanup_on_replace,
+    sender=TransformationFile,
+    dispatch_uid="transformation_file.sheet_cache_cleanup_on_replace",
+)
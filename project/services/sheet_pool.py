@@ -0,0 +1,125 @@
+import logging
+import math
+import multiprocessing
+import signal
+import time
+from contextlib import contextmanager
+from multiprocessing.pool import AsyncResult
+from pathlib import Path
+from typing import Dict, Final, Iterator, Optional
+
+from pandas import DataFrame
+
+from project.services.importer import Importer, SheetReaderParams
+
+logger = logging.getLogger(__name__)
+
+# workers are forked, spawned workers would have to set up django first
+POOL_START_METHOD: Final[str] = "fork"
+# waiting time of the request for a worker stuck in code, which can't be
+# interrupted by the timer of the worker itself
+POOL_TIMEOUT_GRACE_SECONDS: Final[int] = 5
+
+
+class SheetParseTimeout(Exception):
+    # the arguments are kept in args, so the exception can be pickled back
+    # from the worker
+    def __init__(self, sheet: str | int, seconds: int):
+        super().__init__(sheet, seconds)
+        self.sheet = sheet
+        self.seconds = seconds
+
+    def __str__(self):
+        return f"Parsing sheet {self.sheet} took longer than {self.seconds} seconds"
+
+
+def is_available() -> bool:
+    return POOL_START_METHOD in multiprocessing.get_all_start_methods()
+
+
+@contextmanager
+def sheet_time_limit(sheet: str | int, seconds: int) -> Iterator[None]:
+    """Raise SheetParseTimeout in the main thread after seconds."""
+    if not seconds or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    # noinspection PyUnusedLocal
+    def on_timeout(signum, frame):
+        raise SheetParseTimeout(sheet, seconds)
+
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def parse_sheet(
+    filepath: Path,
+    csv_engine: str,
+    reader: str,
+    sidecar: Optional[Path],
+    sheet: str | int,
+    sheet_reader_params: SheetReaderParams,
+    timeout: int,
+) -> DataFrame:
+    """Runs in a worker process, so it only gets picklable arguments."""
+    importer = Importer(filepath, csv_engine=csv_engine, reader=reader, sidecar=sidecar)
+    with sheet_time_limit(sheet, timeout):
+        return importer.run(sheet, sheet_reader_params)
+
+
+def parse_sheets(
+    importer: Importer,
+    params_by_sheet: Dict[str | int, SheetReaderParams],
+    workers: int,
+    timeout: int,
+) -> Dict[str | int, DataFrame | Exception]:
+    """
+    Parse the sheets of a workbook concurrently in up to workers processes.
+
+    A sheet which can't be parsed within timeout seconds gets a
+    SheetParseTimeout instead of its frame, as does a sheet failing with a
+    ValueError. Stuck workers are terminated when all sheets are done.
+    """
+    workers = max(min(workers, len(params_by_sheet)), 1)
+    context = multiprocessing.get_context(POOL_START_METHOD)
+    result: Dict[str | int, DataFrame | Exception] = {}
+    with context.Pool(processes=workers) as pool:
+        pending: Dict[str | int, AsyncResult] = {
+            sheet: pool.apply_async(
+                parse_sheet,
+                (
+                    importer.filepath,
+                    importer.csv_engine,
+                    importer.reader_name,
+                    importer.sidecar,
+                    sheet,
+                    params,
+                    timeout,
+                ),
+            )
+            for sheet, params in params_by_sheet.items()
+        }
+        # every worker parses its share of the sheets one after another
+        deadline = time.monotonic() + POOL_TIMEOUT_GRACE_SECONDS
+        if timeout:
+            deadline += timeout * math.ceil(len(params_by_sheet) / workers)
+        for sheet, async_result in pending.items():
+            remaining = max(deadline - time.monotonic(), 0) if timeout else None
+            try:
+                result[sheet] = async_result.get(remaining)
+            except multiprocessing.TimeoutError:
+                logger.info(
+                    "Parsing sheet %s of %s timed out", sheet, importer.filepath
+                )
+                result[sheet] = SheetParseTimeout(sheet, timeout)
+            except (SheetParseTimeout, ValueError) as e:
+                logger.info(
+                    "Parsing sheet %s of %s failed: %s", sheet, importer.filepath, e
+                )
+                result[sheet] = e
+    return result
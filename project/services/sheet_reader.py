@@ -0,0 +1,346 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+
+import pandas as pd
+from openpyxl.utils import column_index_from_string
+from pandas import DataFrame
+from pandas.io.parsers import TextParser
+
+READ_PARAM_HEADER = "header"
+READ_PARAM_INDEX_COL = "index_col"
+READ_PARAM_NROWS = "nrows"
+READ_PARAM_SKIPFOOTER = "skipfooter"
+READ_PARAM_SKIPROWS = "skiprows"
+READ_PARAM_USECOLS = "usecols"
+TIMEZONE_PARAM = "timezone"
+
+TABLE_PARAM_HEAD_ROWS = "head_rows"
+TABLE_PARAM_TAIL_ROWS = "tail_rows"
+DEFAULT_HEAD_TAIL_ROWS = 5
+DEFAULT_TIMEZONE = "Europe/Berlin"
+
+
+def convert_param(param: str, value: Optional[Any]) -> int | str | None:
+    if param == READ_PARAM_HEADER:
+        return int(value) if value else 0
+    elif param == READ_PARAM_USECOLS:
+        return str(value) if value and value != "" else None
+    elif param == READ_PARAM_SKIPROWS:
+        return int(value) if value else None
+    elif param == READ_PARAM_NROWS:
+        return int(value) if value else None
+    elif param == READ_PARAM_SKIPFOOTER:
+        return int(value) if value else 0
+    elif param == TABLE_PARAM_HEAD_ROWS:
+        return int(value) if value else DEFAULT_HEAD_TAIL_ROWS
+    elif param == TABLE_PARAM_TAIL_ROWS:
+        return int(value) if value else DEFAULT_HEAD_TAIL_ROWS
+
+    return None
+
+
+class SheetReaderParams(dict):
+    def __init__(
+        self,
+        header: int | Sequence[int] | None = 0,
+        usecols: int
+        | str
+        | Sequence[int]
+        | Sequence[str]
+        | Callable[[str], bool]
+        | None = None,
+        index_col: int | Sequence[int] | None = None,
+        skiprows: Sequence[int] | int | Callable[[int], object] | None = None,
+        nrows: int | None = None,
+        skipfooter: int = 0,
+        head_rows: int = DEFAULT_HEAD_TAIL_ROWS,
+        tail_rows: int = DEFAULT_HEAD_TAIL_ROWS,
+        timezone: str = DEFAULT_TIMEZONE,
+    ):
+        dict.__init__(
+            self,
+            header=header,
+            usecols=usecols,
+            index_col=index_col,
+            skiprows=skiprows,
+            nrows=nrows,
+            skipfooter=skipfooter,
+            head_rows=head_rows,
+            tail_rows=tail_rows,
+            timezone=timezone,
+        )
+
+
+# rows parsed at once when a complete sheet is read row by row
+PARSE_ROWS_CHUNK_SIZE: Final[int] = 100_000
+
+
+def trim_footer(df: DataFrame, skipfooter: int, nrows: int | None) -> DataFrame:
+    if skipfooter:
+        df = df.iloc[: max(len(df) - skipfooter, 0)]
+    if nrows is not None:
+        df = df.iloc[:nrows]
+    return df
+
+
+def limit_chunks(
+    chunks: Iterable[DataFrame], skipfooter: int, nrows: int | None
+) -> Iterator[DataFrame]:
+    """
+    Streaming counterpart of trim_footer, the last skipfooter rows are held
+    back until the next chunk arrives. At least one, maybe empty, chunk is
+    returned to keep the columns.
+    """
+    carry: DataFrame | None = None
+    empty: DataFrame | None = None
+    remaining = nrows
+    for chunk in chunks:
+        if skipfooter:
+            if carry is not None:
+                chunk = pd.concat([carry, chunk])
+            carry = chunk.iloc[max(len(chunk) - skipfooter, 0) :]
+            chunk = chunk.iloc[: max(len(chunk) - skipfooter, 0)]
+        if remaining is not None:
+            chunk = chunk.iloc[:remaining]
+            remaining -= len(chunk)
+        if len(chunk):
+            empty = None
+            yield chunk
+        elif empty is None:
+            empty = chunk
+        if remaining == 0:
+            return
+    if empty is not None:
+        yield empty
+
+
+def without_trailing_blank_rows(
+    rows: Iterable[Sequence[Any]],
+) -> Iterator[Sequence[Any]]:
+    # like the excel reader of pandas, blank rows are only kept in between
+    blank: List[Sequence[Any]] = []
+    for row in rows:
+        if all(v is None or v == "" for v in row):
+            blank.append(row)
+            continue
+        yield from blank
+        blank = []
+        yield row
+
+
+@dataclass
+class SheetPreview:
+    head: DataFrame
+    tail: DataFrame
+    total_rows: int
+
+    @staticmethod
+    def of_dataframe(df: DataFrame, head_rows: int, tail_rows: int) -> "SheetPreview":
+        return SheetPreview(df.head(head_rows), df.tail(tail_rows), len(df))
+
+
+def usecols_to_indices(usecols: str | Sequence[int] | None) -> List[int] | None:
+    """Convert an excel column selection like 'A:C,E' to 0-based indices."""
+    if usecols is None:
+        return None
+    if not isinstance(usecols, str):
+        if all(isinstance(c, int) for c in usecols):
+            return list(usecols)
+        raise ValueError(f"Unsupported column selection: {usecols}")
+    indices: List[int] = []
+    for part in usecols.replace(" ", "").split(","):
+        if not part:
+            continue
+        if ":" in part:
+            first, last = part.split(":")
+            indices.extend(
+                range(
+                    column_index_from_string(first) - 1,
+                    column_index_from_string(last),
+                )
+            )
+        else:
+            indices.append(column_index_from_string(part) - 1)
+    return indices
+
+
+def convert_cell(value: Any) -> Any:
+    # same conversion as the openpyxl reader of pandas
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        # calamine returns plain dates, openpyxl always datetimes
+        return datetime.combine(value, time())
+    return value
+
+
+def convert_rows(
+    rows: Sequence[Sequence[Any]],
+    usecols: List[int] | None,
+    width: int | None = None,
+    first_row: int = 1,
+) -> List[List[Any]]:
+    """
+    The converted cells of the rows, padded or cut to width. Cells beyond a
+    given width raise a ValueError if they are selected, as they would get
+    lost; first_row is the number of the first of the rows in the sheet.
+    """
+    converted = []
+    for number, row in enumerate(rows, first_row):
+        values = [convert_cell(v) for v in row]
+        while values and values[-1] == "":
+            values.pop()
+        if (
+            width is not None
+            and len(values) > width
+            and (usecols is None or any(width <= i < len(values) for i in usecols))
+        ):
+            raise ValueError(
+                f"Row {number} has {len(values)} cells, "
+                f"the rows before have at most {width}"
+            )
+        converted.append(values)
+    if width is None:
+        width = max((len(row) for row in converted), default=0)
+    converted = [row[:width] + [""] * (width - len(row)) for row in converted]
+    if usecols is not None:
+        converted = [[row[i] for i in usecols if i < width] for row in converted]
+    return converted
+
+
+def parse_row_chunks(
+    rows: Iterable[Sequence[Any]],
+    sheet_reader_params: SheetReaderParams,
+    chunksize: int,
+) -> Iterator[DataFrame]:
+    """
+    Parse the cell values of a sheet, starting with its first row, in chunks
+    of chunksize rows like pandas parses a whole excel sheet.
+    """
+    header: int | None = sheet_reader_params.get(READ_PARAM_HEADER)
+    skiprows: int = sheet_reader_params.get(READ_PARAM_SKIPROWS) or 0
+    skipfooter: int = convert_param(
+        READ_PARAM_SKIPFOOTER,
+        sheet_reader_params.get(READ_PARAM_SKIPFOOTER),
+    )  # type: ignore
+    nrows: int | None = sheet_reader_params.get(READ_PARAM_NROWS)
+    usecols = usecols_to_indices(sheet_reader_params.get(READ_PARAM_USECOLS))
+    header_lines = 0 if header is None else header + 1
+
+    row_iterator = without_trailing_blank_rows(islice(rows, skiprows, None))
+
+    def chunks() -> Iterator[DataFrame]:
+        first_rows = convert_rows(
+            list(islice(row_iterator, header_lines + chunksize)), None
+        )
+        # the full parse pads all rows to the widest row of the sheet, the
+        # stream can only take the first chunk into account and fails on
+        # wider rows later on
+        width = max((len(row) for row in first_rows), default=0)
+        first = TextParser(
+            first_rows,
+            header=header,
+            usecols=usecols,
+            dtype=object,
+            skip_blank_lines=False,
+        ).read()
+        yield first
+        offset = len(first)
+        while batch := list(islice(row_iterator, chunksize)):
+            chunk = TextParser(
+                convert_rows(
+                    batch, usecols, width, skiprows + header_lines + offset + 1
+                ),
+                header=None,
+                names=list(first.columns),
+                dtype=object,
+                skip_blank_lines=False,
+            ).read()
+            chunk.index = range(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+    yield from limit_chunks(chunks(), skipfooter, nrows)
+
+
+def parse_rows(
+    rows: Iterable[Sequence[Any]], sheet_reader_params: SheetReaderParams
+) -> DataFrame:
+    chunks = list(parse_row_chunks(rows, sheet_reader_params, PARSE_ROWS_CHUNK_SIZE))
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks)
+
+
+def preview_rows(
+    read_rows: Callable[[int, int], List[Sequence[Any]]],
+    last_row: int,
+    sheet_reader_params: SheetReaderParams,
+    head_rows: int,
+    tail_rows: int,
+) -> SheetPreview:
+    """
+    Parse only the head and tail window of a sheet.
+
+    read_rows returns the cell values of the 1-based rows min_row to max_row,
+    last_row is the last row with content.
+    """
+    header: int | None = sheet_reader_params.get(READ_PARAM_HEADER)
+    skiprows: int = sheet_reader_params.get(READ_PARAM_SKIPROWS) or 0
+    skipfooter: int = convert_param(
+        READ_PARAM_SKIPFOOTER,
+        sheet_reader_params.get(READ_PARAM_SKIPFOOTER),
+    )  # type: ignore
+    nrows: int | None = sheet_reader_params.get(READ_PARAM_NROWS)
+    usecols = usecols_to_indices(sheet_reader_params.get(READ_PARAM_USECOLS))
+    header_lines = 0 if header is None else header + 1
+    first_data_row = skiprows + header_lines
+
+    data_rows = max(last_row - first_data_row - skipfooter, 0)
+    if nrows is not None:
+        data_rows = min(data_rows, nrows)
+
+    count = min(tail_rows, data_rows)
+    head_rows_raw = convert_rows(
+        read_rows(skiprows + 1, first_data_row + min(head_rows, data_rows)), None
+    )
+    tail_rows_raw = convert_rows(
+        read_rows(first_data_row + data_rows - count + 1, first_data_row + data_rows),
+        None,
+    )
+    # the full parse pads all rows to the widest row of the sheet, the
+    # window can only take its own rows into account
+    width = max(
+        (len(row) for row in head_rows_raw + tail_rows_raw),
+        default=0,
+    )
+    head = TextParser(
+        convert_rows(head_rows_raw, None, width),
+        header=header,
+        usecols=usecols,
+        dtype=object,
+        skip_blank_lines=False,
+    ).read()
+    tail = TextParser(
+        convert_rows(tail_rows_raw, usecols, width),
+        header=None,
+        names=list(head.columns) if header is not None else None,
+        dtype=object,
+        skip_blank_lines=False,
+    ).read()
+    tail.index = range(data_rows - len(tail), data_rows)
+
+    return SheetPreview(head, tail, data_rows)
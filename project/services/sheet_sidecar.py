@@ -0,0 +1,360 @@
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, time, timedelta
+from importlib.util import find_spec
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Final, Iterable, Iterator, List, Sequence
+
+import numpy as np
+from pandas import DataFrame
+
+from project.services.reader_backends import SheetReader, set_index_col
+from project.services.sheet_reader import (
+    SheetPreview,
+    SheetReaderParams,
+    convert_cell,
+    parse_row_chunks,
+    parse_rows,
+    preview_rows,
+    without_trailing_blank_rows,
+)
+
+logger = logging.getLogger(__name__)
+
+# the sidecar directory of an upload is named like the upload plus suffix
+SIDECAR_SUFFIX: Final[str] = ".columns"
+SIDECAR_MANIFEST: Final[str] = "manifest.json"
+SIDECAR_FORMAT_VERSION: Final[int] = 1
+# rows converted to arrow at once while writing a sidecar
+SIDECAR_WRITE_BATCH_ROWS: Final[int] = 50_000
+
+# a column of the sheet is stored as one arrow column per python type of its
+# cells, e.g. "3:s" holds the strings of the fourth column, blank cells are
+# null in all of them
+KIND_SEPARATOR: Final[str] = ":"
+KIND_STR: Final[str] = "s"
+KIND_INT: Final[str] = "i"
+KIND_FLOAT: Final[str] = "f"
+KIND_BOOL: Final[str] = "b"
+KIND_DATETIME: Final[str] = "dt"
+KIND_TIME: Final[str] = "t"
+KIND_TIMEDELTA: Final[str] = "td"
+
+# kinds whose arrow values are converted to python objects one by one
+OBJECT_KINDS: Final[tuple[str, ...]] = (KIND_DATETIME, KIND_TIME, KIND_TIMEDELTA)
+
+
+def is_available() -> bool:
+    return find_spec("pyarrow") is not None
+
+
+def sidecar_dir(filepath: Path) -> Path:
+    return filepath.with_name(filepath.name + SIDECAR_SUFFIX)
+
+
+def remove_sidecar(filepath: Path) -> None:
+    shutil.rmtree(sidecar_dir(filepath), ignore_errors=True)
+
+
+def arrow_type(kind: str) -> Any:
+    import pyarrow as pa
+
+    return {
+        KIND_STR: pa.string(),
+        KIND_INT: pa.int64(),
+        KIND_FLOAT: pa.float64(),
+        KIND_BOOL: pa.bool_(),
+        KIND_DATETIME: pa.timestamp("us"),
+        KIND_TIME: pa.time64("us"),
+        KIND_TIMEDELTA: pa.duration("us"),
+    }[kind]
+
+
+def cell_kind(value: Any) -> str:
+    # bool before int, it is a subclass
+    if isinstance(value, bool):
+        return KIND_BOOL
+    if isinstance(value, int):
+        return KIND_INT
+    if isinstance(value, float):
+        return KIND_FLOAT
+    if isinstance(value, str):
+        return KIND_STR
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            raise ValueError(f"Timezone aware cell value {value} not supported")
+        return KIND_DATETIME
+    if isinstance(value, time):
+        return KIND_TIME
+    if isinstance(value, timedelta):
+        return KIND_TIMEDELTA
+    raise ValueError(f"Cell value of type {type(value).__name__} not supported")
+
+
+def encode_rows(rows: List[Sequence[Any]], width: int) -> Dict[str, Any]:
+    """Arrow arrays by column name of a batch of rows."""
+    import pyarrow as pa
+
+    arrays: Dict[str, Any] = {}
+    for j in range(width):
+        values_by_kind: Dict[str, List[Any]] = {}
+        for i, row in enumerate(rows):
+            value = row[j] if j < len(row) else None
+            if isinstance(value, np.generic):
+                value = value.item()
+            value = convert_cell(value)
+            if isinstance(value, str) and value == "":
+                continue
+            kind = cell_kind(value)
+            values = values_by_kind.get(kind)
+            if values is None:
+                values = values_by_kind[kind] = [None] * len(rows)
+            values[i] = value
+        for kind, values in values_by_kind.items():
+            arrays[f"{j}{KIND_SEPARATOR}{kind}"] = pa.array(
+                values, type=arrow_type(kind)
+            )
+    return arrays
+
+
+def write_sheet(path: Path, rows: Iterable[Sequence[Any]]) -> None:
+    """
+    Write the cells of a sheet as uncompressed arrow ipc file, which can be
+    memory mapped. Trailing blank rows are dropped.
+    """
+    import pyarrow as pa
+
+    tables = []
+    width = 0
+    row_count = 0
+    row_iterator = without_trailing_blank_rows(rows)
+    while batch := list(islice(row_iterator, SIDECAR_WRITE_BATCH_ROWS)):
+        batch_width = max(len(row) for row in batch)
+        width = max(width, batch_width)
+        arrays = encode_rows(batch, batch_width)
+        # an empty table has no rows, the row count is kept by a dummy column
+        arrays[""] = pa.nulls(len(batch))
+        tables.append(pa.table(arrays))
+        row_count += len(batch)
+
+    # later batches may add columns or types, missing ones are all null
+    types: Dict[str, Any] = {}
+    for table in tables:
+        for field in table.schema:
+            types.setdefault(field.name, field.type)
+    table = pa.concat_tables(
+        [
+            pa.table(
+                {
+                    name: table.column(name)
+                    if name in table.column_names
+                    else pa.nulls(table.num_rows, type=arrow_type)
+                    for name, arrow_type in types.items()
+                }
+            )
+            for table in tables
+        ]
+        or [pa.table({"": pa.nulls(0)})]
+    )
+    table = table.replace_schema_metadata({"width": str(width), "rows": str(row_count)})
+
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+class SheetTable:
+    """Memory mapped cells of a sheet written by write_sheet."""
+
+    def __init__(self, path: Path):
+        import pyarrow as pa
+
+        # the buffers of the table point into the mapped file, nothing is
+        # copied until rows are converted
+        self.table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        metadata = self.table.schema.metadata
+        self.width = int(metadata[b"width"])
+        self.row_count = int(metadata[b"rows"])
+
+    def rows(self, start: int, stop: int) -> List[List[Any]]:
+        """The rows start to stop - 1, blank cells are empty strings."""
+        stop = min(stop, self.row_count)
+        count = max(stop - start, 0)
+        grid = np.full((count, self.width), "", dtype=object)
+        if not count:
+            return grid.tolist()
+        for name, column in zip(self.table.column_names, self.table.columns):
+            if not name:
+                continue
+            j, kind = name.split(KIND_SEPARATOR)
+            chunk = column.slice(start, count)
+            if chunk.null_count == len(chunk):
+                continue
+            mask = chunk.is_valid().to_numpy(zero_copy_only=False)
+            if kind in OBJECT_KINDS:
+                values = np.array(chunk.to_pylist(), dtype=object)
+            elif kind == KIND_STR:
+                values = chunk.to_numpy(zero_copy_only=False)
+            else:
+                values = chunk.fill_null(False if kind == KIND_BOOL else 0).to_numpy(
+                    zero_copy_only=False
+                )
+            grid[mask, int(j)] = values[mask]
+        return grid.tolist()
+
+    def iter_rows(self, batch_rows: int = SIDECAR_WRITE_BATCH_ROWS) -> Iterator[Any]:
+        for start in range(0, self.row_count, batch_rows):
+            yield from self.rows(start, start + batch_rows)
+
+
+class SidecarReader(SheetReader):
+    """
+    Serves the sheets of a spreadsheet from arrow files in a sidecar
+    directory. A sheet is converted by the source reader when it is read the
+    first time, later reads only map the arrow file and convert the rows
+    which are actually needed.
+    """
+
+    name = "sidecar"
+    label = "arrow"
+    suffixes = ()
+
+    def __init__(
+        self,
+        filepath: Path,
+        directory: Path,
+        open_source: Callable[[], SheetReader],
+    ):
+        super().__init__(filepath)
+        self.directory = directory
+        self._open_source = open_source
+        self._source: SheetReader | None = None
+        self._manifest: Dict[str, Any] | None = None
+
+    @property
+    def source(self) -> SheetReader:
+        if self._source is None:
+            self._source = self._open_source()
+        return self._source
+
+    def source_stamp(self) -> Dict[str, Any]:
+        stat = self.filepath.stat()
+        return dict(
+            version=SIDECAR_FORMAT_VERSION,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+        )
+
+    def manifest(self) -> Dict[str, Any]:
+        if self._manifest is not None:
+            return self._manifest
+        path = self.directory.joinpath(SIDECAR_MANIFEST)
+        stamp = self.source_stamp()
+        try:
+            manifest = json.loads(path.read_text())
+            if manifest.get("stamp") == stamp:
+                self._manifest = manifest
+                return manifest
+        except (OSError, ValueError):
+            pass
+
+        # missing or written for an older version of the file
+        manifest = dict(stamp=stamp, sheets=self.source.sheets())
+        try:
+            self.replace_directory(manifest)
+        except OSError as e:
+            logger.info("Sidecar of %s can't be written: %s", self.filepath, e)
+        self._manifest = manifest
+        return manifest
+
+    def replace_directory(self, manifest: Dict[str, Any]) -> None:
+        """
+        Replace the sidecar directory by a new one with manifest only. It is
+        written as sibling and renamed into place, so concurrent readers see
+        either the old or the new directory, never a half written one.
+        """
+        new = self.directory.with_name(f"{self.directory.name}.{uuid.uuid4().hex}")
+        stale = new.with_name(f"{new.name}.stale")
+        try:
+            new.mkdir(parents=True)
+            new.joinpath(SIDECAR_MANIFEST).write_text(json.dumps(manifest))
+            try:
+                # a directory can only be renamed onto an empty one
+                os.replace(self.directory, stale)
+            except FileNotFoundError:
+                pass
+            os.replace(new, self.directory)
+        finally:
+            shutil.rmtree(new, ignore_errors=True)
+            shutil.rmtree(stale, ignore_errors=True)
+
+    def sheets(self) -> List[str | int]:
+        return list(self.manifest()["sheets"])
+
+    def sheet_path(self, sheet: str | int) -> Path:
+        index = sheet if isinstance(sheet, int) else self.sheets().index(sheet)
+        return self.directory.joinpath(f"{index}.arrow")
+
+    def table(self, sheet: str | int) -> SheetTable | None:
+        path = self.sheet_path(sheet)
+        # noinspection PyBroadException
+        try:
+            if not path.exists():
+                write_sheet(path, self.source.rows(sheet))
+            return SheetTable(path)
+        except Exception as e:
+            logger.info(
+                "Sidecar of sheet %s of %s not available: %s", sheet, self.filepath, e
+            )
+            return None
+
+    def rows(self, sheet: str | int) -> Iterable[Sequence[Any]]:
+        table = self.table(sheet)
+        if table is None:
+            return self.source.rows(sheet)
+        return table.iter_rows()
+
+    def read(
+        self, sheet: str | int, sheet_reader_params: SheetReaderParams
+    ) -> DataFrame:
+        table = self.table(sheet)
+        if table is None:
+            return self.source.read(sheet, sheet_reader_params)
+        return set_index_col(
+            parse_rows(table.iter_rows(), sheet_reader_params), sheet_reader_params
+        )
+
+    def iter_chunks(
+        self, sheet: str | int, sheet_reader_params: SheetReaderParams, chunksize: int
+    ) -> Iterator[DataFrame]:
+        table = self.table(sheet)
+        if table is None:
+            yield from self.source.iter_chunks(sheet, sheet_reader_params, chunksize)
+            return
+        yield from parse_row_chunks(
+            table.iter_rows(chunksize), sheet_reader_params, chunksize
+        )
+
+    def preview(
+        self,
+        sheet: str | int,
+        sheet_reader_params: SheetReaderParams,
+        head_rows: int,
+        tail_rows: int,
+    ) -> SheetPreview | None:
+        table = self.table(sheet)
+        if table is None:
+            return self.source.preview(sheet, sheet_reader_params, head_rows, tail_rows)
+        return preview_rows(
+            lambda min_row, max_row: table.rows(min_row - 1, max_row),  # type: ignore
+            table.row_count,
+            sheet_reader_params,
+            head_rows,
+            tail_rows,
+        )
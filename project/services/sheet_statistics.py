@@ -0,0 +1,260 @@
+import multiprocessing
+from multiprocessing.pool import Pool
+from typing import Any, Dict, Final, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from pandas import DataFrame, Series
+
+from project.services.column_statistics import ColumnStatistics
+
+# 0 inspects every value, otherwise sheets with more rows are proposed from
+# a reservoir sample of this size plus their head and tail rows
+DEFAULT_IMPORT_SAMPLE_ROWS: Final[int] = 0
+DEFAULT_IMPORT_SAMPLE_HEAD_TAIL_ROWS: Final[int] = 1000
+DEFAULT_IMPORT_SAMPLE_VERIFY: Final[bool] = True
+# None detects duplicates exactly, otherwise distinct values are estimated
+# by a sketch beyond this many values of a column or its first duplicate
+DEFAULT_IMPORT_DISTINCT_SKETCH_AFTER: Final[Optional[int]] = None
+# most frequent values kept for columns with too many distinct values, 0 none
+DEFAULT_IMPORT_PROFILE_TOP_VALUES: Final[int] = 0
+# a fixed seed, so importing the same file again proposes the same fields
+SAMPLE_SEED: Final[int] = 0
+# 1 profiles the columns in the importing thread, more in a process pool
+DEFAULT_IMPORT_PROFILE_WORKERS: Final[int] = 1
+# workers are forked like the ones of the sheet pool
+PROFILE_POOL_START_METHOD: Final[str] = "fork"
+# the columns of a chunk are split into this many tasks per worker, so
+# workers finishing early get more of them
+PROFILE_TASKS_PER_WORKER: Final[int] = 4
+
+
+def profile_columns(
+    chunk: DataFrame, statistics: Dict[Any, ColumnStatistics], distinct: bool
+) -> Dict[Any, ColumnStatistics]:
+    """
+    Runs in a worker process: add the columns of chunk to their statistics.
+    Only the statistics are sent back, which are small compared to the chunk.
+    """
+    for col in chunk.columns:
+        statistics[col].update(chunk[col], distinct=distinct)
+    return statistics
+
+
+class SheetStatistics:
+    """
+    Statistics of all columns of a sheet, fed chunk by chunk.
+
+    With sample_rows the value based statistics (choices, uniqueness) are
+    collected on a sample: a reservoir sample of sample_rows rows of the
+    whole sheet plus its first and last head_tail_rows rows. The row and
+    null counts are always exact. With verify, type, lengths and digits are
+    collected on all rows as well, which is still much cheaper than
+    tracking the distinct values of every row.
+
+    With more than one worker, the columns of every chunk are profiled in a
+    process pool and the statistics of the chunk are merged into the ones of
+    the sheet. Use it as a context manager to shut the pool down.
+    """
+
+    def __init__(
+        self,
+        sample_rows: int = 0,
+        head_tail_rows: int = DEFAULT_IMPORT_SAMPLE_HEAD_TAIL_ROWS,
+        verify: bool = DEFAULT_IMPORT_SAMPLE_VERIFY,
+        seed: int = SAMPLE_SEED,
+        sketch_after: Optional[int] = None,
+        top_count: int = 0,
+        workers: int = DEFAULT_IMPORT_PROFILE_WORKERS,
+    ):
+        self.sample_rows = sample_rows
+        self.head_tail_rows = head_tail_rows
+        self.verify = verify
+        # passed on to the ColumnStatistics of the distinct values
+        self.column_options: Dict[str, Any] = dict(
+            sketch_after=sketch_after, top_count=top_count
+        )
+        self.workers = workers
+        self._pool: Optional[Pool] = None
+        self.row_count = 0
+        self._rng = np.random.default_rng(seed)
+        self._exact: Dict[Any, ColumnStatistics] = {}
+        self._population: Dict[Any, ColumnStatistics] = {}
+        self._null_counts: Optional[Series] = None
+        # all frames are indexed by the row number within the sheet
+        self._head: Optional[DataFrame] = None
+        self._tail: Optional[DataFrame] = None
+        self._reservoir: Optional[DataFrame] = None
+        # row number held by every slot of the reservoir, -1 for empty slots
+        self._slot_rows = np.full(sample_rows, -1, dtype=np.int64)
+
+    def __enter__(self) -> "SheetStatistics":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    @property
+    def is_sampling(self) -> bool:
+        return self.sample_rows > 0
+
+    @property
+    def is_parallel(self) -> bool:
+        return (
+            self.workers > 1
+            and PROFILE_POOL_START_METHOD in multiprocessing.get_all_start_methods()
+        )
+
+    def update(self, chunk: DataFrame) -> None:
+        if not self.is_sampling:
+            for col in chunk.columns:
+                if col not in self._exact:
+                    self._exact[col] = ColumnStatistics(col, **self.column_options)
+            self._profile(chunk, self._exact)
+            self.row_count += len(chunk)
+            return
+
+        chunk = chunk.set_axis(
+            pd.RangeIndex(self.row_count, self.row_count + len(chunk)), axis=0
+        )
+        null_counts = chunk.isna().sum()
+        self._null_counts = (
+            null_counts
+            if self._null_counts is None
+            else self._null_counts.add(null_counts, fill_value=0)
+        )
+        if self.verify:
+            for col in chunk.columns:
+                self._population.setdefault(col, ColumnStatistics(col))
+            self._profile(chunk, self._population, distinct=False)
+
+        self._update_head_and_tail(chunk)
+        self._update_reservoir(chunk)
+        self.row_count += len(chunk)
+
+    def _profile(
+        self,
+        chunk: DataFrame,
+        statistics: Dict[Any, ColumnStatistics],
+        distinct: bool = True,
+    ) -> None:
+        """Add the columns of chunk to statistics, which has all of them."""
+        if not self.is_parallel or len(chunk.columns) < 2:
+            profile_columns(chunk, statistics, distinct)
+            return
+
+        if self._pool is None:
+            context = multiprocessing.get_context(PROFILE_POOL_START_METHOD)
+            self._pool = context.Pool(processes=self.workers)
+        task_count = min(len(chunk.columns), self.workers * PROFILE_TASKS_PER_WORKER)
+        tasks: List[Tuple[DataFrame, Dict[Any, ColumnStatistics], bool]] = []
+        for positions in np.array_split(np.arange(len(chunk.columns)), task_count):
+            columns = chunk.iloc[:, positions]
+            tasks.append(
+                (
+                    columns,
+                    {col: statistics[col].continuation() for col in columns.columns},
+                    distinct,
+                )
+            )
+        for result in self._pool.starmap(profile_columns, tasks):
+            for col, column_statistics in result.items():
+                statistics[col].merge(column_statistics)
+
+    def _update_head_and_tail(self, chunk: DataFrame) -> None:
+        if self._head is None:
+            self._head = chunk.iloc[: self.head_tail_rows]
+        elif len(self._head) < self.head_tail_rows:
+            self._head = pd.concat(
+                [self._head, chunk.iloc[: self.head_tail_rows - len(self._head)]]
+            )
+        tail = chunk.iloc[-self.head_tail_rows :] if self.head_tail_rows else chunk[:0]
+        if self._tail is not None and len(tail) < self.head_tail_rows:
+            tail = pd.concat([self._tail, tail]).iloc[-self.head_tail_rows :]
+        self._tail = tail
+
+    def _update_reservoir(self, chunk: DataFrame) -> None:
+        """Algorithm R, with the random slots of a chunk drawn at once."""
+        row_numbers = np.arange(self.row_count, self.row_count + len(chunk))
+        slots = np.where(
+            row_numbers < self.sample_rows,
+            row_numbers,
+            self._rng.integers(0, row_numbers + 1),
+        )
+        taken = slots < self.sample_rows
+        if not taken.any():
+            return
+        slots, row_numbers = slots[taken], row_numbers[taken]
+        # a slot taken twice within the chunk keeps the later row
+        last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+        slots, row_numbers = slots[last], row_numbers[last]
+
+        replaced = self._slot_rows[slots]
+        self._slot_rows[slots] = row_numbers
+        rows = chunk.loc[row_numbers]
+        if self._reservoir is None:
+            self._reservoir = rows
+        else:
+            kept = self._reservoir[~self._reservoir.index.isin(replaced[replaced >= 0])]
+            self._reservoir = pd.concat([kept, rows])
+
+    def sample(self) -> DataFrame:
+        """The sampled rows in sheet order, indexed by their row number."""
+        frames = [
+            frame
+            for frame in (self._head, self._reservoir, self._tail)
+            if frame is not None
+        ]
+        if not frames:
+            return DataFrame()
+        sample = pd.concat(frames)
+        sample = sample[~sample.index.duplicated()]
+        return sample.sort_index()
+
+    def columns(self) -> Dict[Any, ColumnStatistics]:
+        if not self.is_sampling:
+            return self._exact
+
+        sample = self.sample()
+        statistics: Dict[Any, ColumnStatistics] = {
+            col: ColumnStatistics(col, **self.column_options) for col in sample.columns
+        }
+        self._profile(sample, statistics)
+        for col, column_statistics in statistics.items():
+            population = self._population.get(col)
+            if population is None:
+                population = ColumnStatistics(col)
+                population.count = self.row_count
+                population.null_count = int(self._null_counts[col])
+            column_statistics.set_population(population, verified=self.verify)
+        return statistics
+
+
+def get_sheet_statistics() -> SheetStatistics:
+    return SheetStatistics(
+        sample_rows=getattr(settings, "IMPORT_SAMPLE_ROWS", DEFAULT_IMPORT_SAMPLE_ROWS),
+        head_tail_rows=getattr(
+            settings,
+            "IMPORT_SAMPLE_HEAD_TAIL_ROWS",
+            DEFAULT_IMPORT_SAMPLE_HEAD_TAIL_ROWS,
+        ),
+        verify=getattr(settings, "IMPORT_SAMPLE_VERIFY", DEFAULT_IMPORT_SAMPLE_VERIFY),
+        sketch_after=getattr(
+            settings,
+            "IMPORT_DISTINCT_SKETCH_AFTER",
+            DEFAULT_IMPORT_DISTINCT_SKETCH_AFTER,
+        ),
+        top_count=getattr(
+            settings, "IMPORT_PROFILE_TOP_VALUES", DEFAULT_IMPORT_PROFILE_TOP_VALUES
+        ),
+        workers=getattr(
+            settings, "IMPORT_PROFILE_WORKERS", DEFAULT_IMPORT_PROFILE_WORKERS
+        ),
+    )
@@ -0,0 +1,95 @@
+import math
+from typing import Any, Dict, Final, List, Tuple
+
+import numpy as np
+from pandas import Series
+
+# 2**14 one byte registers, a standard error of 1.04 / sqrt(2**14) = 0.8%
+HLL_PRECISION: Final[int] = 14
+HASH_BITS: Final[int] = 64
+
+
+def bit_length(values: np.ndarray) -> np.ndarray:
+    """
+    int.bit_length of every element of an uint64 array, from the exponent of
+    the float. Values just below a power of two beyond 2**53 round up, which
+    changes a rank of the 64 bit hashes with a probability of about 2**-53.
+    """
+    return np.frexp(values.astype(np.float64))[1].astype(np.uint8)
+
+
+class HyperLogLog:
+    """
+    Distinct count estimate of a stream of 64 bit hashes in fixed memory.
+    Sketches of the chunks of a column merge into the sketch of the column.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        rest_bits = HASH_BITS - self.precision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        # position of the leftmost 1 bit in the remaining bits
+        rank = (rest_bits + 1 - bit_length(rest).astype(np.intp)).astype(np.uint8)
+        # the highest rank of every register, sorted instead of ufunc.at
+        keys = np.unique((index << 6) | rank)
+        index, rank = keys >> 6, (keys & 63).astype(np.uint8)
+        last = np.append(index[1:] != index[:-1], True)
+        index, rank = index[last], rank[last]
+        self.registers[index] = np.maximum(self.registers[index], rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(int))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # linear counting is more accurate for small cardinalities
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+
+class MisraGries:
+    """
+    The most frequent values of a stream with at most size counters. The
+    counts are lower bounds, short by at most the number of values seen
+    divided by size + 1. Summaries of chunks merge into the summary of the
+    column.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.counts = Series(dtype="int64")
+
+    def update(self, value_counts: Series) -> None:
+        """Add the value counts of a chunk, e.g. Series.value_counts()."""
+        counts = self.counts.add(value_counts.astype("int64"), fill_value=0)
+        if len(counts) > self.size:
+            # subtracting the count of the first value beyond size from all
+            # counters keeps the error bound when merging
+            threshold = counts.nlargest(self.size + 1).iloc[-1]
+            counts = counts[counts > threshold] - threshold
+        self.counts = counts.astype("int64")
+
+    def merge(self, other: "MisraGries") -> None:
+        self.update(other.counts)
+
+    def seed(self, value_counts: Dict[Any, int]) -> None:
+        self.update(Series(value_counts, dtype="int64"))
+
+    def most_frequent(self, count: int) -> List[Tuple[Any, int]]:
+        top = self.counts.nlargest(count)
+        return [(value, int(value_count)) for value, value_count in top.items()]
@@ -0,0 +1,164 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Final, List, Optional, Pattern, Tuple
+
+import pandas as pd
+from pandas import Series
+
+KIND_UUID: Final[str] = "uuid"
+KIND_EMAIL: Final[str] = "email"
+KIND_URL: Final[str] = "url"
+KIND_DATE: Final[str] = "date"
+KIND_TIME: Final[str] = "time"
+KIND_DATE_TIME: Final[str] = "datetime"
+
+# dates and date times are detected with the order of their day, month and
+# year, like "date:dmy", so they are parsed the way they were detected
+ORDER_SEPARATOR: Final[str] = ":"
+ORDER_YMD: Final[str] = "ymd"
+ORDER_MDY: Final[str] = "mdy"
+ORDER_DMY: Final[str] = "dmy"
+
+_DATES: Final[Dict[str, str]] = {
+    ORDER_YMD: r"(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})",
+    # month first dates are written with slashes or dashes only, dotted ones
+    # like 04.08.2016 are always day first
+    ORDER_MDY: (
+        r"(?P<month>\d{1,2})(?P<sep>[/-])(?P<day>\d{1,2})(?P=sep)"
+        r"(?P<year>\d{4}|\d{2})"
+    ),
+    ORDER_DMY: (
+        r"(?P<day>\d{1,2})(?P<sep>[./-])(?P<month>\d{1,2})(?P=sep)"
+        r"(?P<year>\d{4}|\d{2})"
+    ),
+}
+_TIME: Final[str] = (
+    r"(?P<hour>[01]?\d|2[0-3]):(?P<minute>[0-5]\d)"
+    r"(?::(?P<second>[0-5]\d)(?:\.(?P<fraction>\d{1,9}))?)?"
+)
+_TIME_ZONE: Final[str] = r"(?:\s?(?P<tz>Z|[+-]\d{2}:?\d{2}))?"
+
+
+def ordered_kind(kind: str, order: str) -> str:
+    return f"{kind}{ORDER_SEPARATOR}{order}"
+
+
+def base_kind(text_kind: str) -> str:
+    """The kind of a detected text kind without the order of a date."""
+    return text_kind.split(ORDER_SEPARATOR)[0]
+
+
+def date_order(text_kind: str) -> Optional[str]:
+    """The order of day, month and year of a date kind, None without one."""
+    _kind, _separator, order = text_kind.partition(ORDER_SEPARATOR)
+    return order or None
+
+
+# in order of preference, the first kind matching all values is proposed,
+# so ambiguous dates with slashes like 4/8/2016 are month first
+TEXT_KINDS: Final[Tuple[str, ...]] = (
+    KIND_UUID,
+    KIND_EMAIL,
+    KIND_URL,
+    *(ordered_kind(KIND_DATE, order) for order in _DATES),
+    KIND_TIME,
+    *(ordered_kind(KIND_DATE_TIME, order) for order in _DATES),
+)
+
+# distinct values of the first chunk the candidate kinds are picked on
+DETECTION_SAMPLE_SIZE: Final[int] = 100
+
+PATTERNS: Final[Dict[str, Pattern]] = {
+    KIND_UUID: re.compile(
+        r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+    ),
+    KIND_EMAIL: re.compile(r"[^@\s]+@[^@\s]+\.[^@\s.]+"),
+    KIND_URL: re.compile(r"(?:https?|ftp)://[^\s/?#.]+\.[^\s]+", re.IGNORECASE),
+    KIND_TIME: re.compile(_TIME),
+    **{
+        ordered_kind(KIND_DATE, order): re.compile(date)
+        for order, date in _DATES.items()
+    },
+    **{
+        ordered_kind(KIND_DATE_TIME, order): re.compile(
+            rf"{date}[T ]{_TIME}{_TIME_ZONE}", re.IGNORECASE
+        )
+        for order, date in _DATES.items()
+    },
+}
+
+
+def full_year(year: int) -> int:
+    """Two digit years like strptime, 69 to 99 are of the 20th century."""
+    if year >= 100:
+        return year
+    return year + (1900 if year >= 69 else 2000)
+
+
+def is_valid_date(values: Series, pattern: Pattern) -> bool:
+    """Whether all values, which match pattern, are dates, e.g. not 2/30."""
+    parts = values.str.extract(rf"^(?:{pattern.pattern})$", flags=pattern.flags)[
+        ["year", "month", "day"]
+    ].astype(int)
+    parts["year"] = parts["year"].map(full_year)
+    return bool(pd.to_datetime(parts, errors="coerce").notna().all())
+
+
+def parse_text_datetime(value: str, text_kind: str) -> Optional[datetime]:
+    """
+    The date time of a value of a date or date time kind, parsed in the
+    order of the kind. None if value is not of the kind.
+    """
+    match = PATTERNS[text_kind].fullmatch(value.strip())
+    if match is None:
+        return None
+    parts = match.groupdict()
+    tzinfo = None
+    if parts.get("tz"):
+        tz = parts["tz"].upper()
+        if tz == "Z":
+            tzinfo = timezone.utc
+        else:
+            sign = -1 if tz[0] == "-" else 1
+            digits = tz[1:].replace(":", "")
+            tzinfo = timezone(
+                sign * timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+            )
+    try:
+        return datetime(
+            full_year(int(parts["year"])),
+            int(parts["month"]),
+            int(parts["day"]),
+            int(parts.get("hour") or 0),
+            int(parts.get("minute") or 0),
+            int(parts.get("second") or 0),
+            int((parts.get("fraction") or "0")[:6].ljust(6, "0")),
+            tzinfo=tzinfo,
+        )
+    except ValueError:
+        # e.g. 2/30
+        return None
+
+
+def matches(kind: str, values: Series) -> bool:
+    """Whether all values, which are strings, are of kind."""
+    pattern = PATTERNS[kind]
+    if not values.str.fullmatch(pattern).all():
+        return False
+    if date_order(kind):
+        return is_valid_date(values, pattern)
+    return True
+
+
+def detect_kinds(values: Series, candidates: Optional[List[str]] = None) -> List[str]:
+    """
+    The kinds of TEXT_KINDS all values, which are strings, are of. Without
+    candidates, the candidates are picked on a sample of the values first,
+    so the full check only runs for kinds which can still match.
+    """
+    if candidates is None:
+        sample = values.iloc[:DETECTION_SAMPLE_SIZE]
+        candidates = [kind for kind in TEXT_KINDS if matches(kind, sample)]
+        if len(values) <= DETECTION_SAMPLE_SIZE:
+            return candidates
+    return [kind for kind in candidates if matches(kind, values)]
@@ -10,6 +10,13 @@ from project.models import (
     Field,
     Model,
 )
+from project.services.importer import (
+    STAGE_DONE,
+    STAGE_FAILED,
+    STAGE_INFER,
+    STAGE_PARSE,
+    STAGE_PERSIST,
+)
 
 register = template.Library()
 
@@ -90,3 +97,18 @@ def datatype_as_str(field: Field) -> str:
     elif field.foreign_key_entity:
         return _("FK->%(name)s") % {"name": field.foreign_key_entity.name}
     return Field.DATATYPE_LABEL_BY_VALUE[field.datatype]
+
+
+IMPORT_STAGE_LABELS = {
+    "": _("waiting"),
+    STAGE_PARSE: _("reading rows"),
+    STAGE_INFER: _("proposing fields"),
+    STAGE_PERSIST: _("saving fields"),
+    STAGE_DONE: _("done"),
+    STAGE_FAILED: _("failed"),
+}
+
+
+@register.filter("import_stage", is_safe=True)
+def import_stage(stage: str) -> str:
+    return IMPORT_STAGE_LABELS.get(stage, stage)
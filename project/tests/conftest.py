@@ -0,0 +1,19 @@
+import pytest
+
+from project.models import TransformationHeadline
+from project.tests.factories import TransformationFileFactory
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    # the uploaded files of the factories stay out of the upload directory
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def headline(db) -> TransformationHeadline:
+    """An imported headline without columns and rows."""
+    sheet = TransformationFileFactory().sheets.create(index=1)
+    return TransformationHeadline.objects.create(
+        transformation_sheet=sheet, row_index=0
+    )
@@ -1,4 +1,5 @@
 from collections.abc import Sequence
+from pathlib import Path
 from typing import Any
 
 import factory
@@ -6,7 +7,16 @@ from django.contrib.auth import get_user_model
 from factory import Faker, post_generation
 from factory.django import DjangoModelFactory
 
-from project.models import Project, TransformationMapping, Model, Field
+from project.models import (
+    Project,
+    TransformationMapping,
+    TransformationFile,
+    Model,
+    Field,
+)
+from project.services.import_jobs import run_pending_jobs
+
+SAMPLE_FILES = Path(__file__).parent.joinpath("sample_files")
 
 
 class UserFactory(DjangoModelFactory):
@@ -54,6 +64,16 @@ class TransformationMappingFactory(DjangoModelFactory):
     project = factory.SubFactory(ProjectFactory)
 
 
+class TransformationFileFactory(DjangoModelFactory):
+    class Meta:
+        model = TransformationFile
+
+    transformation_mapping = factory.SubFactory(TransformationMappingFactory)
+    file = factory.django.FileField(
+        from_path=SAMPLE_FILES.joinpath("Employee-Sample-Data.csv")
+    )
+
+
 class ModelFactory(DjangoModelFactory):
     class Meta:
         model = Model
@@ -75,3 +95,11 @@ class FieldFactory(DjangoModelFactory):
     name = Faker("bs")
     description = Faker("paragraph")
     index = Faker("pyint", min_value=1, max_value=20)
+
+
+def import_file(client, file: TransformationFile, data=None):
+    """Import file as the user of its project and run the import job."""
+    client.force_login(file.transformation_mapping.project.user)
+    response = client.post(f"/project/file/{file.pk}/import", data or {})
+    run_pending_jobs()
+    return response
@@ -0,0 +1,51 @@
+import pytest
+
+from project.models import Field
+from project.services.bulk_upsert import bulk_upsert
+from project.tests.factories import FieldFactory, ModelFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize("update_conflicts", [True, False])
+def test_bulk_upsert(update_conflicts):
+    model = ModelFactory()
+    existing = FieldFactory(model=model, index=1, name="old", description="kept")
+
+    bulk_upsert(
+        [
+            Field(model=model, index=1, name="new", description="ignored"),
+            Field(model=model, index=2, name="added"),
+        ],
+        model.fields.all(),
+        unique_fields=["model", "index"],
+        update_fields=["name", "updated_at"],
+        update_conflicts=update_conflicts,
+    )
+
+    updated = model.fields.get(index=1)
+    assert updated.pk == existing.pk
+    assert (updated.name, updated.description) == ("new", "kept")
+    assert updated.created_at == existing.created_at
+    assert updated.updated_at > existing.updated_at
+    assert model.fields.get(index=2).name == "added"
+
+
+@pytest.mark.parametrize("update_conflicts", [True, False])
+def test_bulk_upsert_queries(update_conflicts, django_assert_max_num_queries):
+    model = ModelFactory()
+    for index in range(1, 11):
+        FieldFactory(model=model, index=index)
+
+    # the existing rows and one bulk_update and bulk_create each
+    with django_assert_max_num_queries(3):
+        bulk_upsert(
+            [Field(model=model, index=index, name="f") for index in range(1, 21)],
+            model.fields.all(),
+            unique_fields=["model", "index"],
+            update_fields=["name"],
+            update_conflicts=update_conflicts,
+        )
+
+    assert set(model.fields.values_list("name", flat=True)) == {"f"}
+    assert model.fields.count() == 20
@@ -0,0 +1,81 @@
+import pytest
+from django.test import TestCase
+
+from project.models import ColumnProfile, Field, TransformationColumn
+from project.services.column_profile import propose_field
+from project.services.model_exporter_django import FieldTransform
+from project.tests.factories import (
+    FieldFactory,
+    TransformationFileFactory,
+    import_file,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+class TestColumnProfile(TestCase):
+    def setUp(self):
+        self.file = TransformationFileFactory()
+        import_file(self.client, self.file)
+        self.fields = Field.objects.filter(
+            model__transformation_mapping=self.file.transformation_mapping
+        ).select_related("transformation_column__profile")
+
+    def test_profiles_are_saved(self):
+        columns = TransformationColumn.objects.filter(
+            transformation_headline__transformation_sheet__transformation_file=(
+                self.file
+            )
+        )
+
+        assert columns.exists()
+        assert ColumnProfile.objects.filter(transformation_column__in=columns).count()
+        for column in columns:
+            assert column.profile.row_count == 1000
+
+    def test_proposal_of_the_profile_matches_the_import(self):
+        for field in self.fields:
+            proposal = propose_field(field.transformation_column)
+
+            assert proposal.field_type == field.datatype
+            assert proposal.kwargs["max_length"] == field.max_length
+            assert proposal.kwargs["max_digits"] == field.max_digits
+            assert proposal.kwargs["decimal_places"] == field.decimal_places
+            assert proposal.kwargs["null"] == field.null
+            # choices are stored as JSON with string keys
+            assert (
+                proposal.choices and {str(k): v for k, v in proposal.choices.items()}
+            ) == field.choices
+            assert proposal.propose_unique() == field.is_unique
+
+    def test_profile_bounds(self):
+        profile = self.fields.get(name="Age").transformation_column.profile
+
+        assert profile.dtype == "int64"
+        assert (profile.min_value, profile.max_value) == (25, 65)
+        assert profile.distinct_count == 41
+        assert profile.top_values is not None
+        assert len(profile.most_frequent(3)) == 3
+
+    def test_field_form_shows_the_profile(self):
+        field = self.fields.get(name="Full Name")
+
+        response = self.client.get(f"/project/field/{field.pk}/edit")
+
+        self.assertContains(
+            response,
+            "Längster Wert: %s" % field.transformation_column.profile.max_length,
+        )
+
+    def test_no_list_filter_for_many_distinct_values(self):
+        assert FieldTransform(self.fields.get(name="Full Name")).profile()
+        assert (
+            FieldTransform(
+                self.fields.get(name="Full Name")
+            ).to_admin_dot_py_list_filter()
+            is None
+        )
+        assert FieldTransform(
+            self.fields.get(name="Gender")
+        ).to_admin_dot_py_list_filter()
+        assert FieldTransform(FieldFactory()).to_admin_dot_py_list_filter()
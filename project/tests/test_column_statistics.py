@@ -0,0 +1,90 @@
+import pytest
+from pandas import Series
+
+from project.models import Field
+from project.services.column_statistics import ColumnStatistics
+from project.services.import_field import ImportField
+from project.tests.test_import_field import df_of_file
+
+
+def chunked_statistics(series: Series, chunksize: int) -> ColumnStatistics:
+    statistics = ColumnStatistics(series.name)
+    for start in range(0, len(series), chunksize):
+        statistics.update(series.iloc[start : start + chunksize])
+    return statistics
+
+
+class TestColumnStatistics:
+    @pytest.mark.parametrize(
+        "filename", ["Employee-Sample-Data.csv", "Financials-Sample-Data.xlsx"]
+    )
+    def test_chunked_proposal_matches_complete_series(self, pytestconfig, filename):
+        df = df_of_file(
+            pytestconfig.rootpath.joinpath("project/tests/sample_files", filename)
+        )
+
+        for col in df.columns:
+            expected = ImportField(df[col])
+            streamed = ImportField(statistics=chunked_statistics(df[col], 37))
+
+            assert streamed.field_type == expected.field_type
+            assert streamed.kwargs == expected.kwargs
+            assert streamed.propose_unique() == expected.propose_unique()
+
+    def test_duplicates_across_chunks(self):
+        statistics = chunked_statistics(Series(list(range(60)) + [3]), 10)
+
+        assert statistics.has_duplicate_values()
+        assert statistics.distinct_count is None
+
+    def test_int_and_float_chunks(self):
+        statistics = chunked_statistics(Series([1, 2, None, 2.5], dtype=object), 2)
+
+        assert statistics.dtype == "float64"
+        assert statistics.null_count == 1
+        assert statistics.get_decimal_places() == 1
+        assert ImportField(statistics=statistics).field_type == (
+            Field.Datatype.DECIMAL_FIELD
+        )
+
+    def test_merge(self):
+        series = Series(["a", "b", "a", None, "c", "b"])
+        statistics = ColumnStatistics.of_series(series.iloc[:3])
+        statistics.merge(ColumnStatistics.of_series(series.iloc[3:]))
+
+        assert statistics.count == 6
+        assert statistics.null_count == 1
+        assert statistics.value_counts == {"a": 2, "b": 2, "c": 1}
+        assert statistics.has_duplicate_values()
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            [1, -22, 333, 10**15, -(10**15)],
+            [1, 10**17, -3, 12345678901234567],
+            [0.5, -1e-05, 123.25, 1e16, 2.5e-07, 1e22],
+            [1.0, 2.0, 2.0, -0.0],
+            ["a", "bcd", "", "ef"],
+            [True, False, True],
+            ["a", 1, 2.5],
+        ],
+    )
+    def test_bounds_match_the_str_representation(self, values):
+        statistics = ColumnStatistics.of_series(Series(values + [None], dtype=object))
+
+        assert statistics.max_length == max(len(str(v)) for v in values)
+        if statistics.dtype in ("int64", "float64"):
+            text = [str(float(v)) for v in values]
+            assert statistics.max_digits == max(len(t.replace(".", "")) for t in text)
+            assert statistics.decimal_places == max(
+                len(t) - t.find(".") - 1 for t in text
+            )
+
+    def test_min_max(self):
+        numbers = chunked_statistics(Series([3, None, -1, 7.5, 2], dtype=object), 2)
+        texts = chunked_statistics(Series(["b", "a", None, "c"]), 2)
+        mixed = chunked_statistics(Series([1, 2, "a", "b"], dtype=object), 2)
+
+        assert (numbers.min_value, numbers.max_value) == (-1, 7.5)
+        assert (texts.min_value, texts.max_value) == ("a", "c")
+        assert (mixed.min_value, mixed.max_value) == (None, None)
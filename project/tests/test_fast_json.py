@@ -0,0 +1,48 @@
+import json
+
+import numpy as np
+import pytest
+
+from project import fast_json
+
+
+class TestFastJson:
+    def test_round_trip(self):
+        value = {"a": [1, 2.5, None, "ü"], 3: {"b": True}}
+
+        text = fast_json.dumps(value)
+
+        assert json.loads(text) == {"a": [1, 2.5, None, "ü"], "3": {"b": True}}
+        assert fast_json.loads(text) == json.loads(text)
+
+    def test_numpy_values(self):
+        assert fast_json.loads(fast_json.dumps({"a": np.int64(3)})) == {"a": 3}
+
+    def test_big_integers(self):
+        assert fast_json.loads(fast_json.dumps([2**70])) == [2**70]
+
+
+@pytest.mark.django_db
+class TestRowBatches:
+    def test_rows_round_trip(self, headline):
+        rows = [{"model": "m", "pk": 1, "fields": {"a": "x", "b": None}}]
+        headline.append_rows(rows)
+
+        headline.refresh_from_db()
+
+        assert list(headline.iter_rows()) == rows
+
+    def test_rows_are_appended_in_batches(self, headline):
+        rows = [{"model": "m", "pk": pk, "fields": {}} for pk in range(1, 11)]
+
+        headline.append_rows(rows[:7], batch_size=3)
+        headline.append_rows(rows[7:], batch_size=3)
+
+        assert list(headline.row_batches.values_list("index", "row_count")) == [
+            (0, 3),
+            (1, 3),
+            (2, 1),
+            (3, 3),
+        ]
+        assert headline.row_count == 10
+        assert list(headline.iter_rows()) == rows
@@ -1,13 +1,27 @@
 from pathlib import Path
 
+import pytest
+import pandas as pd
+from pandas import DataFrame
+
+from project.services import importer as importer_module
 from project.services.importer import (
     Importer,
     SheetReaderParams,
     DEFAULT_SHEET_NAME_FOR_CSV_FILE,
+    CSV_ENGINE_PYTHON,
+    fixture,
+    sniff_csv_format,
 )
+from project.services.sheet_reader import parse_row_chunks
 from project.tests.test_import_field import df_of_file
 
 
+def as_text(df: DataFrame) -> DataFrame:
+    # the windowed reader may infer NaN where the full parse infers NaT
+    return df.astype(object).where(df.notna(), None).astype(str)
+
+
 class TestImport:
     project = "project/tests"
 
@@ -40,3 +54,177 @@ class TestImport:
         )
         df = df_of_file(path)
         assert not df.empty
+
+    def test_sniff_csv_format(self, tmp_path):
+        path = tmp_path.joinpath("semicolon.csv")
+        path.write_text('name;amount\n"a;b";1,5\nc;2,25\nd;3,0\n')
+
+        csv_format = sniff_csv_format(path)
+
+        assert csv_format.delimiter == ";"
+        assert csv_format.quotechar == '"'
+        assert csv_format.decimal == ","
+
+    def test_fast_csv_engine_matches_python_engine(self, pytestconfig):
+        path = pytestconfig.rootpath.joinpath(
+            Path("project/tests/sample_files/Employee-Sample-Data.csv")
+        )
+        sheet0 = DEFAULT_SHEET_NAME_FOR_CSV_FILE
+        params = SheetReaderParams(skiprows=2, skipfooter=3)
+
+        df_fast = Importer(path).run(sheet0, params)
+        df_python = Importer(path, CSV_ENGINE_PYTHON).run(sheet0, params)
+
+        assert df_fast.equals(df_python)
+
+    def test_skipfooter_with_nrows(self, pytestconfig):
+        path = pytestconfig.rootpath.joinpath(
+            Path("project/tests/sample_files/Employee-Sample-Data.csv")
+        )
+        sheet0 = DEFAULT_SHEET_NAME_FOR_CSV_FILE
+
+        df = Importer(path).run(sheet0, SheetReaderParams(nrows=10, skipfooter=3))
+
+        assert len(df) == 10
+
+    @pytest.mark.parametrize(
+        "filename", ["Employee-Sample-Data.csv", "Employee-Sample-Data.xlsx"]
+    )
+    def test_windowed_preview_matches_full_parse(
+        self, pytestconfig, monkeypatch, filename
+    ):
+        path = pytestconfig.rootpath.joinpath(
+            Path("project/tests/sample_files", filename)
+        )
+        # force the windowed reader even for the small sample files
+        monkeypatch.setattr(importer_module, "PREVIEW_FULL_PARSE_MAX_BYTES", 0)
+        importer = Importer(path)
+        sheet0 = importer.sheets()[0]
+        params = SheetReaderParams(skiprows=1, skipfooter=2)
+
+        df = importer.run(sheet0, params)
+        preview = importer.preview(sheet0, params, 5, 5)
+
+        assert preview.total_rows == len(df)
+        assert list(preview.head.columns) == list(df.columns)
+        assert as_text(preview.head).equals(as_text(df.head(5)))
+        assert as_text(preview.tail).equals(as_text(df.tail(5)))
+
+    @pytest.mark.parametrize(
+        "filename", ["Employee-Sample-Data.csv", "Employee-Sample-Data.xlsx"]
+    )
+    def test_chunked_run_matches_run(self, pytestconfig, filename):
+        path = pytestconfig.rootpath.joinpath(
+            Path("project/tests/sample_files", filename)
+        )
+        importer = Importer(path)
+        sheet0 = importer.sheets()[0]
+        params = SheetReaderParams(skiprows=2, skipfooter=3)
+
+        df = importer.run(sheet0, params)
+        chunks = list(importer.run_chunked(sheet0, params, 100))
+
+        assert len(chunks) == 10
+        assert as_text(pd.concat(chunks)).equals(as_text(df))
+
+    def test_wider_rows_of_later_chunks_fail(self):
+        rows = [["a", "b"], [1, 2], [3, 4], [5, 6, 7]]
+
+        with pytest.raises(ValueError, match="Row 4 has 3 cells"):
+            list(parse_row_chunks(rows, SheetReaderParams(), 2))
+        # cells beyond the selected columns are ignored
+        chunks = list(parse_row_chunks(rows, SheetReaderParams(usecols=[0, 1]), 2))
+        assert list(pd.concat(chunks)["b"]) == [2, 4, 6]
+
+
+class TestFixture:
+    def test_records(self):
+        df = DataFrame(
+            {
+                "int": [1, 2, 3],
+                "float": [1.5, None, 3.0],
+                "text": ["a", None, "c"],
+                "mixed": ["a", 2, None],
+                "flag": [True, False, True],
+            }
+        )
+
+        records = fixture("Sheet", df, "Europe/Berlin", start=5)
+
+        assert records == [
+            {
+                "model": "Sheet",
+                "pk": 5,
+                "fields": {
+                    "int": 1,
+                    "float": 1.5,
+                    "text": "a",
+                    "mixed": "a",
+                    "flag": True,
+                },
+            },
+            {
+                "model": "Sheet",
+                "pk": 6,
+                "fields": {
+                    "int": 2,
+                    "float": None,
+                    "text": None,
+                    "mixed": 2,
+                    "flag": False,
+                },
+            },
+            {
+                "model": "Sheet",
+                "pk": 7,
+                "fields": {
+                    "int": 3,
+                    "float": 3.0,
+                    "text": "c",
+                    "mixed": None,
+                    "flag": True,
+                },
+            },
+        ]
+        assert type(records[0]["fields"]["int"]) is int
+
+    def test_local_times_become_utc(self):
+        df = DataFrame(
+            {
+                "naive": pd.to_datetime(
+                    [
+                        "2021-01-04 10:00:00.250",
+                        None,
+                        # skipped and repeated by daylight saving time
+                        "2021-03-28 02:30",
+                        "2021-10-31 02:30",
+                    ]
+                ),
+                "aware": pd.to_datetime(
+                    ["2021-01-04 10:00", None, None, "2021-07-01 12:00+02:00"],
+                    utc=True,
+                ),
+            }
+        )
+
+        records = fixture("Sheet", df, "Europe/Berlin")
+
+        assert [record["fields"]["naive"] for record in records] == [
+            "2021-01-04T09:00:00.250000+00:00",
+            None,
+            "2021-03-28T01:30:00+00:00",
+            "2021-10-31T00:30:00+00:00",
+        ]
+        assert [record["fields"]["aware"] for record in records] == [
+            "2021-01-04T10:00:00+00:00",
+            None,
+            None,
+            "2021-07-01T10:00:00+00:00",
+        ]
+
+    def test_timestamps_of_text_columns(self):
+        df = DataFrame({"mixed": ["text", pd.Timestamp("2021-07-01 12:00")]})
+
+        records = fixture("Sheet", df, "Europe/Berlin")
+
+        assert records[1]["fields"]["mixed"] == "2021-07-01T10:00:00+00:00"
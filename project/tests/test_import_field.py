@@ -41,6 +41,38 @@ class TestImportField:
         assert import_field.field_type == Field.Datatype.CHAR_FIELD
         assert not import_field.propose_unique()
 
+    @pytest.mark.parametrize(
+        "values, field_type",
+        [
+            ([0, 5, 32767], Field.Datatype.POSITIVE_SMALL_INTEGER_FIELD),
+            ([-1, 5], Field.Datatype.SMALL_INTEGER_FIELD),
+            ([0, 40_000], Field.Datatype.INTEGER_FIELD),
+            ([-(2**40), 0], Field.Datatype.BIG_INTEGER_FIELD),
+        ],
+    )
+    def test_narrowest_integer(self, values, field_type):
+        assert ImportField(Series(values)).field_type == field_type
+
+    def test_whole_floats_are_integers(self):
+        import_field = ImportField(Series([1.0, None, 70_000.0]))
+
+        assert import_field.field_type == Field.Datatype.INTEGER_FIELD
+        assert import_field.kwargs[ImportField.NULL]
+        assert import_field.kwargs[ImportField.MAX_DIGITS] is None
+
+    def test_fractions_are_decimals(self):
+        import_field = ImportField(Series([1.5, 2.25, 3.0]))
+
+        assert import_field.field_type == Field.Datatype.DECIMAL_FIELD
+        assert import_field.kwargs[ImportField.MAX_DIGITS] == 3
+        assert import_field.kwargs[ImportField.DECIMAL_PLACES] == 2
+
+    def test_float_artifacts_are_floats(self):
+        import_field = ImportField(Series([0.1 + 0.2, 1.5]))
+
+        assert import_field.field_type == Field.Datatype.FLOAT_FIELD
+        assert import_field.kwargs[ImportField.MAX_DIGITS] is None
+
 
 def df_of_file(path) -> DataFrame:
     importer = Importer(path)
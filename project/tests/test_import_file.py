@@ -0,0 +1,69 @@
+import time
+from pathlib import Path
+
+import pytest
+from django.test import override_settings
+from django.utils.translation import gettext_lazy as _
+
+from project.services import sheet_pool
+from project.services.import_file import import_file, stream_file
+from project.services.importer import Importer
+from project.services.sheet_cache import sheet_cache
+from project.tests.test_import import as_text
+
+pytestmark = pytest.mark.skipif(
+    not sheet_pool.is_available(), reason="no fork start method"
+)
+
+
+def sample_path(pytestconfig, name: str) -> Path:
+    return pytestconfig.rootpath.joinpath(Path("project/tests/sample_files", name))
+
+
+class TestImportFile:
+    def setup_method(self):
+        sheet_cache.clear()
+
+    @pytest.mark.parametrize("filename", ["Testtabelle.xlsx", "complex_file.xlsx"])
+    def test_parse_pool_matches_serial_parse(self, pytestconfig, filename):
+        importer = Importer(sample_path(pytestconfig, filename))
+        successful, expected = import_file(importer, {})
+        sheet_cache.clear()
+
+        with override_settings(IMPORT_PARSE_WORKERS=2):
+            successful, result = import_file(importer, {})
+
+        assert list(result) == list(expected)
+        for sheet, (df, params) in result.items():
+            assert as_text(df).equals(as_text(expected[sheet][0]))
+        # the pool fills the sheet cache of the request process
+        assert len(sheet_cache) == len(result)
+
+    @override_settings(IMPORT_PARSE_WORKERS=2, IMPORT_SHEET_TIMEOUT=1)
+    def test_sheet_timeout(self, pytestconfig, monkeypatch):
+        importer = Importer(sample_path(pytestconfig, "Testtabelle.xlsx"))
+        run = Importer.run
+
+        def slow_run(self, sheet, sheet_reader_params):
+            if sheet == "Blatt 2":
+                time.sleep(10)
+            return run(self, sheet, sheet_reader_params)
+
+        # inherited by the forked workers
+        monkeypatch.setattr(Importer, "run", slow_run)
+
+        successful, result = import_file(importer, {})
+
+        assert len(result["Blatt 1"][0]) == 4
+        assert result["Blatt 2"][0].iloc[0, 0] == _(
+            "Parsing the sheet took longer than %(seconds)s seconds"
+        ) % {"seconds": 1}
+        assert len(sheet_cache) == 1
+
+    @override_settings(IMPORT_PARSE_WORKERS=2)
+    def test_stream_file_uses_the_pool(self, pytestconfig):
+        importer = Importer(sample_path(pytestconfig, "Testtabelle.xlsx"))
+
+        chunks_by_sheet = stream_file(importer, {})
+
+        assert [len(chunks) for chunks, params in chunks_by_sheet.values()] == [1, 1]
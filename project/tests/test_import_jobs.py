@@ -0,0 +1,221 @@
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+import factory
+import pytest
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from project.models import ImportJob
+from project.services import import_jobs
+from project.services.import_jobs import (
+    claim_next_job,
+    enqueue_job,
+    latest_job,
+    run_job,
+    run_pending_jobs,
+)
+from project.services.sheet_sidecar import is_available, sidecar_dir
+from project.tests.factories import (
+    SAMPLE_FILES,
+    ProjectFactory,
+    TransformationFileFactory,
+    import_file,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def job_settings(settings):
+    # jobs are run by the tests themselves
+    settings.IMPORT_JOBS_IN_PROCESS = False
+
+
+def xlsx_file():
+    return TransformationFileFactory(
+        file=factory.django.FileField(
+            from_path=SAMPLE_FILES.joinpath("Testtabelle.xlsx")
+        )
+    )
+
+
+class TestImportJobs:
+    def test_prepare_file(self):
+        file = xlsx_file()
+        job = enqueue_job(file, ImportJob.Kind.PREPARE)
+
+        assert run_pending_jobs() == 1
+
+        job.refresh_from_db()
+        assert job.is_done()
+        assert job.progress == 100
+        assert [sheet["rows"] for sheet in job.result["sheets"]] == [4, 4]
+        assert [c["name"] for c in job.result["sheets"][0]["columns"]]
+        if is_available():
+            assert list(sidecar_dir(Path(file.file.path)).rglob("*.arrow"))
+
+    def test_queued_job_is_reused(self):
+        file = xlsx_file()
+
+        job = enqueue_job(file, ImportJob.Kind.PREPARE)
+
+        assert enqueue_job(file, ImportJob.Kind.PREPARE) == job
+
+    def test_job_is_claimed_once(self):
+        job = enqueue_job(xlsx_file(), ImportJob.Kind.PREPARE)
+
+        assert claim_next_job() == job
+        assert claim_next_job() is None
+
+    def test_failing_job(self):
+        file = xlsx_file()
+        job = enqueue_job(file, ImportJob.Kind.PREPARE)
+        os.remove(file.file.path)
+
+        run_pending_jobs()
+
+        job.refresh_from_db()
+        assert job.is_failed()
+        assert job.message
+        assert job.finished_at
+
+    def test_stale_running_job_fails(self, settings):
+        settings.IMPORT_JOB_TIMEOUT = 60
+        job = enqueue_job(xlsx_file(), ImportJob.Kind.PREPARE)
+        assert claim_next_job() == job
+        # the worker died without saving the job again
+        ImportJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(seconds=61)
+        )
+        running = enqueue_job(xlsx_file(), ImportJob.Kind.PREPARE)
+        assert claim_next_job() == running
+
+        assert claim_next_job() is None
+
+        job.refresh_from_db()
+        running.refresh_from_db()
+        assert job.is_failed()
+        assert job.message
+        assert job.finished_at
+        assert running.state == ImportJob.State.RUNNING
+
+    def test_job_failed_as_stale_stays_failed(self):
+        job = enqueue_job(xlsx_file(), ImportJob.Kind.PREPARE)
+        assert claim_next_job() == job
+        # another worker took the job as given up while it was still running
+        ImportJob.objects.filter(pk=job.pk).update(state=ImportJob.State.FAILED)
+
+        run_job(job)
+
+        job.refresh_from_db()
+        assert job.is_failed()
+        assert job.result is None
+
+    def test_run_import_jobs_command(self):
+        job = enqueue_job(xlsx_file(), ImportJob.Kind.PREPARE)
+
+        call_command("run_import_jobs", "--once")
+
+        job.refresh_from_db()
+        assert job.is_done()
+
+
+class TestImportJobViews:
+    def test_upload_enqueues_prepare_job(self, client):
+        project = ProjectFactory()
+        client.force_login(project.user)
+
+        with open(SAMPLE_FILES.joinpath("Testtabelle.xlsx"), "rb") as f:
+            response = client.post(
+                f"/project/{project.pk}/file/create", {"file": f, "reader": ""}
+            )
+
+        assert response.status_code == 302
+        job = ImportJob.objects.get()
+        assert job.kind == ImportJob.Kind.PREPARE
+        assert job.state == ImportJob.State.QUEUED
+
+    def test_job_state_is_polled_until_finished(self, client):
+        file = xlsx_file()
+        client.force_login(file.transformation_mapping.project.user)
+        enqueue_job(file, ImportJob.Kind.PREPARE)
+        url = f"/project/file/{file.pk}/import/job"
+
+        response = client.get(f"/project/file/{file.pk}/import")
+
+        assert response.status_code == 200
+        assert url in response.content.decode()
+
+        run_pending_jobs()
+        response = client.get(url)
+
+        assert response.status_code == 200
+        assert url not in response.content.decode()
+        assert "Blatt 1" in response.content.decode()
+
+    def test_import_runs_in_job(self, client, settings):
+        settings.IMPORT_CHUNK_SIZE = 100
+        file = TransformationFileFactory()
+        client.force_login(file.transformation_mapping.project.user)
+        url = f"/project/file/{file.pk}/import/job/import"
+
+        response = client.post(f"/project/file/{file.pk}/import")
+
+        assert response.status_code == 302
+        job = ImportJob.objects.get(kind=ImportJob.Kind.IMPORT)
+        assert len(job.params["sheets"]) == 1
+        assert not job.params["dry_run"]
+        assert url in client.get(f"/project/file/{file.pk}/import").content.decode()
+
+        run_pending_jobs()
+
+        job.refresh_from_db()
+        assert job.is_done()
+        assert job.progress == 100
+        assert [(sheet["stage"], sheet["rows"]) for sheet in job.result["sheets"]] == [
+            ("done", 1000)
+        ]
+        assert file.transformation_mapping.models.get().fields.count() == 14
+        response = client.get(url)
+        assert url not in response.content.decode()
+        assert "Datei importiert" in response.content.decode()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_progress_of_a_dry_run_is_visible(self, client, monkeypatch):
+        file = TransformationFileFactory()
+        import_file(client, file)
+        # the page polling the job reads it with a connection of its own
+        other = connections.create_connection(DEFAULT_DB_ALIAS)
+        seen = []
+        import_models = import_jobs.create_models
+
+        def create_models(*args, progress, **kwargs):
+            def read_progress(*progress_args):
+                progress(*progress_args)
+                with other.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT progress, result FROM project_importjob "
+                        "WHERE kind = %s AND state = %s",
+                        [ImportJob.Kind.IMPORT, ImportJob.State.RUNNING],
+                    )
+                    seen.append(cursor.fetchone())
+
+            return import_models(*args, progress=read_progress, **kwargs)
+
+        monkeypatch.setattr("project.services.import_jobs.create_models", create_models)
+        try:
+            import_file(client, file, {"review": "1"})
+        finally:
+            other.close()
+
+        job = latest_job(file, ImportJob.Kind.IMPORT)
+        assert job.is_done()
+        assert job.params["dry_run"]
+        stages = [json.loads(result)["sheets"][0]["stage"] for _, result in seen]
+        assert stages[0] == "parse"
+        assert stages[-2:] == ["persist", "done"]
+        assert seen[-1][0] == 100
@@ -0,0 +1,166 @@
+import pytest
+from pandas import Series
+
+from project.models import (
+    ColumnProfile,
+    Field,
+    Model,
+    TransformationColumn,
+    TransformationHeadline,
+)
+from project.services.column_statistics import ColumnStatistics
+from project.services.import_field import ImportField
+from project.services import model_exporter_django
+from project.services.model_exporter_django import (
+    RowTransformer,
+    compile_value_converter,
+    encode_values,
+    memoized,
+)
+from project.services.project_schema import ModelSchema
+
+
+def field_of_column(name: str, **kwargs) -> Field:
+    return Field(
+        name=name, transformation_column=TransformationColumn(name=name), **kwargs
+    )
+
+
+def test_compile_value_converter():
+    assert compile_value_converter(field_of_column("Full Name")) is None
+
+    to_date = compile_value_converter(
+        field_of_column("Hire Date", datatype=Field.Datatype.DATE_FIELD)
+    )
+    assert to_date("4/8/2016") == "2016-04-08"
+    assert to_date("2016-04-08T10:00:00") == "2016-04-08"
+    assert to_date("") == ""
+
+    to_datetime = compile_value_converter(
+        field_of_column("Start", datatype=Field.Datatype.DATE_TIME_FIELD)
+    )
+    # local times of the default time zone of the sheets, like datetime cells
+    assert to_datetime("2016-04-08 10:00") == "2016-04-08T08:00:00+00:00"
+    assert to_datetime("2016-04-08T08:00:00+00:00") == "2016-04-08T08:00:00+00:00"
+
+    to_choice = compile_value_converter(
+        field_of_column(
+            "Gender",
+            datatype=Field.Datatype.INTEGER_FIELD,
+            choices={"1": "Male", "2": "Female", "3": "Male"},
+        )
+    )
+    assert to_choice("Female") == 2
+    # the first choice of a repeated value
+    assert to_choice("Male") == 1
+    assert to_choice("Unknown") is None
+
+
+def test_memoized_keeps_a_bounded_number_of_values(monkeypatch):
+    monkeypatch.setattr(model_exporter_django, "CONVERTED_VALUES_CACHE_SIZE", 2)
+    converted = []
+    convert = memoized(lambda value: converted.append(value) or value)
+
+    for value in ["a", "b", "a", "c", "a", "b", ["d"]]:
+        assert convert(value) == value
+
+    # b was the least recently used value when c was converted
+    assert converted == ["a", "b", "c", "b", ["d"]]
+
+
+def test_encode_values_converts_every_distinct_value_once():
+    converted = []
+
+    def convert(value):
+        converted.append(value)
+        return {"Sales": 1, "IT": 2}.get(value)
+
+    values = ["IT", "Sales", None, "IT", float("nan"), "Sales", "HR"]
+
+    assert encode_values(values, convert) == [2, 1, None, 2, None, 1, None]
+    assert converted == ["IT", "Sales", "HR", None]
+    assert encode_values([["IT"], "IT"], lambda value: len(value)) == [1, 2]
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        (
+            ["04.08.2016", "11.08.2016", "01.12.2020"],
+            ["2016-08-04", "2016-08-11", "2020-12-01"],
+        ),
+        (
+            ["04.08.2016", "11.08.2016", "13.08.2016"],
+            ["2016-08-04", "2016-08-11", "2016-08-13"],
+        ),
+    ],
+)
+def test_dotted_dates_are_exported_day_first(values, expected):
+    statistics = ColumnStatistics("Hire Date")
+    statistics.update(Series(values))
+    import_field = ImportField(statistics=statistics)
+    field = field_of_column("Hire Date", datatype=import_field.field_type)
+    field.transformation_column.profile = ColumnProfile(
+        text_kinds=statistics.text_kinds
+    )
+
+    to_date = compile_value_converter(field)
+
+    assert field.datatype == Field.Datatype.DATE_FIELD
+    assert [to_date(value) for value in values] == expected
+
+
+def test_text_datetimes_are_local_times_of_the_sheet():
+    field = field_of_column("Start", datatype=Field.Datatype.DATE_TIME_FIELD)
+    field.transformation_column.transformation_headline = TransformationHeadline(
+        timezone="America/New_York"
+    )
+    field.transformation_column.profile = ColumnProfile(text_kinds=["datetime:mdy"])
+
+    to_datetime = compile_value_converter(field)
+
+    assert to_datetime("1/15/2020 10:00") == "2020-01-15T15:00:00+00:00"
+
+
+def test_row_transformer():
+    model = ModelSchema(
+        Model(name="Employee"),
+        (
+            field_of_column("Full Name"),
+            field_of_column("Secret", exclude=True),
+            field_of_column("Hire Date", datatype=Field.Datatype.DATE_FIELD),
+            field_of_column("Unit", choices={"a": "Sales", "b": "IT"}),
+        ),
+    )
+    rows = [
+        {
+            "model": "",
+            "pk": 1,
+            "fields": {
+                "Full Name": "Emily Davis",
+                "Secret": "x",
+                "Hire Date": "4/8/2016",
+                "Unit": "IT",
+            },
+        },
+        {"model": "", "pk": 2, "fields": {"Full Name": "Theodore Dinh"}},
+    ]
+
+    transformed = RowTransformer("core.Employee", model).transform(rows)
+
+    assert transformed == [
+        {
+            "model": "core.Employee",
+            "pk": 1,
+            "fields": {
+                "full_name": "Emily Davis",
+                "hire_date": "2016-04-08",
+                "unit": "b",
+            },
+        },
+        {
+            "model": "core.Employee",
+            "pk": 2,
+            "fields": {"full_name": "Theodore Dinh", "hire_date": None, "unit": None},
+        },
+    ]
@@ -0,0 +1,94 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from project.models import Field
+from project.services.model_exporter_django import ModelTransform
+from project.services.project_schema import load_project_schema
+from project.tests.factories import (
+    FieldFactory,
+    ModelFactory,
+    TransformationMappingFactory,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def mapping():
+    mapping = TransformationMappingFactory()
+    main = ModelFactory(
+        transformation_mapping=mapping, name="Employee", index=1, is_main_entity=True
+    )
+    department = ModelFactory(
+        transformation_mapping=mapping, name="Department", index=2, is_main_entity=False
+    )
+    ModelFactory(
+        transformation_mapping=mapping,
+        name="Hidden",
+        index=3,
+        is_main_entity=False,
+        exclude=True,
+    )
+    # a model of another project, referenced by a field
+    other = ModelFactory(index=1)
+    for index in range(1, 4):
+        FieldFactory(model=other, index=index)
+
+    FieldFactory(model=main, name="name", index=1)
+    FieldFactory(model=main, name="secret", index=2, exclude=True)
+    FieldFactory(
+        model=main,
+        name="department",
+        index=3,
+        datatype=Field.Datatype.INTEGER_FIELD,
+        foreign_key_entity=department,
+    )
+    FieldFactory(
+        model=main,
+        name="office",
+        index=4,
+        datatype=Field.Datatype.INTEGER_FIELD,
+        foreign_key_entity=other,
+    )
+    FieldFactory(model=department, name="title", index=1)
+    return mapping
+
+
+def test_schema_is_loaded_in_constant_queries(mapping):
+    with CaptureQueriesContext(connection) as queries:
+        schema = load_project_schema(mapping)
+
+    # models, fields and the field counts of the referenced models
+    assert len(queries) == 3
+    assert [model.model.name for model in schema.models] == [
+        "Employee",
+        "Department",
+        "Hidden",
+    ]
+    assert [model.model.name for model in schema.exported_models] == [
+        "Employee",
+        "Department",
+    ]
+    assert schema.main_model.model.name == "Employee"
+    employee = schema.models[0]
+    assert [field.name for field in employee.exported_fields] == [
+        "name",
+        "department",
+        "office",
+    ]
+    department, office = employee.exported_fields[1:]
+    assert schema.field_count(department.foreign_key_entity) == 1
+    assert schema.field_count(office.foreign_key_entity) == 3
+
+
+def test_exporting_the_schema_queries_nothing(mapping):
+    schema = load_project_schema(mapping)
+
+    with CaptureQueriesContext(connection) as queries:
+        for model in schema.exported_models:
+            ModelTransform(model, schema).to_model_dot_py()
+            ModelTransform(model, schema).to_admin_dot_py_class()
+
+    assert len(queries) == 0
+    assert "secret" not in ModelTransform(schema.models[0], schema).to_model_dot_py()
@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import pytest
+
+from project.forms.forms_project import ProjectEditFileForm
+from project.services import reader_backends
+from project.services.importer import Importer, SheetReaderParams
+from project.services.reader_backends import (
+    READER_CALAMINE,
+    READER_OPENPYXL,
+    READER_OPENPYXL_READ_ONLY,
+    ReaderRule,
+    open_reader,
+    reader_candidates,
+)
+from project.tests.test_import import as_text
+
+
+def sample_path(pytestconfig, name: str) -> Path:
+    return pytestconfig.rootpath.joinpath(Path("project/tests/sample_files", name))
+
+
+class TestReaderBackends:
+    def test_override_comes_first(self, pytestconfig):
+        path = sample_path(pytestconfig, "Employee-Sample-Data.xlsx")
+
+        names = [r.name for r in reader_candidates(path, READER_OPENPYXL)]
+
+        assert names[0] == READER_OPENPYXL
+        assert len(names) == len(set(names))
+
+    def test_override_must_support_the_suffix(self, pytestconfig):
+        path = sample_path(pytestconfig, "Employee-Sample-Data.xlsx")
+
+        names = [r.name for r in reader_candidates(path, "xlrd")]
+
+        assert "xlrd" not in names
+
+    def test_rules_are_picked_by_size(self, pytestconfig, monkeypatch):
+        path = sample_path(pytestconfig, "Employee-Sample-Data.xlsx")
+        size = path.stat().st_size
+        rules = (
+            ReaderRule("xlsx", size + 1, (READER_CALAMINE,)),
+            ReaderRule("xlsx", size, (READER_OPENPYXL_READ_ONLY,)),
+            ReaderRule("xlsx", 0, (READER_OPENPYXL,)),
+        )
+        monkeypatch.setattr(reader_backends, "DEFAULT_READER_RULES", rules)
+
+        names = [r.name for r in reader_candidates(path)]
+
+        assert names == [READER_OPENPYXL_READ_ONLY]
+
+    def test_fallback_if_reader_can_not_open_the_file(self, pytestconfig):
+        # sheet scoped defined names are not supported by openpyxl
+        pytest.importorskip("python_calamine")
+        path = sample_path(pytestconfig, "two_tables_on_one_sheet.xlsx")
+
+        reader = open_reader(path, READER_OPENPYXL_READ_ONLY)
+
+        assert reader.name != READER_OPENPYXL_READ_ONLY
+
+    @pytest.mark.parametrize(
+        "filename",
+        [
+            "Employee-Sample-Data.xlsx",
+            "Financials-Sample-Data.xlsx",
+            "Testtabelle.xlsx",
+        ],
+    )
+    def test_calamine_matches_openpyxl(self, pytestconfig, filename):
+        pytest.importorskip("python_calamine")
+        path = sample_path(pytestconfig, filename)
+        expected = Importer(path, reader=READER_OPENPYXL)
+        importer = Importer(path, reader=READER_CALAMINE)
+        params = SheetReaderParams(skiprows=1, skipfooter=1)
+
+        assert importer.reader.name == READER_CALAMINE
+        assert importer.sheets() == expected.sheets()
+        for sheet in expected.sheets():
+            df = importer.run(sheet, params)
+            expected_df = expected.run(sheet, params)
+            assert list(df.columns) == list(expected_df.columns)
+            assert as_text(df).equals(as_text(expected_df))
+
+
+def test_file_form_offers_the_readers():
+    form = ProjectEditFileForm(data={"reader": "unknown"})
+
+    assert [name for name, label in form.fields["reader"].choices] == [
+        "",
+        *reader_backends.READERS,
+    ]
+    assert "reader" in form.errors
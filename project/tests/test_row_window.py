@@ -0,0 +1,58 @@
+import pytest
+
+from project.models import TransformationHeadline
+from project.services.row_window import MAX_ROW_WINDOW_LIMIT, row_window
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def headline(headline: TransformationHeadline) -> TransformationHeadline:
+    """The headline of the conftest with three columns and 25 rows."""
+    for index, name in enumerate(["a", "b", "c"]):
+        headline.columns.create(column_index=index, name=name)
+    headline.append_rows(
+        [
+            {"model": "m", "pk": pk, "fields": {"a": pk, "b": f"b{pk}", "c": None}}
+            for pk in range(1, 26)
+        ],
+        batch_size=10,
+    )
+    return headline
+
+
+class TestRowWindow:
+    def test_window_across_batches(self, headline):
+        window = row_window(headline, offset=8, limit=5)
+
+        assert window.total_rows == 25
+        assert window.columns == ["a", "b", "c"]
+        assert [pk for pk, values in window.rows] == [9, 10, 11, 12, 13]
+        assert window.rows[0] == (9, [9, "b9", None])
+        assert (window.previous_offset, window.end, window.next_offset) == (3, 13, 13)
+
+    def test_last_window(self, headline):
+        window = row_window(headline, offset=20, limit=10)
+
+        assert [pk for pk, values in window.rows] == list(range(21, 26))
+        assert window.next_offset is None
+
+    def test_only_overlapping_batches_are_loaded(
+        self, headline, django_assert_num_queries
+    ):
+        # the columns, the counts of the batches and the rows of one batch
+        with django_assert_num_queries(3):
+            window = row_window(headline, offset=12, limit=3)
+
+        assert [pk for pk, values in window.rows] == [13, 14, 15]
+
+    def test_columns(self, headline):
+        window = row_window(headline, limit=2, columns=["b", "x", "a"])
+
+        assert window.columns == ["b", "a"]
+        assert window.rows == [(1, ["b1", 1]), (2, ["b2", 2])]
+
+    def test_limits(self, headline):
+        assert row_window(headline, offset=-5, limit=0).rows == [(1, [1, "b1", None])]
+        assert row_window(headline, limit=10**6).limit == MAX_ROW_WINDOW_LIMIT
+        assert row_window(headline, offset=100).rows == []
@@ -0,0 +1,139 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from django.conf import settings
+from django.test import TestCase
+
+from project.models import Field, TransformationColumn
+from project.services.schema_diff import ProposedColumn, match_columns
+from project.tests.factories import (
+    SAMPLE_FILES,
+    TransformationFileFactory,
+    import_file,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def field_of_column(pk: int, name: str, column_index: int) -> Field:
+    return Field(
+        pk=pk,
+        name=name,
+        transformation_column=TransformationColumn(
+            name=name, column_index=column_index
+        ),
+    )
+
+
+def proposed(index: int, name: str) -> ProposedColumn:
+    return ProposedColumn(index, name, None, None)  # type: ignore
+
+
+def test_match_columns():
+    fields = [
+        field_of_column(1, "Name", 0),
+        field_of_column(2, "Hire Date", 1),
+        field_of_column(3, "City", 2),
+        field_of_column(4, "Bonus", 3),
+    ]
+    columns = [
+        proposed(0, "Hire Date"),
+        proposed(1, "Full Name"),
+        proposed(2, "Town"),
+        proposed(3, "Bonus %"),
+    ]
+
+    pairs = {
+        (field.pk, column.name) for field, column in match_columns(fields, columns)
+    }
+
+    # by name, by similarity and by similarity at the same position
+    assert pairs == {(2, "Hire Date"), (1, "Full Name"), (4, "Bonus %")}
+
+
+class TestIncrementalImport(TestCase):
+    def setUp(self):
+        self.file = TransformationFileFactory()
+        self.import_file(self.file)
+        self.model = self.file.transformation_mapping.models.get()
+
+    def import_file(self, file, data=None):
+        """Import file in a job, the response is the progress of the job."""
+        import_file(self.client, file, data)
+        return self.client.get(f"/project/file/{file.pk}/import/job/import")
+
+    def changed_file(self):
+        df = pd.read_csv(
+            SAMPLE_FILES.joinpath("Employee-Sample-Data.csv"), encoding="latin-1"
+        )
+        df = df.rename(columns={"Full Name": "Full Names"}).drop(columns=["City"])
+        df["Age"] = df["Age"].astype(str) + " years"
+        df["Zip"] = "12345"
+        path = Path(settings.MEDIA_ROOT).joinpath("changed", "Employee-Sample-Data.csv")
+        path.parent.mkdir()
+        df.to_csv(path, index=False, encoding="latin-1")
+        return TransformationFileFactory(
+            transformation_mapping=self.file.transformation_mapping,
+            file__from_path=path,
+        )
+
+    def fields_by_column(self):
+        return {
+            field.transformation_column.name: field
+            for field in self.model.fields.select_related("transformation_column")
+        }
+
+    def test_unchanged(self):
+        fields = {field.pk: field.updated_at for field in self.model.fields.all()}
+
+        response = self.import_file(self.file, {"import_changes": "1"})
+
+        self.assertContains(response, "unverändert")
+        assert {field.pk: field.updated_at for field in self.model.fields.all()} == (
+            fields
+        )
+        assert self.model.transformation_headline.row_count == 1000
+
+    def test_changes(self):
+        before = self.fields_by_column()
+        Field.objects.filter(pk=before["Department"].pk).update(name="Abteilung")
+        Field.objects.filter(pk=before["Country"].pk).update(
+            datatype=Field.Datatype.TEXT_FIELD
+        )
+        file = self.changed_file()
+
+        response = self.import_file(file, {"import_changes": "1"})
+
+        self.assertContains(response, "hinzugefügt: Zip")
+        self.assertContains(response, "entfernt: City")
+        self.assertContains(response, "umbenannt: Full Name → Full Names")
+        self.assertContains(response, "Typ geändert: Age")
+        fields = self.fields_by_column()
+        assert set(fields) == set(before) - {"City", "Full Name"} | {
+            "Full Names",
+            "Zip",
+        }
+        assert fields["Full Names"].pk == before["Full Name"].pk
+        assert fields["Full Names"].name == "Full Names"
+        # the text values became choices
+        assert fields["Age"].choices["1"] == "55 years"
+        assert fields["Zip"].index == 15
+        # edits of unchanged fields are kept
+        assert fields["Department"].name == "Abteilung"
+        assert fields["Country"].datatype == Field.Datatype.TEXT_FIELD
+        self.model.refresh_from_db()
+        headline = self.model.transformation_headline
+        assert headline.transformation_sheet.transformation_file == file
+        assert next(headline.iter_rows())["fields"]["Zip"] == 12345
+
+    def test_review(self):
+        fields = list(self.model.fields.values())
+        file = self.changed_file()
+
+        response = self.import_file(file, {"review": "1"})
+
+        self.assertContains(response, "hinzugefügt: Zip")
+        self.assertContains(response, "Noch wurde nichts geändert")
+        assert list(self.model.fields.values()) == fields
+        assert not file.sheets.exists()
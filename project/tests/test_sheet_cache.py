@@ -0,0 +1,78 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from pandas import DataFrame
+
+from project.services.importer import (
+    Importer,
+    SheetReaderParams,
+    DEFAULT_SHEET_NAME_FOR_CSV_FILE,
+    TABLE_PARAM_HEAD_ROWS,
+    READ_PARAM_NROWS,
+)
+from project.services.sheet_cache import SheetCache, read_sheet, sheet_cache
+
+
+def sample_path(pytestconfig, name: str) -> Path:
+    return pytestconfig.rootpath.joinpath(Path("project/tests/sample_files", name))
+
+
+class TestSheetCache:
+    def setup_method(self):
+        sheet_cache.clear()
+
+    def test_second_read_is_served_from_cache(self, pytestconfig):
+        importer = Importer(sample_path(pytestconfig, "Employee-Sample-Data.csv"))
+        sheet = DEFAULT_SHEET_NAME_FOR_CSV_FILE
+        params = SheetReaderParams()
+
+        with patch.object(Importer, "run", wraps=importer.run) as run:
+            df1 = read_sheet(importer, sheet, params)
+            # display settings must not invalidate the parsed sheet
+            params[TABLE_PARAM_HEAD_ROWS] = 10
+            df2 = read_sheet(importer, sheet, params)
+
+        assert run.call_count == 1
+        assert df1.equals(df2)
+
+    def test_parse_params_are_part_of_the_key(self, pytestconfig):
+        importer = Importer(sample_path(pytestconfig, "Employee-Sample-Data.csv"))
+        sheet = DEFAULT_SHEET_NAME_FOR_CSV_FILE
+
+        df_all = read_sheet(importer, sheet, SheetReaderParams())
+        df_some = read_sheet(importer, sheet, SheetReaderParams(nrows=3))
+
+        assert len(sheet_cache) == 2
+        assert len(df_some) == 3
+        assert len(df_all) > 3
+
+    def test_lru_eviction(self, pytestconfig, settings):
+        settings.IMPORT_SHEET_CACHE_MAX_ENTRIES = 2
+        cache = SheetCache()
+        path = sample_path(pytestconfig, "Employee-Sample-Data.csv")
+        keys = [
+            cache.key(path, DEFAULT_SHEET_NAME_FOR_CSV_FILE, SheetReaderParams(nrows=n))
+            for n in (1, 2, 3)
+        ]
+        cache.put(keys[0], DataFrame({"a": [1]}))
+        cache.put(keys[1], DataFrame({"a": [2]}))
+        assert cache.get(keys[0]) is not None  # refresh first entry
+        cache.put(keys[2], DataFrame({"a": [3]}))
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[2]) is not None
+
+    def test_invalidate_path(self, pytestconfig):
+        path = sample_path(pytestconfig, "Employee-Sample-Data.csv")
+        read_sheet(
+            Importer(path),
+            DEFAULT_SHEET_NAME_FOR_CSV_FILE,
+            SheetReaderParams(**{READ_PARAM_NROWS: 5}),
+        )
+        assert len(sheet_cache) == 1
+
+        sheet_cache.invalidate_path(path)
+
+        assert len(sheet_cache) == 0
+        assert sheet_cache.size == 0
@@ -0,0 +1,131 @@
+import os
+import shutil
+from datetime import datetime, time
+from pathlib import Path
+
+import factory
+import pytest
+
+from project.services.importer import Importer, SheetReaderParams
+from project.services.reader_backends import open_reader
+from project.services.sheet_sidecar import (
+    SheetTable,
+    SidecarReader,
+    sidecar_dir,
+    write_sheet,
+)
+from project.tests.factories import SAMPLE_FILES, TransformationFileFactory
+from project.tests.test_import import as_text
+
+pytest.importorskip("pyarrow")
+
+
+def sample_copy(tmp_path: Path, name: str) -> Path:
+    path = tmp_path.joinpath(name)
+    shutil.copy(SAMPLE_FILES.joinpath(name), path)
+    return path
+
+
+class TestSheetSidecar:
+    def test_cells_are_kept(self, tmp_path):
+        path = tmp_path.joinpath("0.arrow")
+        rows = [
+            ["name", "amount", "flag", "when", "at"],
+            [None, None, None],
+            ["a", 1, True, datetime(2023, 1, 2, 3, 4, 5), time(12, 30)],
+            ["b", 2.5, False, "unknown", None, "extra"],
+            [None, None],
+        ]
+
+        write_sheet(path, rows)
+        table = SheetTable(path)
+
+        # trailing blank rows are dropped, all rows get the widest width
+        assert table.row_count == 4
+        assert table.rows(0, 10) == [
+            ["name", "amount", "flag", "when", "at", ""],
+            ["", "", "", "", "", ""],
+            ["a", 1, True, datetime(2023, 1, 2, 3, 4, 5), time(12, 30), ""],
+            ["b", 2.5, False, "unknown", "", "extra"],
+        ]
+        assert table.rows(2, 3) == [table.rows(0, 4)[2]]
+
+    def test_read_matches_source(self, tmp_path):
+        path = sample_copy(tmp_path, "Financials-Sample-Data.xlsx")
+        source = open_reader(path)
+        reader = SidecarReader(path, sidecar_dir(path), lambda: source)
+        params = SheetReaderParams(skiprows=1, skipfooter=2)
+        sheet = reader.sheets()[0]
+
+        df = reader.read(sheet, params)
+
+        expected = source.read(sheet, params)
+        assert list(df.columns) == list(expected.columns)
+        assert as_text(df).equals(as_text(expected))
+
+    def test_second_read_does_not_open_the_source(self, tmp_path):
+        path = sample_copy(tmp_path, "Employee-Sample-Data.xlsx")
+        first = Importer(path, sidecar=sidecar_dir(path))
+        df = first.run(first.sheets()[0], SheetReaderParams())
+
+        def open_source():
+            raise AssertionError("source opened")
+
+        reader = SidecarReader(path, sidecar_dir(path).joinpath("auto"), open_source)
+        preview = reader.preview(reader.sheets()[0], SheetReaderParams(), 5, 5)
+
+        assert preview.total_rows == len(df)
+        assert as_text(preview.tail).equals(as_text(df.tail(5)))
+
+    def test_changed_file_is_converted_again(self, tmp_path):
+        path = sample_copy(tmp_path, "Testtabelle.xlsx")
+        importer = Importer(path, sidecar=sidecar_dir(path))
+        importer.run(importer.sheets()[0], SheetReaderParams())
+
+        shutil.copy(SAMPLE_FILES.joinpath("Financials-Sample-Data.xlsx"), path)
+        os.utime(path, ns=(0, 0))
+        importer = Importer(path, sidecar=sidecar_dir(path))
+        df = importer.run(importer.sheets()[0], SheetReaderParams())
+
+        expected = Importer(path).run("Financials", SheetReaderParams())
+        assert importer.sheets() == ["Financials"]
+        assert as_text(df).equals(as_text(expected))
+
+    def test_stale_sidecar_is_replaced_as_a_whole(self, tmp_path):
+        path = sample_copy(tmp_path, "Testtabelle.xlsx")
+        source = open_reader(path)
+        reader = SidecarReader(path, sidecar_dir(path), lambda: source)
+        table = reader.table(reader.sheets()[0])
+        rows = table.rows(0, 4)
+
+        os.utime(path, ns=(0, 0))
+        reader = SidecarReader(path, sidecar_dir(path), lambda: source)
+
+        assert reader.sheets() == source.sheets()
+        assert [p.name for p in sidecar_dir(path).iterdir()] == ["manifest.json"]
+        # no temporary siblings are left behind
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+            [path.name, sidecar_dir(path).name]
+        )
+        # readers of the old directory keep their mapped tables
+        assert table.rows(0, 4) == rows
+
+
+@pytest.mark.django_db
+def test_sidecar_is_removed_with_the_file(client):
+    file = TransformationFileFactory(
+        file=factory.django.FileField(
+            from_path=SAMPLE_FILES.joinpath("Testtabelle.xlsx")
+        )
+    )
+    client.force_login(file.transformation_mapping.project.user)
+
+    response = client.get(f"/project/file/{file.pk}/import/0")
+
+    directory = sidecar_dir(Path(file.file.path))
+    assert response.status_code == 200
+    assert list(directory.rglob("*.arrow"))
+
+    file.delete()
+
+    assert not directory.exists()
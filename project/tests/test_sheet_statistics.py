@@ -0,0 +1,187 @@
+import pytest
+from django.test import TestCase, override_settings
+from pandas import DataFrame
+
+from project.models import Field, TransformationColumn
+from project.services.import_field import ImportField
+from project.services.sheet_statistics import SheetStatistics
+from project.tests.factories import TransformationFileFactory, import_file
+from project.tests.test_import_field import df_of_file
+
+pytestmark = pytest.mark.django_db
+
+
+def feed(statistics: SheetStatistics, df: DataFrame, chunksize: int):
+    for start in range(0, len(df), chunksize):
+        statistics.update(df.iloc[start : start + chunksize])
+    return statistics.columns()
+
+
+def long_frame(rows: int) -> DataFrame:
+    return DataFrame(
+        {
+            "id": range(rows),
+            "code": [f"c{i % 7}" for i in range(rows)],
+            "text": ["x" * (i % 10) for i in range(rows)],
+        }
+    )
+
+
+class TestSheetStatistics:
+    def test_sample_covering_all_rows_is_exact(self, pytestconfig):
+        df = df_of_file(
+            pytestconfig.rootpath.joinpath(
+                "project/tests/sample_files/Employee-Sample-Data.csv"
+            )
+        )
+
+        sampled = feed(SheetStatistics(sample_rows=len(df)), df, 100)
+        exact = feed(SheetStatistics(), df, 100)
+
+        assert list(sampled) == list(exact)
+        for col in df.columns:
+            expected = ImportField(statistics=exact[col])
+            proposal = ImportField(statistics=sampled[col])
+
+            assert not proposal.is_sampled
+            assert proposal.field_type == expected.field_type
+            assert proposal.kwargs == expected.kwargs
+            assert proposal.propose_unique() == expected.propose_unique()
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            {},
+            {"sample_rows": 300, "head_tail_rows": 20},
+            {"sketch_after": 100, "top_count": 3},
+        ],
+    )
+    def test_parallel_matches_serial(self, pytestconfig, options):
+        df = df_of_file(
+            pytestconfig.rootpath.joinpath(
+                "project/tests/sample_files/Employee-Sample-Data.csv"
+            )
+        )
+
+        with SheetStatistics(workers=2, **options) as statistics:
+            assert statistics.is_parallel
+            parallel = feed(statistics, df, 100)
+        serial = feed(SheetStatistics(**options), df, 100)
+
+        assert list(parallel) == list(serial)
+        for col in df.columns:
+            expected = ImportField(statistics=serial[col])
+            proposal = ImportField(statistics=parallel[col])
+
+            assert proposal.field_type == expected.field_type
+            assert proposal.kwargs == expected.kwargs
+            assert proposal.choices == expected.choices
+            assert proposal.propose_unique() == expected.propose_unique()
+            assert parallel[col].count == serial[col].count
+            assert parallel[col].distinct_estimate == serial[col].distinct_estimate
+            assert (parallel[col].min_value, parallel[col].max_value) == (
+                serial[col].min_value,
+                serial[col].max_value,
+            )
+
+    def test_sample_of_head_reservoir_and_tail(self):
+        df = long_frame(10_000)
+        statistics = SheetStatistics(sample_rows=500, head_tail_rows=20)
+
+        feed(statistics, df, 1000)
+        sample = statistics.sample()
+
+        assert statistics.row_count == 10_000
+        assert 500 <= len(sample) <= 540
+        assert sample.index.is_unique and sample.index.is_monotonic_increasing
+        assert list(sample.index[:20]) == list(range(20))
+        assert list(sample.index[-20:]) == list(range(9980, 10_000))
+        # reservoir rows are spread over the whole sheet
+        assert len(sample.index[(sample.index > 1000) & (sample.index < 9000)])
+        assert (sample["id"] == sample.index).all()
+
+    def test_sample_is_reproducible(self):
+        df = long_frame(5000)
+
+        first = SheetStatistics(sample_rows=100, head_tail_rows=0)
+        second = SheetStatistics(sample_rows=100, head_tail_rows=0)
+        feed(first, df, 700)
+        feed(second, df, 700)
+
+        assert len(first.sample()) == 100
+        assert list(first.sample().index) == list(second.sample().index)
+
+    def test_sampled_proposal(self):
+        df = long_frame(10_000).astype(object)
+        # only in rows which can't be part of the sample
+        df.loc[5000, "text"] = "y" * 300
+        df.loc[5001, "code"] = None
+        statistics = SheetStatistics(sample_rows=100, head_tail_rows=10)
+        feed(statistics, df, 1000)
+        sample = statistics.sample()
+        assert 5000 not in sample.index and 5001 not in sample.index
+
+        columns = statistics.columns()
+
+        code = ImportField(statistics=columns["code"])
+        assert code.is_sampled
+        assert code.is_nullable
+        assert code.field_type == Field.Datatype.INTEGER_FIELD
+        assert len(code.choices) == 7
+        assert ImportField(statistics=columns["id"]).propose_unique()
+        # verified on all rows
+        assert columns["text"].bounds_verified
+        assert columns["text"].max_length == 300
+
+    def test_unverified_bounds_come_from_the_sample(self):
+        df = long_frame(10_000).astype(object)
+        df.loc[5000, "text"] = "y" * 300
+        statistics = SheetStatistics(sample_rows=100, head_tail_rows=10, verify=False)
+        feed(statistics, df, 1000)
+        assert 5000 not in statistics.sample().index
+
+        text = statistics.columns()["text"]
+
+        assert text.is_sampled
+        assert not text.bounds_verified
+        assert text.max_length == 9
+
+
+@override_settings(IMPORT_SAMPLE_ROWS=10, IMPORT_SAMPLE_HEAD_TAIL_ROWS=5)
+class TestSampledImport(TestCase):
+    def setUp(self):
+        self.file = TransformationFileFactory()
+
+    def test_sampled_columns_are_marked(self):
+        import_file(self.client, self.file)
+
+        columns = TransformationColumn.objects.filter(
+            transformation_headline__transformation_sheet__transformation_file=(
+                self.file
+            )
+        )
+        assert columns.exists()
+        assert all(column.sampled_rows for column in columns)
+
+        model = self.file.transformation_mapping.models.get()
+        response = self.client.get(f"/project/{model.pk}/fields")
+
+        self.assertContains(response, "Stichprobe")
+
+
+@override_settings(IMPORT_PROFILE_WORKERS=2)
+class TestParallelImport(TestCase):
+    def setUp(self):
+        self.file = TransformationFileFactory()
+
+    def test_columns_are_profiled_in_the_pool(self):
+        import_file(self.client, self.file)
+
+        fields = Field.objects.filter(
+            model__transformation_mapping=self.file.transformation_mapping
+        ).select_related("transformation_column__profile")
+        assert fields.exists()
+        age = fields.get(name="Age")
+        assert age.datatype == Field.Datatype.POSITIVE_SMALL_INTEGER_FIELD
+        assert age.transformation_column.profile.row_count == 1000
+        assert age.transformation_column.profile.distinct_count == 41
@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+from pandas import Series
+
+from project.services.column_profile import profile_values
+from project.services.column_statistics import ColumnStatistics, hash_values
+from project.services.import_field import ImportField
+from project.services.sketches import HyperLogLog, MisraGries, bit_length
+from project.tests.test_import_field import df_of_file
+
+
+def sketched_statistics(
+    series: Series, chunksize: int, sketch_after: int = 1000, top_count: int = 5
+) -> ColumnStatistics:
+    statistics = ColumnStatistics(
+        series.name, sketch_after=sketch_after, top_count=top_count
+    )
+    for start in range(0, len(series), chunksize):
+        statistics.update(series.iloc[start : start + chunksize])
+    return statistics
+
+
+def sketch_of(values) -> HyperLogLog:
+    sketch = HyperLogLog()
+    sketch.update(hash_values(Series(values)))
+    return sketch
+
+
+class TestHyperLogLog:
+    def test_bit_length(self):
+        values = [0, 1, 2, 3, 255, 256, 2**40 - 1, 2**63]
+
+        assert list(bit_length(np.array(values, dtype=np.uint64))) == [
+            value.bit_length() for value in values
+        ]
+
+    @pytest.mark.parametrize("count", [100, 10_000, 200_000])
+    def test_estimate(self, count):
+        sketch = sketch_of(range(count))
+
+        error = 3 * sketch.standard_error
+        assert abs(sketch.estimate() - count) <= count * error
+
+    def test_duplicates_are_counted_once(self):
+        assert (
+            sketch_of(list(range(1000)) * 5).estimate()
+            == sketch_of(range(1000)).estimate()
+        )
+
+    def test_merge_is_the_union(self):
+        merged = sketch_of(range(0, 60_000))
+        merged.merge(sketch_of(range(40_000, 100_000)))
+
+        assert (merged.registers == sketch_of(range(100_000)).registers).all()
+
+
+class TestMisraGries:
+    def test_heavy_hitters(self):
+        values = Series(["a"] * 300 + ["b"] * 200 + [f"x{i}" for i in range(500)])
+        summary = MisraGries(5)
+        for start in range(0, len(values), 100):
+            summary.update(values.iloc[start : start + 100].value_counts())
+
+        top = summary.most_frequent(2)
+        assert [value for value, count in top] == ["a", "b"]
+        # counts are lower bounds within the error bound
+        for (value, count), exact in zip(top, (300, 200)):
+            assert exact - len(values) / 6 <= count <= exact
+
+    def test_merge(self):
+        first, second = MisraGries(3), MisraGries(3)
+        first.seed({"a": 10, "b": 1})
+        second.seed({"a": 5, "c": 7})
+
+        first.merge(second)
+
+        assert first.most_frequent(2) == [("a", 15), ("c", 7)]
+
+
+class TestSketchedColumnStatistics:
+    @pytest.mark.parametrize(
+        "filename", ["Employee-Sample-Data.csv", "Financials-Sample-Data.xlsx"]
+    )
+    def test_sketched_proposal_matches_exact(self, pytestconfig, filename):
+        df = df_of_file(
+            pytestconfig.rootpath.joinpath("project/tests/sample_files", filename)
+        )
+
+        for col in df.columns:
+            expected = ImportField(df[col])
+            sketched = ImportField(statistics=sketched_statistics(df[col], 37))
+
+            assert sketched.field_type == expected.field_type
+            assert sketched.kwargs == expected.kwargs
+            assert sketched.propose_unique() == expected.propose_unique()
+
+    def test_unique_column(self):
+        statistics = sketched_statistics(Series(range(50_000)), 5000)
+
+        assert statistics.distinct_sketch is not None
+        assert statistics.is_distinct_estimated
+        assert not statistics.has_duplicate_values()
+        assert ImportField(statistics=statistics).propose_unique()
+
+    def test_duplicates_across_chunks(self):
+        statistics = sketched_statistics(Series(list(range(60)) + [3]), 10)
+
+        assert statistics.has_duplicate_values()
+        assert not ImportField(statistics=statistics).propose_unique()
+
+    def test_few_duplicates_are_below_the_error_of_the_sketch(self):
+        statistics = sketched_statistics(
+            Series(list(range(60)) + [3]), 10, sketch_after=0
+        )
+
+        assert statistics.distinct_estimate == 60
+        assert not statistics.has_duplicate_values()
+
+    def test_many_duplicates_are_estimated(self):
+        series = Series([f"v{i % 20_000}" for i in range(100_000)])
+
+        statistics = sketched_statistics(series, 7000)
+
+        assert statistics.has_duplicate_values()
+        assert statistics.distinct_count is None
+        assert abs(statistics.distinct_estimate - 20_000) <= 20_000 * 0.03
+
+    def test_most_frequent_of_many_values(self):
+        series = Series(["a"] * 1000 + [str(i) for i in range(2000)])
+
+        statistics = sketched_statistics(series.sample(frac=1, random_state=0), 300)
+
+        assert statistics.value_counts is None
+        assert statistics.most_frequent(1)[0][0] == "a"
+
+    def test_merge(self):
+        first = sketched_statistics(Series(range(20_000)), 1000)
+        second = sketched_statistics(
+            Series(list(range(20_000, 30_000)) + list(range(5000))), 1000
+        )
+
+        first.merge(second)
+
+        assert first.has_duplicate_values()
+        assert abs(first.distinct_estimate - 30_000) <= 30_000 * 0.03
+
+    def test_profile_values(self):
+        series = Series(["a"] * 1000 + [str(i) for i in range(2000)])
+
+        values = profile_values(sketched_statistics(series, 300))
+
+        assert values["distinct_estimated"]
+        assert abs(values["distinct_count"] - 2001) <= 2001 * 0.03
+        assert values["top_values"] is None
+        value, count = values["frequent_values"][0]
+        assert value == "a" and count <= 1000
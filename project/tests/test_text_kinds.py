@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pandas import Series
+
+from project.models import Field
+from project.services.column_statistics import ColumnStatistics
+from project.services.import_field import ImportField
+from project.services.text_kinds import (
+    DETECTION_SAMPLE_SIZE,
+    KIND_DATE,
+    KIND_DATE_TIME,
+    KIND_EMAIL,
+    KIND_TIME,
+    KIND_URL,
+    KIND_UUID,
+    ORDER_DMY,
+    ORDER_MDY,
+    ORDER_YMD,
+    base_kind,
+    date_order,
+    detect_kinds,
+    parse_text_datetime,
+)
+
+
+class TestTextKinds:
+    @pytest.mark.parametrize(
+        "values, kind",
+        [
+            (["2021-03-04", "1999-12-31"], KIND_DATE),
+            (["4/8/2016", "11/29/1997"], KIND_DATE),
+            (["13:45", "08:05:59"], KIND_TIME),
+            (["2021-03-04 13:45:00", "2021-03-04T08:00:00+01:00"], KIND_DATE_TIME),
+            (["anna@example.com", "b.c@mail.example.org"], KIND_EMAIL),
+            (["https://example.com/a?b=1", "http://www.example.org"], KIND_URL),
+            (["1b4e28ba-2fa1-11d2-883f-0016d3cca427"], KIND_UUID),
+        ],
+    )
+    def test_kind(self, values, kind):
+        assert [base_kind(kind) for kind in detect_kinds(Series(values))[:1]] == [kind]
+
+    @pytest.mark.parametrize(
+        "values, order",
+        [
+            (["2021-03-04", "1999-12-31"], ORDER_YMD),
+            (["4/8/2016", "11/29/1997"], ORDER_MDY),
+            # ambiguous slashes are month first
+            (["4/8/2016", "11/8/2016"], ORDER_MDY),
+            (["13/8/2016", "11/8/2016"], ORDER_DMY),
+            # dotted dates are day first, whether a day is beyond 12 or not
+            (["04.08.2016", "11.08.2016", "01.12.2020"], ORDER_DMY),
+            (["04.08.2016", "11.08.2016", "13.08.2016"], ORDER_DMY),
+            (["04.08.16 13:45", "13.08.2016 08:00"], ORDER_DMY),
+        ],
+    )
+    def test_date_order(self, values, order):
+        assert date_order(detect_kinds(Series(values))[0]) == order
+
+    def test_parse_in_the_detected_order(self):
+        values = Series(["04.08.2016", "11.08.2016", "01.12.2020"])
+        kind = detect_kinds(values)[0]
+
+        assert [
+            parse_text_datetime(value, kind).date().isoformat() for value in values
+        ] == [
+            "2016-08-04",
+            "2016-08-11",
+            "2020-12-01",
+        ]
+        assert parse_text_datetime("2021-03-04T08:00:00.5+01:00", "datetime:ymd") == (
+            datetime(2021, 3, 4, 8, 0, 0, 500000, timezone(timedelta(hours=1)))
+        )
+        assert parse_text_datetime("30.02.2016", kind) is None
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            ["2021-02-30"],
+            ["25:00"],
+            ["anna@example"],
+            ["www.example.com"],
+            ["12", "2021-03-04"],
+        ],
+    )
+    def test_no_kind(self, values):
+        assert detect_kinds(Series(values)) == []
+
+    def test_all_values_are_checked_beyond_the_sample(self):
+        values = Series(["2021-03-04"] * DETECTION_SAMPLE_SIZE + ["someday"])
+
+        assert detect_kinds(values) == []
+
+    def test_later_chunks_confirm_the_kinds(self):
+        statistics = ColumnStatistics("mail")
+        statistics.update(Series(["a@example.com", "b@example.com"]))
+        assert statistics.text_kind == KIND_EMAIL
+
+        statistics.update(Series(["not a mail"]))
+
+        assert statistics.text_kind is None
+
+    def test_numbers_have_no_kind(self):
+        statistics = ColumnStatistics("mixed")
+        statistics.update(Series(["2021-03-04"]))
+        statistics.update(Series([7]))
+
+        assert statistics.text_kinds == []
+
+
+class TestTextKindFields:
+    @pytest.mark.parametrize(
+        "values, field_type",
+        [
+            (["2021-03-04", None, "2021-03-04"], Field.Datatype.DATE_FIELD),
+            (["13:45"] * 3, Field.Datatype.TIME_FIELD),
+            (["2021-03-04 13:45"] * 3, Field.Datatype.DATE_TIME_FIELD),
+            (["1b4e28ba-2fa1-11d2-883f-0016d3cca427"], Field.Datatype.UUIDFIELD),
+        ],
+    )
+    def test_field_type(self, values, field_type):
+        import_field = ImportField(Series(values))
+
+        assert import_field.field_type == field_type
+        assert import_field.kwargs[ImportField.MAX_LENGTH] is None
+        assert import_field.choices is None
+
+    def test_email_keeps_max_length(self):
+        import_field = ImportField(Series(["anna@example.com", "bob@example.com"]))
+
+        assert import_field.field_type == Field.Datatype.EMAIL_FIELD
+        assert import_field.kwargs[ImportField.MAX_LENGTH] == Field.find_next_step(16)
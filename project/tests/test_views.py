@@ -6,7 +6,7 @@ import pytest
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.http import HttpResponseRedirect, QueryDict, HttpRequest
-from django.test import RequestFactory, TestCase, Client
+from django.test import RequestFactory, TestCase, Client, override_settings
 
 from project.tests.factories import *
 from project.views.views import IndexView
@@ -149,3 +149,80 @@ class TestProjectViews(TestCase):
         response = self.client.get(f"/field/{field.pk}/delete")
 
         assert response.status_code == 200
+
+
+class TestProjectImportFileView(TestCase):
+    def setUp(self):
+        self.file = TransformationFileFactory()
+        self.client = Client()
+        self.client.force_login(self.file.transformation_mapping.project.user)
+
+    def test_get_import_file(self):
+        response = self.client.get(f"/project/file/{self.file.pk}/import")
+
+        assert response.status_code == 200
+        self.assertContains(response, f"/project/file/{self.file.pk}/import/0")
+        self.assertNotContains(response, "1000 Zeilen")
+
+    def test_get_import_file_sheet(self):
+        response = self.client.get(
+            f"/project/file/{self.file.pk}/import/0", {"sheet0_nrows": 10}
+        )
+
+        assert response.status_code == 200
+        self.assertContains(response, "10 Zeilen")
+        assert self.client.session["sheet_params"]["sheet0"]["nrows"] == 10
+
+    @override_settings(IMPORT_CHUNK_SIZE=100)
+    def test_post_import_file(self):
+        response = import_file(self.client, self.file)
+
+        assert response.status_code == 302
+        model = Model.objects.get(
+            transformation_mapping=self.file.transformation_mapping
+        )
+        assert model.fields.count() == 14
+        headline = model.transformation_headline
+        assert [record["pk"] for record in headline.iter_rows()] == list(range(1, 1001))
+        assert headline.row_batches.count() == 10
+        assert headline.timezone == "Europe/Berlin"
+
+    def test_post_import_file_again(self):
+        import_file(self.client, self.file)
+        model = Model.objects.get(
+            transformation_mapping=self.file.transformation_mapping
+        )
+        fields = {field.index: field.pk for field in model.fields.all()}
+        model.fields.filter(index=1).update(name="renamed", description="kept")
+
+        response = import_file(self.client, self.file)
+
+        assert response.status_code == 302
+        assert {field.index: field.pk for field in model.fields.all()} == fields
+        field = model.fields.get(index=1)
+        assert (field.name, field.description) == ("EEID", "kept")
+        assert field.transformation_column.profile.row_count == 1000
+
+    @override_settings(IMPORT_CHUNK_SIZE=100)
+    def test_get_model_rows(self):
+        import_file(self.client, self.file)
+        model = Model.objects.get(
+            transformation_mapping=self.file.transformation_mapping
+        )
+
+        response = self.client.get(
+            f"/project/model/{model.pk}/rows",
+            {"offset": 150, "limit": 10, "column": ["Full Name", "Age"]},
+        )
+
+        assert response.status_code == 200
+        self.assertContains(response, "Zeilen 151 bis 160 von 1000")
+        self.assertContains(response, "<th>Full Name</th>", html=True)
+        self.assertNotContains(response, "<th>City</th>", html=True)
+        self.assertContains(response, "offset=160")
+        self.assertContains(response, "offset=140")
+
+    def test_get_import_file_unknown_sheet(self):
+        response = self.client.get(f"/project/file/{self.file.pk}/import/1")
+
+        assert response.status_code == 404
@@ -39,6 +39,11 @@ urlpatterns = [
         ProjectDetailModelView.as_view(),
         name="project_detail_model",
     ),
+    path(
+        "model/<int:pk>/rows",
+        ProjectModelRowsView.as_view(),
+        name="project_model_rows",
+    ),
     path(
         "model/<int:pk>/edit",
         ProjectUpdateModelView.as_view(),
@@ -108,4 +113,19 @@ urlpatterns = [
         ProjectImportFileView.as_view(),
         name="project_import_file",
     ),
+    path(
+        "file/<int:pk>/import/<int:sheet>",
+        ProjectImportFileSheetView.as_view(),
+        name="project_import_file_sheet",
+    ),
+    path(
+        "file/<int:pk>/import/job",
+        ProjectImportFileJobView.as_view(),
+        name="project_import_file_job",
+    ),
+    path(
+        "file/<int:pk>/import/job/import",
+        ProjectImportFileImportJobView.as_view(),
+        name="project_import_file_import_job",
+    ),
 ]
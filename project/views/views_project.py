@@ -4,10 +4,19 @@ from typing import (
     TypeVar,
 )
 
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import QuerySet
-from django.http import HttpResponse, HttpResponseRedirect, FileResponse
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseRedirect,
+    FileResponse,
+    Http404,
+)
 from django.shortcuts import redirect
+from django.template.defaultfilters import slugify
 from django.utils.translation import gettext_lazy as _
 from django.views import View
 from django.views.generic import DetailView, ListView
@@ -24,8 +33,14 @@ from project.models import *
 from project.services.cookiecutter_template_expander import CookieCutterTemplateExpander
 from project.services.edit_model import *
 from project.services.edit_project import prepare_deploy_project, deploy_project
-from project.services.import_file import import_file
+from project.services.import_file import (
+    get_importer,
+    preview_sheet,
+    get_sheet_reader_params,
+)
 from project.services.importer import *
+from project.services.import_jobs import enqueue_job, import_params, latest_job
+from project.services.row_window import DEFAULT_ROW_WINDOW_LIMIT, row_window
 from project.services.session import *
 from project.views.mixins import ModelUserFieldPermissionMixin
 
@@ -448,6 +463,49 @@ class ProjectDetailModelView(
         return model
 
 
+class ProjectModelRowsView(
+    LoginRequiredMixin, ProjectModelViewMixin, ModelUserFieldPermissionMixin, DetailView
+):
+    """
+    Renders a window of the imported rows of a model, requested by htmx with
+    the offset, limit and columns of the window as query parameters.
+    """
+
+    model = Model
+    template_name = "project/model_rows.html"
+    http_method_names = ["get"]
+
+    def get_int_param(self, name: str, default: int) -> int:
+        try:
+            return int(self.request.GET.get(name, default))
+        except ValueError:
+            return default
+
+    def get_window_url(self, offset: int | None) -> str | None:
+        if offset is None:
+            return None
+        params = self.request.GET.copy()
+        params["offset"] = str(offset)
+        return f"{self.request.path}?{params.urlencode()}"
+
+    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
+        data = super().get_context_data(**kwargs)
+        headline = self.object.transformation_headline
+        if headline is None:
+            data["window"] = None
+            return data
+        window = row_window(
+            headline,
+            offset=self.get_int_param("offset", 0),
+            limit=self.get_int_param("limit", DEFAULT_ROW_WINDOW_LIMIT),
+            columns=self.request.GET.getlist("column") or None,
+        )
+        data["window"] = window
+        data["previous_url"] = self.get_window_url(window.previous_offset)
+        data["next_url"] = self.get_window_url(window.next_offset)
+        return data
+
+
 class ProjectUpdateModelView(
     LoginRequiredMixin, ProjectModelViewMixin, ModelUserFieldPermissionMixin, UpdateView
 ):
@@ -555,7 +613,9 @@ class ProjectListFieldsView(LoginRequiredMixin, ListView):
             ):
                 return super().handle_no_permission()
 
-            return Field.objects.filter(model=model)
+            return Field.objects.filter(model=model).select_related(
+                "transformation_column"
+            )
         else:
             return QuerySet(Field).none()
 
@@ -703,6 +763,12 @@ class ProjectCreateFileView(
         data["project"] = self.get_object()
         return data
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if getattr(settings, "IMPORT_PREPARE_ON_UPLOAD", True):
+            enqueue_job(self.object, ImportJob.Kind.PREPARE)
+        return response
+
 
 class ProjectDeleteFileView(  # type: ignore
     LoginRequiredMixin, ProjectFileViewMixin, ModelUserFieldPermissionMixin, DeleteView
@@ -720,27 +786,22 @@ class ProjectImportFileView(
 
     def get_form(self, form_class=None):
         file: TransformationFile = self.get_object()  # type: ignore
-        df_by_sheet, importer = self.get_df_by_sheet(file)
+        sheets = get_importer(file).sheets()
+        sheet_params = self.get_session_sheet_params(sheets)
 
         form = ProjectImportFileForm(**self.get_form_kwargs())
-        form.init_helper(df_by_sheet, file.pk)
+        form.init_helper(
+            {sheet: get_sheet_reader_params(sheet, sheet_params) for sheet in sheets},
+            file.pk,
+        )
 
         return form
 
-    def get_df_by_sheet(
-        self, file: TransformationFile
-    ) -> Tuple[Dict[str | int, Tuple[DataFrame, SheetReaderParams]], Importer]:
-        importer = Importer(Path(file.file.path))
-        sheet_params: Dict[
-            str | int, SheetReaderParams
-        ] = self.get_session_sheet_params(importer.sheets())
-        successfull, df_by_sheet = import_file(importer, sheet_params)
-        assert successfull
-        self.set_session_sheet_params(df_by_sheet)
-        return df_by_sheet, importer
-
     def set_session_sheet_params(self, df_by_sheet):
-        sheet_params: dict[str, SheetReaderParams] = {}  # type: ignore
+        # sheets are loaded one by one, so keep the params of the other sheets
+        sheet_params: dict[str, SheetReaderParams] = dict(  # type: ignore
+            self.request.session.get(SHEET_PARAMS, {})
+        )
         for k, v in df_by_sheet.items():
             sheet = slugify(k)
             sheet_params[sheet] = v[1]
@@ -750,35 +811,28 @@ class ProjectImportFileView(
         self, sheets: List[str | int]
     ) -> Dict[str | int, SheetReaderParams]:
         sheet_params: Dict[str | int, SheetReaderParams] = {}
-        if SHEET_PARAMS in self.request.session:
-            session_params = self.request.session[SHEET_PARAMS]
-            s: str | int
-            for s in sheets:
-                sheet: str | int
-                if isinstance(s, str):
-                    sheet = slugify(s)
-                else:
-                    sheet = s
-
-                if sheet in session_params:
-                    sheet_params[sheet] = session_params[sheet]
-                else:
-                    sheet_params[sheet] = SheetReaderParams()
-
-                sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_HEADER)
-                sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_INDEX_COL)
-                sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_NROWS)
-                sheet_params = self.set_param(
-                    sheet_params, sheet, READ_PARAM_SKIPFOOTER
-                )
-                sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_SKIPROWS)
-                sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_USECOLS)
-                sheet_params = self.set_param(
-                    sheet_params, sheet, TABLE_PARAM_HEAD_ROWS
-                )
-                sheet_params = self.set_param(
-                    sheet_params, sheet, TABLE_PARAM_TAIL_ROWS
-                )
+        session_params = self.request.session.get(SHEET_PARAMS, {})
+        s: str | int
+        for s in sheets:
+            sheet: str | int
+            if isinstance(s, str):
+                sheet = slugify(s)
+            else:
+                sheet = s
+
+            if sheet in session_params:
+                sheet_params[sheet] = session_params[sheet]
+            else:
+                sheet_params[sheet] = SheetReaderParams()
+
+            sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_HEADER)
+            sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_INDEX_COL)
+            sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_NROWS)
+            sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_SKIPFOOTER)
+            sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_SKIPROWS)
+            sheet_params = self.set_param(sheet_params, sheet, READ_PARAM_USECOLS)
+            sheet_params = self.set_param(sheet_params, sheet, TABLE_PARAM_HEAD_ROWS)
+            sheet_params = self.set_param(sheet_params, sheet, TABLE_PARAM_TAIL_ROWS)
 
         return sheet_params
 
@@ -790,21 +844,96 @@ class ProjectImportFileView(
         local_sheet_params[sheet][param] = convert_param(param, form_value)
         return local_sheet_params
 
+    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
+        data = super().get_context_data(**kwargs)
+        file = self.get_object()
+        data["job"] = latest_job(file, ImportJob.Kind.PREPARE)
+        data["import_job"] = latest_job(file, ImportJob.Kind.IMPORT)
+        return data
+
     def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
         return super().post(request, *args, **kwargs)
 
     def form_valid(self, form) -> HttpResponse:
+        """
+        The import runs in an import job, the import page shows its progress.
+        """
         file: TransformationFile = self.get_object()
-        df_by_sheet: Dict[str | int, Tuple[DataFrame, SheetReaderParams]]
-        importer: Importer
-        df_by_sheet, importer = self.get_df_by_sheet(file)
-        clean_existing_models = True
-        create_models(self.request, file, df_by_sheet, clean_existing_models)
-        return super().form_valid(form)
+        sheet_params = self.get_session_sheet_params(get_importer(file).sheets())
+        self.set_session_sheet_params(
+            {sheet: (None, params) for sheet, params in sheet_params.items()}
+        )
+        dry_run = IMPORT_ACTION_REVIEW in self.request.POST
+        enqueue_job(
+            file,
+            ImportJob.Kind.IMPORT,
+            import_params(
+                sheet_params,
+                incremental=dry_run or IMPORT_ACTION_CHANGES in self.request.POST,
+                dry_run=dry_run,
+            ),
+        )
+        return HttpResponseRedirect(self.request.path)
 
     def get_object(self):
         file: TransformationFile = get_object_or_404(  # type: ignore
-            TransformationFile, *self.args, **self.kwargs
+            TransformationFile, pk=self.kwargs["pk"]
         )
         set_selection(self.request, file.transformation_mapping.project.id)
         return file
+
+
+class ProjectImportFileSheetView(ProjectImportFileView):
+    """
+    Renders the table section of a single sheet, requested by htmx when the
+    tab of the sheet gets visible or its import settings change.
+    """
+
+    template_name = "project/project_import_sheet.html"
+    http_method_names = ["get"]
+
+    def get_form(self, form_class=None):
+        file: TransformationFile = self.get_object()  # type: ignore
+        importer = get_importer(file)
+        sheets = importer.sheets()
+        sheet_index: int = self.kwargs["sheet"]
+        if sheet_index >= len(sheets):
+            raise Http404(_("Sheet not found"))
+        sheet = sheets[sheet_index]
+
+        sheet_params = self.get_session_sheet_params([sheet])
+        sheet_reader_params = get_sheet_reader_params(sheet, sheet_params)
+        preview = preview_sheet(importer, sheet, sheet_reader_params)
+        self.set_session_sheet_params({sheet: (preview, sheet_reader_params)})
+
+        form = ProjectImportFileForm(**self.get_form_kwargs())
+        form.init_sheet_helper(
+            sheet, preview, sheet_reader_params, get_sheet_url(file.pk, sheet_index)
+        )
+        return form
+
+
+class ProjectImportFileJobView(
+    LoginRequiredMixin, ProjectFileViewMixin, ModelUserFieldPermissionMixin, DetailView
+):
+    """
+    Renders the state of the prepare job of a file, polled by htmx until the
+    job is finished.
+    """
+
+    model = TransformationFile
+    template_name = "project/project_import_job.html"
+    http_method_names = ["get"]
+    kind = ImportJob.Kind.PREPARE
+
+    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
+        data = super().get_context_data(**kwargs)
+        data["job"] = latest_job(self.object, self.kind)
+        return data
+
+
+class ProjectImportFileImportJobView(ProjectImportFileJobView):
+    """Renders the progress of the sheets of the import job of a file."""
+
+    template_name = "project/project_import_run.html"
+    kind = ImportJob.Kind.IMPORT